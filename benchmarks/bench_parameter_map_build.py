@@ -0,0 +1,58 @@
+"""
+times ModelParameterMapBuilder.build() of the Strak 2021 parameter set with the
+memoized scaling coefficients against coefficients recomputed on every access
+
+python benchmarks/bench_parameter_map_build.py --repeats 200
+"""
+
+import argparse
+from time import perf_counter
+
+from modelParameters import ModelParameterMapBuilder
+from strakParam import Strak2021ScalingCoefficient, get_Strak_2021_model_parameter_map
+
+
+class UnmemoizedStrak2021ScalingCoefficient(
+    Strak2021ScalingCoefficient, memoizeCoefficients=False
+):
+    pass
+
+
+def benchmark(scalingCoefficientClass, repeats):
+    start = perf_counter()
+    for _ in range(repeats):
+        get_Strak_2021_model_parameter_map(scalingCoefficient=scalingCoefficientClass())
+    buildTime = (perf_counter() - start) / repeats
+
+    start = perf_counter()
+    for _ in range(repeats):
+        bluePrint = get_Strak_2021_model_parameter_map(
+            blueprint=True, scalingCoefficient=scalingCoefficientClass()
+        )
+        ModelParameterMapBuilder.fromBluePrint(bluePrint).build()
+    bluePrintTime = (perf_counter() - start) / repeats
+
+    scalingCoefficient = scalingCoefficientClass()
+    start = perf_counter()
+    for _ in range(repeats):
+        scalingCoefficient.timeCoefficient
+        scalingCoefficient.stressCoefficient
+        scalingCoefficient.velocityVectorCoefficient
+    accessTime = (perf_counter() - start) / repeats
+
+    print(
+        f"{scalingCoefficientClass.__name__}: build = {buildTime * 1e3:.2f}ms "
+        f"fromBluePrint = {bluePrintTime * 1e3:.2f}ms "
+        f"coefficient access = {accessTime * 1e6:.2f}us"
+    )
+    return buildTime
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeats", type=int, default=100)
+    args = parser.parse_args()
+
+    before = benchmark(UnmemoizedStrak2021ScalingCoefficient, args.repeats)
+    after = benchmark(Strak2021ScalingCoefficient, args.repeats)
+    print(f"build speedup = {before / after:.2f}x")
@@ -0,0 +1,67 @@
+from time import perf_counter
+
+import numpy as np
+from underworld.scaling import units as u
+
+from PlatePolygons import SubductionZonePolygons, pointsInPolygon
+from PolygonIndex import PolygonIndex
+from strakParam import get_Strak_2021_model_parameter_map
+
+PARTICLES_PER_CELL = 20
+
+
+def bruteForceClassify(points, polygons):
+    labels = np.zeros(len(points), dtype=np.int32)
+    for shape, label in polygons:
+        labels[pointsInPolygon(points, shape)] = label
+    return labels
+
+
+def benchmark(resolution, polygons, maxCoord):
+    rng = np.random.default_rng(0)
+    particleAmount = resolution[0] * resolution[1] * PARTICLES_PER_CELL
+    points = rng.uniform((0.0, 0.0), maxCoord, size=(particleAmount, 2))
+
+    start = perf_counter()
+    reference = bruteForceClassify(points, polygons)
+    bruteForceTime = perf_counter() - start
+
+    start = perf_counter()
+    index = PolygonIndex(polygons, (0.0, 0.0), maxCoord, resolution)
+    buildTime = perf_counter() - start
+
+    start = perf_counter()
+    labels = index.classify(points, 0)
+    indexTime = perf_counter() - start
+
+    assert np.array_equal(reference, labels)
+    print(
+        f"{resolution = } {particleAmount = } {bruteForceTime = :.3f}s "
+        f"{buildTime = :.3f}s {indexTime = :.3f}s "
+        f"speedup = {bruteForceTime / indexTime:.1f}x"
+    )
+
+
+if __name__ == "__main__":
+    parameters = get_Strak_2021_model_parameter_map()
+    zone = SubductionZonePolygons(
+        parameters,
+        27,
+        200e3 * u.meter,
+        6000e3 * u.meter,
+        30e3 * u.meter,
+        20e3 * u.meter,
+        30e3 * u.meter,
+        100e3 * u.meter,
+    )
+    polygons = [
+        (zone.getUpperSlabShapeArray(), 1),
+        (zone.getMiddleSlabShapeArray(), 3),
+        (zone.getLowerSlabShapeArray(), 2),
+    ]
+    maxCoord = (
+        parameters.modelLength.nonDimensionalValue.magnitude,
+        parameters.modelHeight.nonDimensionalValue.magnitude,
+    )
+    for resolution in ((200, 100), (800, 400)):
+        benchmark(resolution, polygons, maxCoord)
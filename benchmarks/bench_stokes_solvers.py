@@ -0,0 +1,102 @@
+"""
+runs a few steps of the Strak 2021 setup under every Stokes solver profile,
+each profile in its own process so the peak resident memory is not shared
+
+python benchmarks/bench_stokes_solvers.py --steps 5 --resolution 200 100
+"""
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+from time import perf_counter
+
+from underworld.scaling import units as u
+
+from PlatePolygons import SubductionZonePolygons
+from StokesSolverProfiles import STOKES_SOLVER_PROFILES
+from strakParam import get_Strak_2021_model_parameter_map
+from SubductionModel import SubductionModel
+
+
+def runProfile(profile, steps, resolution):
+    parameters = get_Strak_2021_model_parameter_map()
+    polygons = SubductionZonePolygons(
+        parameters,
+        27,
+        200e3 * u.meter,
+        6000e3 * u.meter,
+        30e3 * u.meter,
+        20e3 * u.meter,
+        30e3 * u.meter,
+        100e3 * u.meter,
+    )
+    model = SubductionModel(
+        name=f"bench_solver_{profile}",
+        modelParameterMap=parameters,
+        resolution=resolution,
+        stepAmountCheckpoint=steps + 1,
+        subductionZonePolygons=polygons,
+        totalSteps=steps,
+        solverProfile=profile,
+    )
+
+    solveTime = 0.0
+    iterations = []
+    for _ in range(steps):
+        start = perf_counter()
+        model._solveStokes()
+        solveTime += perf_counter() - start
+        iterations.append(model.nonLinearIterations)
+        model.currentTime, model.currentStep = model._update(
+            model.currentTime, model.currentStep, model._getStepTimeStep()
+        )
+
+    return {
+        "profile": profile,
+        "solveTime": solveTime,
+        "nonLinearIterations": iterations,
+        "peakRssMb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--steps", type=int, default=5)
+    parser.add_argument("--resolution", type=int, nargs=2, default=(200, 100))
+    parser.add_argument("--profile", choices=list(STOKES_SOLVER_PROFILES))
+    args = parser.parse_args()
+
+    if args.profile is not None:
+        result = runProfile(args.profile, args.steps, tuple(args.resolution))
+        print("RESULT " + json.dumps(result))
+        sys.exit(0)
+
+    results = []
+    for profile in STOKES_SOLVER_PROFILES:
+        command = [
+            sys.executable,
+            __file__,
+            "--profile",
+            profile,
+            "--steps",
+            str(args.steps),
+            "--resolution",
+            *map(str, args.resolution),
+        ]
+        process = subprocess.run(command, capture_output=True, text=True)
+        lines = [l for l in process.stdout.splitlines() if l.startswith("RESULT ")]
+        if process.returncode != 0 or not lines:
+            print(f"{profile = } failed\n{process.stderr}")
+            continue
+        results.append(json.loads(lines[-1][len("RESULT ") :]))
+
+    print(
+        f"{'profile':<12}{'solve time [s]':>16}{'iterations':>12}{'peak RSS [MB]':>16}"
+    )
+    for result in results:
+        print(
+            f"{result['profile']:<12}{result['solveTime']:>16.2f}"
+            f"{sum(result['nonLinearIterations']):>12}{result['peakRssMb']:>16.1f}"
+        )
@@ -0,0 +1,67 @@
+import atexit
+import logging
+import queue
+import threading
+from typing import Callable
+
+from CheckPointSnapshot import CheckPointSnapshot
+
+
+class AsyncCheckPointWriter:
+    """
+    writes checkpoint snapshots on a background thread so the model can
+    continue with the next solve, at most maxPending snapshots are held in
+    memory before submit blocks
+    """
+
+    def __init__(
+        self,
+        writeSnapshot: Callable[[CheckPointSnapshot], None],
+        maxPending: int = 2,
+    ) -> None:
+        self._writeSnapshot = writeSnapshot
+        self._queue = queue.Queue(maxsize=maxPending)
+        self._error = None
+        self._closed = False
+        self._thread = threading.Thread(
+            target=self._work, name="checkPointWriter", daemon=True
+        )
+        self._thread.start()
+        atexit.register(self.close)
+
+    def _work(self):
+        while True:
+            snapshot = self._queue.get()
+            try:
+                if snapshot is None:
+                    return
+                self._writeSnapshot(snapshot)
+            except Exception as e:
+                logging.exception(f"failed writing checkpoint {snapshot.step = }")
+                self._error = e
+            finally:
+                self._queue.task_done()
+
+    def _raiseError(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def submit(self, snapshot: CheckPointSnapshot):
+        self._raiseError()
+        if self._closed:
+            raise RuntimeError("checkpoint writer is closed")
+        if snapshot is not None:
+            self._queue.put(snapshot)
+
+    def flush(self):
+        self._queue.join()
+        self._raiseError()
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+        self._raiseError()
@@ -1,75 +1,238 @@
+import hashlib
 import json
 import os
+import shutil
+import threading
 
+import attr
+import numpy as np
 from underworld import mesh as Mesh
 from underworld import mpi
 from underworld.swarm import Swarm
 
+from AsyncCheckPointWriter import AsyncCheckPointWriter
+from CheckPointSnapshot import CheckPointSnapshot, takeCheckPointSnapshot
+from ConsolidatedCheckPoint import (
+    MESH_GROUP,
+    SWARM_GROUP,
+    findConsolidatedSteps,
+    getConsolidatedFileName,
+    interpolateMeshVariable,
+    readMeshGeometry,
+    readMeshVariable,
+    readSwarmCoordinates,
+    readSwarmVariable,
+    readTime,
+    writeConsolidatedCheckPoint,
+    writeConsolidatedIndex,
+)
+from generateXdmf import writeLegacyStepXdmf
+from LegacyCheckPoint import (
+    COMPLETE_MARKER,
+    SECONDS_PER_YEAR,
+    findLegacySteps,
+    readLegacyMeshGeometry,
+    readLegacyTime,
+)
+
+
+def _contentHash(data: np.ndarray) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{data.dtype.str}{data.shape}".encode())
+    digest.update(np.ascontiguousarray(data).data)
+    return digest.hexdigest()
+
 
 class CheckPointManager:
-    def __init__(self, modelName, outputPath) -> None:
+    def __init__(
+        self,
+        modelName,
+        outputPath,
+        asynchronous=False,
+        maxPendingCheckPoints=2,
+        checkpointFormat="legacy",
+        compression=None,
+        chunked=False,
+        writeXdmf=True,
+        fullCheckPointEvery=None,
+        saveFigures=False,
+    ) -> None:
+        """
+        param asynchronous: snapshot the fields of every rank into memory and write them on
+        a background thread, needs the consolidated format
+        param checkpointFormat: "legacy" writes the NNNNN/h5 and NNNNN/xdmf directory tree,
+        "consolidated" writes a single NNNNN.h5 file per step (one part per rank and an index
+        in parallel), see ConsolidatedCheckPoint. Both formats can always be read.
+        param compression: h5py compression filter for the consolidated format, e.g. "gzip"
+        param writeXdmf: write the legacy xdmf descriptors at every checkpoint, when False
+        (and for the asynchronous and consolidated modes) they can be generated afterwards
+        with generateXdmf.py
+        param fullCheckPointEvery: write incremental consolidated checkpoints, variables whose
+        content did not change since the last checkpoint are stored as a reference to the file
+        holding them and every fullCheckPointEvery-th checkpoint is written in full
+        param saveFigures: render the viscosity, strain rate, stress and velocity figures
+        at every checkpoint, this slows the run down, postProcess.py renders them offline
+        """
+        if checkpointFormat not in ("legacy", "consolidated"):
+            raise ValueError(f"unknown {checkpointFormat = }")
+        if asynchronous and checkpointFormat != "consolidated":
+            raise ValueError("asynchronous checkpoints need the consolidated format")
+        if fullCheckPointEvery is not None and checkpointFormat != "consolidated":
+            raise ValueError("incremental checkpoints need the consolidated format")
+        if fullCheckPointEvery is not None and fullCheckPointEvery < 1:
+            raise ValueError(f"{fullCheckPointEvery = } must be at least 1")
+
         self.ModelName = modelName
         self.outputPath = outputPath
+        self.asynchronous = asynchronous
+        self.checkpointFormat = checkpointFormat
+        self.compression = compression
+        self.chunked = chunked
+        self.writeXdmf = writeXdmf
+        self.fullCheckPointEvery = fullCheckPointEvery
+        self.saveFigures = saveFigures
+        self._writtenCheckPoints = 0
+        # (group, name) -> (content hash, step of the file holding the data)
+        self._writtenDatasets = {}
+        self._loadedParticleIndices = None
+        # steps whose part this rank has written, their index is still missing
+        self._writtenParts = set()
+        self._writtenPartsLock = threading.Lock()
+        self._pendingIndices = {}
+        self._writer = None
+        if asynchronous:
+            self._writer = AsyncCheckPointWriter(
+                self._writeSnapshot, maxPendingCheckPoints
+            )
 
     def _getStepOutputPath(self, step: int):
         stepString = str(step).zfill(5)
         stepOutputPath = self.outputPath + "/" + stepString
         return stepOutputPath
 
+    def _getTemporaryPath(self):
+        return self.outputPath + "/.tmp"
+
+    def _getTemporaryStepOutputPath(self, step: int):
+        return self._getTemporaryPath() + "/" + str(step).zfill(5)
+
     def _getH5Path(self, step: int):
         return self._getStepOutputPath(step) + "/h5/"
 
     def _getXdmfPath(self, step: int):
         return self._getStepOutputPath(step) + "/xdmf/"
 
+    def _getConsolidatedPath(self, step: int):
+        return self.outputPath + "/" + getConsolidatedFileName(step)
+
+    def _isConsolidated(self, step: int) -> bool:
+        return os.path.isfile(self._getConsolidatedPath(step))
+
+    def findLatestCompleteStep(self):
+        """
+        last step with a fully written checkpoint in either format, None when there is none.
+        Consolidated files only appear once complete, legacy steps carry a marker.
+        Collective, rank 0 scans the output directory
+        """
+        latestStep = None
+        if mpi.rank == 0 and os.path.isdir(self.outputPath):
+            steps = findLegacySteps(self.outputPath, completeOnly=True)
+            steps += findConsolidatedSteps(self.outputPath)
+            latestStep = max(steps, default=None)
+        return mpi.comm.bcast(latestStep, root=0)
+
+    def getMeshPath(self):
+        return self.outputPath + "/mesh.00000.h5"
+
     def getMesh(self, mesh) -> Mesh.FeMesh_Cartesian:
-        meshPath = self.outputPath + "mesh.00000.h5"
-        mesh.load(filename=meshPath)
+        mesh.load(filename=self.getMeshPath())
+
+    def _getSavedMeshGeometry(self, step, name):
+        if self._isConsolidated(step):
+            return readMeshGeometry(self._getConsolidatedPath(step))
+        return readLegacyMeshGeometry(self._getH5Path(step) + name + ".h5")
+
+    def isSameMesh(self, step, mesh, name="velocityField") -> bool:
+        """
+        whether the variable was saved on a mesh with the resolution and extent of mesh,
+        its nodal data can then be copied by global node id instead of interpolated
+        """
+        resolution, minCoord, maxCoord = self._getSavedMeshGeometry(step, name)
+        return (
+            tuple(mesh.elementRes) == resolution
+            and np.allclose(mesh.minCoord, minCoord)
+            and np.allclose(mesh.maxCoord, maxCoord)
+        )
 
     def getSwarm(self, swarm, step) -> Swarm:
+        if self._isConsolidated(step):
+            coordinates = readSwarmCoordinates(self._getConsolidatedPath(step))
+            self._loadedParticleIndices = swarm.add_particles_with_coordinates(
+                coordinates
+            )
+            return
+
         swarmPath = self._getH5Path(step) + "swarm.h5"
         swarm.load(swarmPath)
 
+    def _loadSwarmVariable(self, step, name, swarm: Swarm, dataType, count):
+        variable = swarm.add_variable(dataType=dataType, count=count)
+        if self._isConsolidated(step):
+            values = readSwarmVariable(self._getConsolidatedPath(step), name)
+            owned = self._loadedParticleIndices >= 0
+            variable.data[self._loadedParticleIndices[owned]] = values[owned]
+        else:
+            variable.load(self._getH5Path(step) + name + ".h5")
+        return variable
+
+    def _loadMeshVariable(self, step, name, mesh, nodeDofCount, interpolate=True):
+        field = Mesh.MeshVariable(mesh=mesh, nodeDofCount=nodeDofCount)
+        sameMesh = self.isSameMesh(step, mesh, name)
+        if not self._isConsolidated(step):
+            field.load(
+                self._getH5Path(step) + name + ".h5",
+                interpolate=interpolate and not sameMesh,
+            )
+            return field
+
+        data, elementType = readMeshVariable(self._getConsolidatedPath(step), name)
+        if sameMesh:
+            field.data[:] = data[mesh.data_nodegId.ravel()]
+        else:
+            resolution, minCoord, maxCoord = self._getSavedMeshGeometry(step, name)
+            field.data[:] = interpolateMeshVariable(
+                data, elementType, resolution, minCoord, maxCoord, mesh.data
+            )
+        return field
+
     def getMaterialVariable(self, step, swarm: Swarm):
-        mvarPath = self._getH5Path(step) + "materialVariable.h5"
-        materialVar = swarm.add_variable(dataType="int", count=1)
-        materialVar.load(mvarPath)
-        return materialVar
+        return self._loadSwarmVariable(step, "materialVariable", swarm, "int", 1)
 
     def getPreviousStress(self, step, swarm: Swarm):
-        path = self._getH5Path(step) + "previousStress.h5"
-        var = swarm.add_variable(dataType="double", count=3)
-        var.load(path)
-        return var
+        return self._loadSwarmVariable(step, "previousStress", swarm, "double", 3)
 
     def getVelocityField(self, step, mesh: Mesh.FeMesh_Cartesian):
-        path = self._getH5Path(step) + "velocityField.h5"
-        field = Mesh.MeshVariable(mesh=mesh, nodeDofCount=2)
-        field.load(path, interpolate=True)
-        return field
+        return self._loadMeshVariable(step, "velocityField", mesh, 2)
 
     def getPressureField(self, step, mesh: Mesh.FeMesh_Cartesian):
-        path = self._getH5Path(step) + "pressureField.h5"
-        field = Mesh.MeshVariable(mesh=mesh, nodeDofCount=1)
-        field.load(path, interpolate=True)
-        return field
+        return self._loadMeshVariable(step, "pressureField", mesh.subMesh, 1)
 
     def getTemperatureField(self, step, mesh: Mesh.FeMesh_Cartesian):
-        path = self._getH5Path(step) + "temperatureField.h5"
-        field = Mesh.MeshVariable(mesh=mesh, nodeDofCount=1)
-        field.load(path, interpolate=True)
-        return field
+        return self._loadMeshVariable(step, "temperatureField", mesh, 1)
 
     def getTemperatureDotField(self, step, mesh: Mesh.FeMesh_Cartesian):
-        path = self._getH5Path(step) + "temperatureDotField.h5"
-        field = Mesh.MeshVariable(mesh=mesh, nodeDofCount=1)
-        field.load(path)
-        return field
+        return self._loadMeshVariable(
+            step, "temperatureDotField", mesh, 1, interpolate=False
+        )
+
+    def getLastTime(self, step) -> float:
+        """
+        model time of the checkpoint in seconds
+        """
+        if self._isConsolidated(step):
+            return readTime(self._getConsolidatedPath(step))
 
-    def getLastTime(self, step):
-        path = self._getStepOutputPath(step) + "/time.json"
-        with open(path, "r") as f:
-            return json.load(f)
+        return readLegacyTime(self._getStepOutputPath(step))
 
     def checkPoint(
         self,
@@ -90,83 +253,196 @@ class CheckPointManager:
         viscosityFn,
         stress2ndInvariant,
     ):
-        stepString = str(step).zfill(5)
-        stepOutputPath = self.outputPath + "/" + stepString
+        if self.checkpointFormat == "consolidated":
+            snapshot = takeCheckPointSnapshot(
+                step=step,
+                time=time,
+                mesh=mesh,
+                swarm=swarm,
+                swarmVariables={
+                    "materialVariable": materialVariable,
+                    "previousStress": previousStress,
+                },
+                meshVariables={
+                    "temperatureDotField": temperatureDotField,
+                    "velocityField": velocityField,
+                    "pressureField": pressureField,
+                    "temperatureField": temperatureField,
+                },
+            )
+            if snapshot.ranks > 1:
+                self._pendingIndices[step] = attr.evolve(
+                    snapshot,
+                    swarmCoordinates=None,
+                    swarmVariables={},
+                    meshVariables={},
+                    meshGlobalIds=None,
+                )
+            if self.asynchronous:
+                self._completeWrittenCheckPoints()
+                self._writer.submit(snapshot)
+            else:
+                self._writeSnapshot(snapshot)
+                self._completeWrittenCheckPoints()
+                mpi.barrier()
+        else:
+            self._writeLegacyCheckPoint(
+                step=step,
+                time=time,
+                swarm=swarm,
+                materialVariable=materialVariable,
+                previousStress=previousStress,
+                velocityField=velocityField,
+                pressureField=pressureField,
+                temperatureField=temperatureField,
+                temperatureDotField=temperatureDotField,
+                meshHandle=meshHandle,
+            )
+
+        if self.saveFigures:
+            figureManager.saveParticleViscosity(swarm, viscosityFn)
+            figureManager.saveStrainRate(strainRate2ndInvariant, mesh)
+            figureManager.saveStress2ndInvariant(swarm, stress2ndInvariant)
+            figureManager.saveVelocity(velocityField, mesh, swarm, viscosityFn)
+
+    def _writeLegacyCheckPoint(
+        self,
+        *,
+        step,
+        time,
+        swarm,
+        materialVariable,
+        previousStress,
+        velocityField,
+        pressureField,
+        temperatureField,
+        temperatureDotField,
+        meshHandle,
+    ):
+
+        stepOutputPath = self._getStepOutputPath(step)
+        # the step is written aside and moved into place once complete, so an
+        # interrupted write never touches an existing complete copy of the step
+        temporaryOutputPath = self._getTemporaryStepOutputPath(step)
 
         if mpi.rank == 0:
-            newtime = time / 31556952
-            os.mkdir(stepOutputPath)
-            os.mkdir(stepOutputPath + "/h5")
-            os.mkdir(stepOutputPath + "/xdmf")
-            with open(stepOutputPath + "/time.json", "w") as f:
-                json.dump({"time": f"{newtime:.3e} yrs"}, f)
+            # leftovers of an interrupted write
+            shutil.rmtree(temporaryOutputPath, ignore_errors=True)
+            os.makedirs(temporaryOutputPath + "/h5")
+            self._writeTime(temporaryOutputPath, time)
         mpi.barrier()
 
-        h5Path = stepOutputPath + "/h5/"
-        xdmfPath = stepOutputPath + "/xdmf/"
+        h5Path = temporaryOutputPath + "/h5/"
 
-        swarmHnd = swarm.save(h5Path + "swarm.h5")
-        materialVariableHnd = materialVariable.save(h5Path + "materialVariable.h5")
-        previousStressHnd = previousStress.save(h5Path + "previousStress.h5")
-        temperatureDotHnd = temperatureDotField.save(
-            h5Path + "temperatureDotField" + ".h5", meshHandle
-        )
-        velocityHnd = velocityField.save(h5Path + "velocityField" + ".h5", meshHandle)
-        pressureHnd = pressureField.save(h5Path + "pressureField" + ".h5", meshHandle)
-        temperatureHnd = temperatureField.save(
-            h5Path + "temperatureField" + ".h5", meshHandle
-        )
+        swarm.save(h5Path + "swarm.h5")
+        materialVariable.save(h5Path + "materialVariable.h5")
+        previousStress.save(h5Path + "previousStress.h5")
+        temperatureDotField.save(h5Path + "temperatureDotField" + ".h5", meshHandle)
+        velocityField.save(h5Path + "velocityField" + ".h5", meshHandle)
+        pressureField.save(h5Path + "pressureField" + ".h5", meshHandle)
+        temperatureField.save(h5Path + "temperatureField" + ".h5", meshHandle)
 
-        materialVariable.xdmf(
-            xdmfPath + "materialVariable.xdmf",
-            varSavedData=materialVariableHnd,
-            varname="materialVariable",
-            swarmSavedData=swarmHnd,
-            swarmname="swarm",
-            modeltime=time,
-        )
-        previousStress.xdmf(
-            filename=xdmfPath + "previousStress.xdmf",
-            varSavedData=previousStressHnd,
-            varname="previousStress",
-            swarmSavedData=swarmHnd,
-            swarmname="swarm",
-            modeltime=time,
-        )
-        velocityField.xdmf(
-            filename=xdmfPath + "velocityField.xdmf",
-            fieldSavedData=velocityHnd,
-            varname="velocityField",
-            meshname="mesh",
-            meshSavedData=meshHandle,
-            modeltime=time,
-        )
-        temperatureField.xdmf(
-            filename=xdmfPath + "temperatureField.xdmf",
-            fieldSavedData=temperatureHnd,
-            varname="temperatureField",
-            meshSavedData=meshHandle,
-            meshname="mesh",
-            modeltime=time,
-        )
-        temperatureDotField.xdmf(
-            filename=xdmfPath + "temperatureDotField.xdmf",
-            fieldSavedData=temperatureDotHnd,
-            varname="temperatureDotField",
-            meshSavedData=meshHandle,
-            meshname="mesh",
-            modeltime=time,
+        mpi.barrier()
+        if mpi.rank == 0:
+            if self.writeXdmf:
+                # relative references into ../h5, they stay valid after the move
+                writeLegacyStepXdmf(self._getTemporaryPath(), step)
+            self._writeCompleteMarker(temporaryOutputPath, step)
+            self._replaceStep(temporaryOutputPath, stepOutputPath)
+        mpi.barrier()
+
+    def _replaceStep(self, temporaryOutputPath, stepOutputPath):
+        """
+        moves a completely written step into place, an earlier copy of the step
+        is moved aside first and only removed afterwards
+        """
+        previousOutputPath = None
+        if os.path.isdir(stepOutputPath):
+            previousOutputPath = temporaryOutputPath + ".previous"
+            shutil.rmtree(previousOutputPath, ignore_errors=True)
+            os.replace(stepOutputPath, previousOutputPath)
+        os.replace(temporaryOutputPath, stepOutputPath)
+        if previousOutputPath is not None:
+            shutil.rmtree(previousOutputPath, ignore_errors=True)
+
+    def _writeCompleteMarker(self, stepOutputPath, step):
+        with open(stepOutputPath + "/" + COMPLETE_MARKER, "w") as f:
+            f.write(f"{step}\n")
+
+    def _writeTime(self, stepOutputPath, time):
+        with open(stepOutputPath + "/time.json", "w") as f:
+            json.dump(
+                {"time": f"{time / SECONDS_PER_YEAR:.3e} yrs", "seconds": time}, f
+            )
+
+    def _writeSnapshot(self, snapshot: CheckPointSnapshot):
+        """
+        writes the part of one rank, runs on the writer thread when asynchronous
+        """
+        writeConsolidatedCheckPoint(
+            self._getConsolidatedPath(snapshot.step),
+            snapshot,
+            compression=self.compression,
+            chunked=self.chunked,
+            references=self._getReferences(snapshot),
         )
-        pressureField.xdmf(
-            filename=xdmfPath + "pressureField.xdmf",
-            fieldSavedData=pressureHnd,
-            varname="pressureField",
-            meshSavedData=meshHandle,
-            meshname="mesh",
-            modeltime=time,
+        if snapshot.ranks > 1:
+            with self._writtenPartsLock:
+                self._writtenParts.add(snapshot.step)
+
+    def _completeWrittenCheckPoints(self):
+        """
+        collective, rank 0 writes the index of every step whose parts all ranks have
+        written. Only the step numbers are exchanged, the data never leaves its rank
+        """
+        if mpi.size == 1:
+            return
+        with self._writtenPartsLock:
+            written = set(self._writtenParts)
+        complete = set.intersection(
+            *(set(steps) for steps in mpi.comm.allgather(written))
         )
+        for step in sorted(complete):
+            snapshot = self._pendingIndices.pop(step)
+            if mpi.rank == 0:
+                writeConsolidatedIndex(self._getConsolidatedPath(step), snapshot)
+        with self._writtenPartsLock:
+            self._writtenParts -= complete
+
+    def _getReferences(self, snapshot: CheckPointSnapshot):
+        """
+        datasets of the snapshot that are unchanged since they were last written,
+        always empty for a full checkpoint
+        """
+        if self.fullCheckPointEvery is None:
+            return {}
+        isFull = self._writtenCheckPoints % self.fullCheckPointEvery == 0
+        self._writtenCheckPoints += 1
+
+        swarmArrays = {"coordinates": snapshot.swarmCoordinates}
+        swarmArrays.update(snapshot.swarmVariables)
+        references = {SWARM_GROUP: {}, MESH_GROUP: {}}
+        for group, arrays in (
+            (SWARM_GROUP, swarmArrays),
+            (MESH_GROUP, snapshot.meshVariables),
+        ):
+            for name, data in arrays.items():
+                contentHash = _contentHash(data)
+                written = self._writtenDatasets.get((group, name))
+                if not isFull and written is not None and written[0] == contentHash:
+                    references[group][name] = written[1]
+                else:
+                    self._writtenDatasets[(group, name)] = (contentHash, snapshot.step)
+        return references
+
+    def flush(self):
+        """
+        collective, waits for the pending checkpoints and completes them
+        """
+        if self._writer is not None:
+            self._writer.flush()
+        self._completeWrittenCheckPoints()
 
-        # figureManager.saveParticleViscosity(swarm, viscosityFn)
-        # figureManager.saveStrainRate(strainRate2ndInvariant, mesh)
-        # figureManager.saveStress2ndInvariant(swarm, stress2ndInvariant)
-        # figureManager.saveVelocity(velocityField, mesh, swarm, viscosityFn)
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
@@ -0,0 +1,74 @@
+from typing import Dict, Tuple
+
+import attr
+import numpy as np
+from underworld import mpi
+
+
+@attr.s(frozen=True, repr=True, slots=True, kw_only=True)
+class CheckPointSnapshot:
+    """
+    in memory copy of the checkpointed state of one rank. With more than one rank
+    the mesh variables hold the owned nodes and meshGlobalIds their global node ids,
+    a snapshot of the whole model (ranks == 1) is ordered by global node id
+    """
+
+    step: int = attr.ib()
+    time: float = attr.ib()
+    swarmCoordinates: np.ndarray = attr.ib(repr=False)
+    swarmVariables: Dict[str, np.ndarray] = attr.ib(repr=False)
+    meshVariables: Dict[str, np.ndarray] = attr.ib(repr=False)
+    meshResolution: Tuple[int, ...] = attr.ib()
+    minCoord: Tuple[float, ...] = attr.ib()
+    maxCoord: Tuple[float, ...] = attr.ib()
+    elementTypes: Dict[str, str] = attr.ib()
+    rank: int = attr.ib(default=0)
+    ranks: int = attr.ib(default=1)
+    meshGlobalIds: Dict[str, np.ndarray] = attr.ib(default=None, repr=False)
+
+
+def _copyMeshVariable(meshVariable):
+    variableMesh = meshVariable.mesh
+    nodesLocal = variableMesh.nodesLocal
+    globalIds = np.copy(variableMesh.data_nodegId[:nodesLocal].ravel())
+    values = np.copy(meshVariable.data[:nodesLocal])
+    return values, globalIds
+
+
+def takeCheckPointSnapshot(
+    *, step, time, mesh, swarm, swarmVariables: Dict, meshVariables: Dict
+) -> CheckPointSnapshot:
+    """
+    copies the local arrays of this rank without any communication,
+    every rank gets the snapshot of its own part of the model
+    """
+    meshValues = {}
+    meshGlobalIds = {}
+    for name, variable in meshVariables.items():
+        meshValues[name], meshGlobalIds[name] = _copyMeshVariable(variable)
+
+    if mpi.size == 1:
+        for name, values in meshValues.items():
+            ordered = np.empty_like(values)
+            ordered[meshGlobalIds[name]] = values
+            meshValues[name] = ordered
+        meshGlobalIds = None
+
+    return CheckPointSnapshot(
+        step=step,
+        time=time,
+        swarmCoordinates=np.copy(swarm.particleCoordinates.data),
+        swarmVariables={
+            name: np.copy(variable.data) for name, variable in swarmVariables.items()
+        },
+        meshVariables=meshValues,
+        meshResolution=tuple(mesh.elementRes),
+        minCoord=tuple(mesh.minCoord),
+        maxCoord=tuple(mesh.maxCoord),
+        elementTypes={
+            name: variable.mesh.elementType for name, variable in meshVariables.items()
+        },
+        rank=mpi.rank,
+        ranks=mpi.size,
+        meshGlobalIds=meshGlobalIds,
+    )
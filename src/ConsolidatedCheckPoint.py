@@ -0,0 +1,279 @@
+"""
+single file checkpoint format, one NNNNN.h5 per step holding
+
+    /swarm/coordinates, /swarm/<swarm variable>
+    /mesh/<mesh variable>   ordered by global node id
+
+with the step, model time and mesh geometry stored as attributes.
+Incremental checkpoints leave out datasets that did not change and record
+the step of the file holding them in /references/<group> attributes.
+
+Parallel runs write one part NNNNN.rankRRRRR.h5 per rank with the rank's
+particles, its owned mesh nodes and their ids in /globalIds/<mesh variable>.
+NNNNN.h5 is then a small index holding the attributes and the number of parts,
+written once every part is complete.
+"""
+
+import os
+from typing import TYPE_CHECKING, Dict, List, Tuple
+
+import h5py
+import numpy as np
+
+if TYPE_CHECKING:
+    # only needed for the annotation, the readers stay usable without underworld
+    from CheckPointSnapshot import CheckPointSnapshot
+
+FORMAT_NAME = "consolidated"
+FORMAT_VERSION = 1
+SWARM_GROUP = "swarm"
+MESH_GROUP = "mesh"
+REFERENCE_GROUP = "references"
+GLOBAL_ID_GROUP = "globalIds"
+
+
+def getConsolidatedFileName(step: int) -> str:
+    return str(step).zfill(5) + ".h5"
+
+
+def getPartPath(path: str, rank: int) -> str:
+    """
+    the part of rank belonging to the checkpoint or index at path
+    """
+    return path[: -len(".h5")] + f".rank{str(rank).zfill(5)}.h5"
+
+
+def getConsolidatedPartPaths(path: str) -> List[str]:
+    """
+    the files holding the data of a checkpoint, the file itself or the parts
+    listed by its index
+    """
+    with h5py.File(path, "r") as f:
+        parts = f.attrs.get("parts")
+    if parts is None:
+        return [path]
+    return [getPartPath(path, rank) for rank in range(int(parts))]
+
+
+def findConsolidatedSteps(outputPath: str) -> List[int]:
+    steps = []
+    for name in os.listdir(outputPath):
+        stem, extension = os.path.splitext(name)
+        if extension == ".h5" and stem.isdigit():
+            steps.append(int(stem))
+    return sorted(steps)
+
+
+def writeConsolidatedCheckPoint(
+    path: str,
+    snapshot: "CheckPointSnapshot",
+    compression=None,
+    chunked=False,
+    references: Dict[str, Dict[str, int]] = None,
+):
+    """
+    the file is written under a temporary name and renamed when complete,
+    so a crash never leaves a half written checkpoint behind. The part of a
+    parallel snapshot goes next to path, see writeConsolidatedIndex,
+    returns the path written
+    param references: {group: {name: step}} of datasets left out of this file
+    because the checkpoint of that step holds the same content
+    """
+    references = references or {}
+    swarmReferences = references.get(SWARM_GROUP, {})
+    meshReferences = references.get(MESH_GROUP, {})
+    options = {}
+    if compression is not None:
+        options["compression"] = compression
+    if chunked or compression is not None:
+        options["chunks"] = True
+
+    if snapshot.ranks > 1:
+        path = getPartPath(path, snapshot.rank)
+
+    # processes sharing a directory may write the same file at once
+    temporaryPath = f"{path}.{os.getpid()}.tmp"
+    with h5py.File(temporaryPath, "w") as f:
+        f.attrs["format"] = FORMAT_NAME
+        f.attrs["version"] = FORMAT_VERSION
+        f.attrs["step"] = snapshot.step
+        f.attrs["time"] = snapshot.time
+        if snapshot.ranks > 1:
+            f.attrs["rank"] = snapshot.rank
+            f.attrs["ranks"] = snapshot.ranks
+
+        swarmGroup = f.create_group(SWARM_GROUP)
+        swarmArrays = {"coordinates": snapshot.swarmCoordinates}
+        swarmArrays.update(snapshot.swarmVariables)
+        for name, data in swarmArrays.items():
+            if name not in swarmReferences:
+                swarmGroup.create_dataset(name, data=data, **options)
+
+        meshGroup = f.create_group(MESH_GROUP)
+        meshGroup.attrs["resolution"] = snapshot.meshResolution
+        meshGroup.attrs["min"] = snapshot.minCoord
+        meshGroup.attrs["max"] = snapshot.maxCoord
+        for name, data in snapshot.meshVariables.items():
+            if name not in meshReferences:
+                dataset = meshGroup.create_dataset(name, data=data, **options)
+                dataset.attrs["elementType"] = snapshot.elementTypes[name]
+                if snapshot.meshGlobalIds is not None:
+                    f.create_dataset(
+                        f"{GLOBAL_ID_GROUP}/{name}",
+                        data=snapshot.meshGlobalIds[name],
+                        **options,
+                    )
+
+        referenceGroup = f.create_group(REFERENCE_GROUP)
+        for group, groupReferences in (
+            (SWARM_GROUP, swarmReferences),
+            (MESH_GROUP, meshReferences),
+        ):
+            attrs = referenceGroup.create_group(group).attrs
+            for name, step in groupReferences.items():
+                attrs[name] = step
+
+    os.replace(temporaryPath, path)
+    return path
+
+
+def writeConsolidatedIndex(path: str, snapshot: "CheckPointSnapshot"):
+    """
+    marks the parts written by every rank as one checkpoint, call once all of
+    them exist. param snapshot: the part of any rank, they share the attributes
+    """
+    temporaryPath = f"{path}.{os.getpid()}.tmp"
+    with h5py.File(temporaryPath, "w") as f:
+        f.attrs["format"] = FORMAT_NAME
+        f.attrs["version"] = FORMAT_VERSION
+        f.attrs["step"] = snapshot.step
+        f.attrs["time"] = snapshot.time
+        f.attrs["parts"] = snapshot.ranks
+        meshGroup = f.create_group(MESH_GROUP)
+        meshGroup.attrs["resolution"] = snapshot.meshResolution
+        meshGroup.attrs["min"] = snapshot.minCoord
+        meshGroup.attrs["max"] = snapshot.maxCoord
+
+    os.replace(temporaryPath, path)
+
+
+def readTime(path: str) -> float:
+    with h5py.File(path, "r") as f:
+        return float(f.attrs["time"])
+
+
+def resolveDatasetPath(path: str, group: str, name: str) -> str:
+    """
+    path of the file holding the dataset, following the reference of an
+    incremental checkpoint when the dataset was left out of this file
+    """
+    with h5py.File(path, "r") as f:
+        if name in f[group]:
+            return path
+        step = int(f[REFERENCE_GROUP][group].attrs[name])
+        rank = f.attrs.get("rank")
+    referencedPath = os.path.join(os.path.dirname(path), getConsolidatedFileName(step))
+    if rank is None:
+        return referencedPath
+    # the parts of a parallel run reference the part of the same rank
+    return getPartPath(referencedPath, int(rank))
+
+
+def listDatasets(path: str, group: str) -> List[str]:
+    with h5py.File(getConsolidatedPartPaths(path)[0], "r") as f:
+        names = list(f[group].keys())
+        if REFERENCE_GROUP in f:
+            names += list(f[REFERENCE_GROUP][group].attrs.keys())
+    return names
+
+
+def readSwarmCoordinates(path: str) -> np.ndarray:
+    return readSwarmVariable(path, "coordinates")
+
+
+def readSwarmVariable(path: str, name: str) -> np.ndarray:
+    parts = []
+    for partPath in getConsolidatedPartPaths(path):
+        with h5py.File(resolveDatasetPath(partPath, SWARM_GROUP, name), "r") as f:
+            parts.append(f[SWARM_GROUP][name][()])
+    if len(parts) == 1:
+        return parts[0]
+    return np.concatenate(parts)
+
+
+def readMeshGeometry(path: str) -> Tuple[Tuple, Tuple, Tuple]:
+    with h5py.File(path, "r") as f:
+        attrs = f[MESH_GROUP].attrs
+        return (
+            tuple(int(n) for n in attrs["resolution"]),
+            tuple(float(c) for c in attrs["min"]),
+            tuple(float(c) for c in attrs["max"]),
+        )
+
+
+def _readMeshPart(path: str, name: str):
+    with h5py.File(resolveDatasetPath(path, MESH_GROUP, name), "r") as f:
+        dataset = f[MESH_GROUP][name]
+        elementType = dataset.attrs["elementType"]
+        if isinstance(elementType, bytes):
+            elementType = elementType.decode()
+        globalIds = None
+        if GLOBAL_ID_GROUP in f:
+            globalIds = f[GLOBAL_ID_GROUP][name][()]
+        return dataset[()], elementType, globalIds
+
+
+def readMeshVariable(path: str, name: str) -> Tuple[np.ndarray, str]:
+    """
+    the variable ordered by global node id, the parts of a parallel run are merged
+    """
+    parts = [
+        _readMeshPart(partPath, name) for partPath in getConsolidatedPartPaths(path)
+    ]
+    if len(parts) == 1:
+        data, elementType, _ = parts[0]
+        return data, elementType
+
+    globalIds = np.concatenate([ids for _, _, ids in parts])
+    values = np.concatenate([data for data, _, _ in parts])
+    # nodes shared by ranks appear in several parts with the same value
+    output = np.empty((globalIds.max() + 1,) + values.shape[1:], dtype=values.dtype)
+    output[globalIds] = values
+    return output, parts[0][1]
+
+
+def isCellCentred(elementType: str) -> bool:
+    return elementType.upper().startswith("DQ0")
+
+
+def interpolateMeshVariable(
+    data: np.ndarray,
+    elementType: str,
+    resolution: Tuple[int, int],
+    minCoord: Tuple[float, float],
+    maxCoord: Tuple[float, float],
+    points: np.ndarray,
+) -> np.ndarray:
+    """
+    evaluates a saved regular mesh variable at arbitrary points, bilinear for
+    nodal (Q1) data and piecewise constant for element (dQ0) data
+    """
+    nx, ny = resolution
+    minCoord = np.asarray(minCoord)
+    cellSize = (np.asarray(maxCoord) - minCoord) / np.asarray(resolution)
+    local = (points - minCoord) / cellSize
+    i = np.clip(np.floor(local[:, 0]).astype(np.int64), 0, nx - 1)
+    j = np.clip(np.floor(local[:, 1]).astype(np.int64), 0, ny - 1)
+
+    if isCellCentred(elementType):
+        return data.reshape(ny, nx, -1)[j, i]
+
+    grid = data.reshape(ny + 1, nx + 1, -1)
+    fx = np.clip(local[:, 0] - i, 0.0, 1.0)[:, None]
+    fy = np.clip(local[:, 1] - j, 0.0, 1.0)[:, None]
+    return (
+        grid[j, i] * (1.0 - fx) * (1.0 - fy)
+        + grid[j, i + 1] * fx * (1.0 - fy)
+        + grid[j + 1, i] * (1.0 - fx) * fy
+        + grid[j + 1, i + 1] * fx * fy
+    )
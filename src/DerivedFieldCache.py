@@ -0,0 +1,32 @@
+from typing import Dict, Tuple
+
+import numpy as np
+
+
+class DerivedFieldCache:
+    """
+    evaluates an underworld function over a swarm or a mesh at most once per step
+    and keeps the values as a numpy array, so the figures of a step share them
+    without walking the function graph again. invalidate() at every new step
+    """
+
+    def __init__(self) -> None:
+        # (name, id(function), id(target)) -> (function, target, values), holding the
+        # function and target keeps their ids from being reused within the step
+        self._values: Dict[Tuple[str, int, int], Tuple[object, object, np.ndarray]] = {}
+
+    def evaluate(self, name: str, function, target) -> np.ndarray:
+        """
+        param target: the swarm or mesh the function is evaluated on, returns the
+        local values of this step. The same name with another function or target
+        is a separate entry
+        """
+        key = (name, id(function), id(target))
+        entry = self._values.get(key)
+        if entry is None:
+            entry = (function, target, function.evaluate(target))
+            self._values[key] = entry
+        return entry[2]
+
+    def invalidate(self):
+        self._values.clear()
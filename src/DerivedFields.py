@@ -0,0 +1,150 @@
+"""
+numpy versions of the derived fields of SubductionModel, evaluated on saved
+checkpoint arrays instead of the underworld function graph
+"""
+
+from typing import Tuple
+
+import attr
+import numpy as np
+
+from ConsolidatedCheckPoint import interpolateMeshVariable
+
+UPPER_MANTLE_INDEX = 0
+UPPER_SLAB_INDEX = 1
+LOWER_SLAB_INDEX = 2
+CORE_SLAB_INDEX = 3
+WEAKENING_DEPTH_METERS = 200e3
+
+
+@attr.s(frozen=True, repr=True, slots=True, kw_only=True)
+class ViscosityParameters:
+    """
+    non dimensional rheology constants of SubductionModel._assignViscosityAndCreateMap
+    """
+
+    upperMantleViscosity: float = attr.ib()
+    spTopLayerViscosity: float = attr.ib()
+    spCoreLayerViscosity: float = attr.ib()
+    spBottomLayerViscosity: float = attr.ib()
+    yieldStressOfSpTopLayer: float = attr.ib()
+    minimalStrainRate: float = attr.ib()
+    defaultStrainRate: float = attr.ib()
+    weakeningDepth: float = attr.ib()
+    weakenedViscosity: float = attr.ib(default=50.0)
+
+
+def getViscosityParameters(parameterMap) -> ViscosityParameters:
+    nonDimensional = parameterMap.nonDimensional
+    return ViscosityParameters(
+        upperMantleViscosity=nonDimensional.upperMantleViscosity,
+        spTopLayerViscosity=nonDimensional.spTopLayerViscosity,
+        spCoreLayerViscosity=nonDimensional.spCoreLayerViscosity,
+        spBottomLayerViscosity=nonDimensional.spBottomLayerViscosity,
+        yieldStressOfSpTopLayer=nonDimensional.yieldStressOfSpTopLayer,
+        minimalStrainRate=nonDimensional.minimalStrainRate,
+        defaultStrainRate=nonDimensional.defaultStrainRate,
+        weakeningDepth=WEAKENING_DEPTH_METERS / nonDimensional.lengthCoefficient,
+    )
+
+
+def strainRateTensor(
+    velocity: np.ndarray,
+    resolution: Tuple[int, int],
+    minCoord: Tuple[float, float],
+    maxCoord: Tuple[float, float],
+) -> np.ndarray:
+    """
+    symmetric strain rate (xx, yy, xy) at the element centres of a regular Q1
+    velocity field ordered by global node id, shape (elements, 3)
+    """
+    nx, ny = resolution
+    dx = (maxCoord[0] - minCoord[0]) / nx
+    dy = (maxCoord[1] - minCoord[1]) / ny
+    grid = velocity.reshape(ny + 1, nx + 1, 2)
+    # derivatives of the bilinear shape functions at the element centre
+    ddx = (grid[:-1, 1:] - grid[:-1, :-1] + grid[1:, 1:] - grid[1:, :-1]) / (2.0 * dx)
+    ddy = (grid[1:, :-1] - grid[:-1, :-1] + grid[1:, 1:] - grid[:-1, 1:]) / (2.0 * dy)
+    tensor = np.stack(
+        [ddx[..., 0], ddy[..., 1], 0.5 * (ddy[..., 0] + ddx[..., 1])], axis=-1
+    )
+    return tensor.reshape(nx * ny, 3)
+
+
+def secondInvariant(tensor: np.ndarray) -> np.ndarray:
+    """
+    sqrt(0.5 A:A) of symmetric 2D tensors stored as (xx, yy, xy)
+    """
+    xx, yy, xy = tensor[:, 0], tensor[:, 1], tensor[:, 2]
+    return np.sqrt(0.5 * (xx**2 + yy**2 + 2.0 * xy**2))
+
+
+def limitStrainRate(
+    strainRate: np.ndarray, parameters: ViscosityParameters, solutionExists=True
+) -> np.ndarray:
+    """
+    the floor RheologyFunctions.getStrainRateSecondInvariant puts on the invariant
+    """
+    if not solutionExists:
+        return np.full_like(strainRate, parameters.minimalStrainRate)
+    return np.where(
+        strainRate <= parameters.defaultStrainRate,
+        parameters.minimalStrainRate,
+        strainRate,
+    )
+
+
+def particleViscosity(
+    materials: np.ndarray,
+    depths: np.ndarray,
+    strainRate: np.ndarray,
+    parameters: ViscosityParameters,
+) -> np.ndarray:
+    """
+    param strainRate: limited strain rate invariant at the particles
+    """
+    topLayer = np.minimum(
+        0.5 * parameters.yieldStressOfSpTopLayer / strainRate,
+        parameters.spTopLayerViscosity,
+    )
+    topLayer = np.where(
+        depths > parameters.weakeningDepth, parameters.weakenedViscosity, topLayer
+    )
+    materials = np.ravel(materials)
+    viscosity = np.full(len(materials), parameters.upperMantleViscosity)
+    viscosity[materials == LOWER_SLAB_INDEX] = round(
+        parameters.spBottomLayerViscosity, 1
+    )
+    viscosity[materials == CORE_SLAB_INDEX] = parameters.spCoreLayerViscosity
+    isTopLayer = materials == UPPER_SLAB_INDEX
+    viscosity[isTopLayer] = topLayer[isTopLayer]
+    return viscosity
+
+
+def computeParticleFields(
+    coordinates: np.ndarray,
+    materials: np.ndarray,
+    velocity: np.ndarray,
+    resolution: Tuple[int, int],
+    minCoord: Tuple[float, float],
+    maxCoord: Tuple[float, float],
+    parameters: ViscosityParameters,
+    solutionExists=True,
+):
+    """
+    strain rate invariant of the elements, viscosity and stress invariant of the particles
+    """
+    tensor = strainRateTensor(velocity, resolution, minCoord, maxCoord)
+    elementStrainRate = secondInvariant(tensor)
+    particleStrainRate = interpolateMeshVariable(
+        elementStrainRate, "DQ0", resolution, minCoord, maxCoord, coordinates
+    )[:, 0]
+    viscosity = particleViscosity(
+        materials,
+        maxCoord[1] - coordinates[:, 1],
+        limitStrainRate(particleStrainRate, parameters, solutionExists),
+        parameters,
+    )
+    # second invariant of 2 eta D is 2 eta times that of D
+    stressInvariant = 2.0 * viscosity * particleStrainRate
+    return elementStrainRate, viscosity, stressInvariant
@@ -0,0 +1,58 @@
+import csv
+import os
+from typing import Dict, List, Sequence
+
+from underworld import mpi
+
+
+class DiagnosticsWriter:
+    """
+    appends one row of scalar diagnostics per step to a csv file, rows are
+    buffered and written in batches of flushEvery by rank 0 only
+    """
+
+    def __init__(
+        self, path: str, columns: Sequence[str], flushEvery=10, startStep=0
+    ) -> None:
+        """
+        param startStep: first step this run records, rows of an earlier run from this
+        step on are dropped so a restart continues the file without duplicates
+        """
+        self.path = path
+        self.columns = ["step", "time"] + list(columns)
+        self.flushEvery = flushEvery
+        self._rows: List[Dict] = []
+        if mpi.rank == 0:
+            self._prepareFile(startStep)
+
+    def _prepareFile(self, startStep):
+        keptRows = []
+        if os.path.isfile(self.path):
+            with open(self.path, "r", newline="") as f:
+                reader = csv.DictReader(f)
+                if reader.fieldnames != self.columns:
+                    raise ValueError(
+                        f"{self.path} holds the columns {reader.fieldnames}, "
+                        f"expected {self.columns}"
+                    )
+                keptRows = [row for row in reader if int(row["step"]) < startStep]
+
+        with open(self.path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=self.columns)
+            writer.writeheader()
+            writer.writerows(keptRows)
+
+    def record(self, step: int, time: float, values: Dict[str, float]):
+        if mpi.rank != 0:
+            return
+        self._rows.append({"step": step, "time": time, **values})
+        if len(self._rows) >= self.flushEvery:
+            self.flush()
+
+    def flush(self):
+        if mpi.rank != 0 or not self._rows:
+            return
+        with open(self.path, "a", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=self.columns)
+            writer.writerows(self._rows)
+        self._rows = []
@@ -1,7 +1,14 @@
+import os
+
+import matplotlib.pyplot as plt
+import numpy as np
+from matplotlib.colors import LogNorm
 from underworld import function as fn
 from underworld import mpi, visualisation
 
 from CheckPointManager import CheckPointManager
+from DerivedFieldCache import DerivedFieldCache
+from LegacyCheckPoint import getStepDirectoryName
 
 
 class FigureManager:
@@ -10,6 +17,8 @@ class FigureManager:
         self.outputPath = outputPath
         self.store = visualisation.Store(f"{self.outputPath}/FigStore")
         self.directView = directView
+        self.figurePath = f"{self.outputPath}/figures"
+        self.derivedFields = DerivedFieldCache()
 
     def saveFig(self, fig):
         if self.directView:
@@ -38,30 +47,87 @@ class FigureManager:
         )
         self.saveFig(fig)
 
+    def _gather(self, array):
+        """
+        the figures of derived fields are drawn on rank 0 from the values of every rank
+        """
+        parts = mpi.comm.gather(np.ascontiguousarray(array), root=0)
+        if mpi.rank != 0:
+            return None
+        return np.concatenate(parts)
+
+    def _saveScatter(
+        self, name, title, coordinates, values, logScale=False, arrows=None
+    ) -> None:
+        """
+        param arrows: (points, vectors) drawn on top of the values
+        """
+        coordinates = self._gather(coordinates)
+        values = self._gather(values)
+        if arrows is not None:
+            arrows = tuple(self._gather(array) for array in arrows)
+        if mpi.rank != 0:
+            return
+
+        fig, ax = plt.subplots(figsize=(12, 4))
+        norm = LogNorm() if logScale else None
+        artist = ax.scatter(
+            coordinates[:, 0], coordinates[:, 1], c=np.ravel(values), s=0.2, norm=norm
+        )
+        if arrows is not None:
+            points, vectors = arrows
+            ax.quiver(points[:, 0], points[:, 1], vectors[:, 0], vectors[:, 1])
+        ax.set_title(f"{self.name} {title}")
+        ax.set_aspect("equal")
+        fig.colorbar(artist, ax=ax, shrink=0.6)
+        if self.directView:
+            plt.show()
+        else:
+            os.makedirs(self.figurePath, exist_ok=True)
+            stepName = getStepDirectoryName(self.store.step)
+            fig.savefig(
+                f"{self.figurePath}/{stepName}_{name}.png", dpi=150, bbox_inches="tight"
+            )
+        plt.close(fig)
+
     def saveVelocity(self, velocityField, mesh, swarm, viscosityFn) -> None:
-        fig = self._getFig(f"{self.name} Velocity")
-        fig.append(
-            visualisation.objects.Points(swarm, viscosityFn, pointSize=2, logScale=True)
+        viscosity = self.derivedFields.evaluate("viscosity", viscosityFn, swarm)
+        nodesLocal = mesh.nodesLocal
+        stride = max(1, nodesLocal // 1000)
+        self._saveScatter(
+            "velocity",
+            "Velocity",
+            swarm.particleCoordinates.data,
+            viscosity,
+            logScale=True,
+            arrows=(
+                mesh.data[:nodesLocal:stride],
+                velocityField.data[:nodesLocal:stride],
+            ),
         )
-        fig.append(visualisation.objects.VectorArrows(mesh, velocityField))
-        self.saveFig(fig)
 
     def saveStrainRate(self, strainRate2ndInvariant, mesh) -> None:
-        fig = self._getFig(f"{self.name} Strain Rate 2nd Invariant")
-        fig.append(
-            visualisation.objects.Surface(
-                mesh, strainRate2ndInvariant, onMesh=True, logScale=True
-            )
+        strainRate = self.derivedFields.evaluate(
+            "strainRate2ndInvariant", strainRate2ndInvariant, mesh
+        )
+        nodesLocal = mesh.nodesLocal
+        self._saveScatter(
+            "strainRate",
+            "Strain Rate 2nd Invariant",
+            mesh.data[:nodesLocal],
+            strainRate[:nodesLocal],
+            logScale=True,
         )
-        self.saveFig(fig)
 
     def saveParticleViscosity(self, swarm, viscosityFn) -> None:
-        fig = self._getFig(f"{self.name} Viscosity")
-
-        fig.append(
-            visualisation.objects.Points(swarm, viscosityFn, pointSize=2, logScale=True)
+        viscosity = self.derivedFields.evaluate("viscosity", viscosityFn, swarm)
+        self._saveScatter(
+            "viscosity",
+            "Viscosity",
+            swarm.particleCoordinates.data,
+            viscosity,
+            logScale=True,
         )
-        self.saveFig(fig)
 
     def saveTemperatureField(self, mesh, temperatureField):
         fig = self._getFig(f"{self.name} Temperature")
@@ -75,11 +141,14 @@ class FigureManager:
         )
 
     def saveStress2ndInvariant(self, swarm, stress2ndInvariant) -> None:
-        fig = self._getFig(f"{self.name} Stress 2nd Invariant")
-
-        fig.append(visualisation.objects.Points(swarm, stress2ndInvariant, pointSize=2))
-        self.saveFig(fig)
+        stress = self.derivedFields.evaluate(
+            "stress2ndInvariant", stress2ndInvariant, swarm
+        )
+        self._saveScatter(
+            "stress", "Stress 2nd Invariant", swarm.particleCoordinates.data, stress
+        )
 
     def incrementStoreStep(self) -> None:
+        self.derivedFields.invalidate()
         if mpi.rank == 0:
             self.store.step += 1
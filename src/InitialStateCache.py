@@ -0,0 +1,119 @@
+"""
+on disk cache of the initialised swarm, material and temperature state of
+SubductionModel, one consolidated checkpoint file <key>.h5 per key (an index and
+one part per rank for parallel runs) where the key hashes the mesh geometry, the
+slab polygons and the initial temperature settings.
+Runs that only differ in rheology share the same entry.
+"""
+
+import hashlib
+import json
+import os
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+import numpy as np
+
+from ConsolidatedCheckPoint import writeConsolidatedCheckPoint, writeConsolidatedIndex
+
+if TYPE_CHECKING:
+    from CheckPointSnapshot import CheckPointSnapshot
+
+# bump when the content of a cached state changes for the same inputs
+CACHE_VERSION = 1
+DEFAULT_MAX_BYTES = 2 * 1024**3
+
+
+def getInitialStateKey(settings: Dict, arrays: Dict[str, np.ndarray]) -> str:
+    """
+    param settings: json serialisable values, param arrays: named numpy arrays
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(json.dumps({"version": CACHE_VERSION, **settings}).encode())
+    for name in sorted(arrays):
+        data = np.ascontiguousarray(arrays[name], dtype=float)
+        digest.update(f"{name}{data.shape}".encode())
+        digest.update(data.data)
+    return digest.hexdigest()
+
+
+class InitialStateCache:
+    def __init__(self, cachePath: str, maxBytes: int = DEFAULT_MAX_BYTES) -> None:
+        """
+        param maxBytes: the least recently used entries are removed once the cache
+        grows beyond this size
+        """
+        if maxBytes <= 0:
+            raise ValueError(f"{maxBytes = } has to be positive")
+        self.cachePath = cachePath
+        self.maxBytes = maxBytes
+        os.makedirs(cachePath, exist_ok=True)
+
+    def getPath(self, key: str) -> str:
+        return os.path.join(self.cachePath, key + ".h5")
+
+    def _getEntries(self) -> Dict[str, List[str]]:
+        """
+        key -> files of the entry, the index or single file first
+        """
+        entries = {}
+        for name in sorted(os.listdir(self.cachePath)):
+            if name.endswith(".h5"):
+                key = name.split(".")[0]
+                entries.setdefault(key, []).append(os.path.join(self.cachePath, name))
+        return entries
+
+    def lookup(self, key: str) -> Optional[str]:
+        """
+        path of the cached state or None, a hit marks the entry as recently used
+        """
+        path = self.getPath(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def store(self, key: str, snapshot: "CheckPointSnapshot") -> str:
+        """
+        writes the state of the rank of the snapshot, a parallel entry only
+        becomes visible to lookup once storeIndex ran after every rank stored
+        """
+        path = self.getPath(key)
+        writeConsolidatedCheckPoint(path, snapshot)
+        if snapshot.ranks == 1:
+            self._evict(keep=key)
+        return path
+
+    def storeIndex(self, key: str, snapshot: "CheckPointSnapshot"):
+        if snapshot.ranks == 1:
+            return
+        writeConsolidatedIndex(self.getPath(key), snapshot)
+        self._evict(keep=key)
+
+    def _evict(self, keep: str):
+        entries = []
+        for key, paths in self._getEntries().items():
+            mtime, size = 0.0, 0
+            for path in paths:
+                try:
+                    status = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                mtime = max(mtime, status.st_mtime)
+                size += status.st_size
+            entries.append((mtime, size, key, paths))
+
+        totalBytes = sum(entry[1] for entry in entries)
+        for _, size, key, paths in sorted(entries):
+            if totalBytes <= self.maxBytes:
+                break
+            if key == keep:
+                continue
+            # the index goes first so lookup no longer finds a partly removed entry
+            for path in paths:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            totalBytes -= size
+            print(f"evicted initial state {key}")
@@ -0,0 +1,62 @@
+import math
+
+import numpy as np
+
+# fraction of the mantle temperature reached at the base of the plate
+PLATE_BASE_TEMPERATURE = 0.9
+
+
+# math.erf keeps scipy out of the dependencies
+erf = np.vectorize(math.erf, otypes=[float])
+
+
+def erfinv(value: float) -> float:
+    """
+    inverse of math.erf for a scalar in (-1, 1) by Newton iteration
+    """
+    x = 0.0
+    for _ in range(50):
+        step = (math.erf(x) - value) / (2.0 / math.sqrt(math.pi) * math.exp(-(x**2)))
+        x -= step
+        if abs(step) < 1e-15:
+            break
+    return x
+
+
+def distanceBelowSurface(points: np.ndarray, surface: np.ndarray) -> np.ndarray:
+    """
+    distance of every point to a polyline running from left to right,
+    measured on the right hand side of each segment (below the surface).
+    Points that do not lie below any segment get infinity.
+    """
+    distance = np.full(len(points), np.inf)
+    for start, end in zip(surface[:-1], surface[1:]):
+        tangent = end - start
+        length = np.linalg.norm(tangent)
+        tangent = tangent / length
+        normal = np.array((tangent[1], -tangent[0]))
+
+        relative = points - start
+        along = relative @ tangent
+        below = relative @ normal
+        underSegment = (along >= 0.0) & (along <= length) & (below >= 0.0)
+        distance[underSegment] = np.minimum(distance[underSegment], below[underSegment])
+    return distance
+
+
+def halfSpaceCoolingTemperature(
+    points: np.ndarray, slabTopSurface: np.ndarray, plateThickness: float
+) -> np.ndarray:
+    """
+    non dimensional half-space cooling profile T = erf(d / (2 sqrt(kappa t)))
+    with d the distance below the slab top surface. The plate age is chosen so
+    that the base of the plate sits at PLATE_BASE_TEMPERATURE, points outside
+    the plate are at the mantle temperature 1.
+    """
+    distance = distanceBelowSurface(points, slabTopSurface)
+    temperature = np.ones(len(points))
+    underPlate = np.isfinite(distance)
+    temperature[underPlate] = erf(
+        distance[underPlate] * erfinv(PLATE_BASE_TEMPERATURE) / plateThickness
+    )
+    return temperature
@@ -0,0 +1,118 @@
+"""
+readers for the legacy checkpoint layout, one directory per step holding
+
+    NNNNN/h5/<variable>.h5   with a 'data' dataset each
+    NNNNN/xdmf/<variable>.xdmf
+    NNNNN/time.json
+    NNNNN/complete           written last, marks the step as fully written
+
+checkpoints written before the marker existed have none, isLegacyStepUsable
+accepts them when their files are present and readable
+"""
+
+import json
+import os
+from typing import Dict, List, Tuple
+
+import h5py
+import numpy as np
+
+SECONDS_PER_YEAR = 31556952
+COMPLETE_MARKER = "complete"
+SWARM_VARIABLES = ("materialVariable", "previousStress")
+MESH_VARIABLES = (
+    "temperatureDotField",
+    "velocityField",
+    "pressureField",
+    "temperatureField",
+)
+
+
+def getStepDirectoryName(step: int) -> str:
+    return str(step).zfill(5)
+
+
+def isLegacyStepComplete(stepOutputPath: str) -> bool:
+    return os.path.isfile(os.path.join(stepOutputPath, COMPLETE_MARKER))
+
+
+def findLegacySteps(outputPath: str, completeOnly=False) -> List[int]:
+    """
+    param completeOnly: skip steps without the completion marker, these were interrupted
+    while writing or predate the marker
+    """
+    steps = []
+    for name in os.listdir(outputPath):
+        stepOutputPath = os.path.join(outputPath, name)
+        if not name.isdigit() or not os.path.isdir(os.path.join(stepOutputPath, "h5")):
+            continue
+        if completeOnly and not isLegacyStepComplete(stepOutputPath):
+            continue
+        steps.append(int(name))
+    return sorted(steps)
+
+
+def _getDatasetLength(path: str) -> int:
+    with h5py.File(path, "r") as f:
+        return f["data"].shape[0]
+
+
+def isLegacyStepUsable(stepOutputPath: str) -> bool:
+    """
+    whether the step can be read, marked complete or with every h5 file and the
+    time readable and the swarm variables as long as the swarm
+    """
+    if isLegacyStepComplete(stepOutputPath):
+        return True
+    h5Path = os.path.join(stepOutputPath, "h5")
+    try:
+        readLegacyTime(stepOutputPath)
+        particles = _getDatasetLength(os.path.join(h5Path, "swarm.h5"))
+        for name in SWARM_VARIABLES:
+            if _getDatasetLength(os.path.join(h5Path, name + ".h5")) != particles:
+                return False
+        for name in MESH_VARIABLES:
+            _getDatasetLength(os.path.join(h5Path, name + ".h5"))
+    except (OSError, KeyError, ValueError):
+        return False
+    return True
+
+
+def findUsableLegacySteps(outputPath: str) -> List[int]:
+    """
+    steps that can be migrated or rendered, see isLegacyStepUsable
+    """
+    return [
+        step
+        for step in findLegacySteps(outputPath)
+        if isLegacyStepUsable(os.path.join(outputPath, getStepDirectoryName(step)))
+    ]
+
+
+def readLegacyTime(stepOutputPath: str) -> float:
+    """
+    model time of the checkpoint in seconds
+    """
+    with open(stepOutputPath + "/time.json", "r") as f:
+        stored = json.load(f)
+    if "seconds" in stored:
+        return stored["seconds"]
+    # older checkpoints only hold the rounded time in years
+    return float(stored["time"].split()[0]) * SECONDS_PER_YEAR
+
+
+def readLegacyDataset(path: str) -> Tuple[np.ndarray, Dict]:
+    with h5py.File(path, "r") as f:
+        return f["data"][()], dict(f.attrs)
+
+
+def readLegacyMeshGeometry(path: str) -> Tuple[Tuple, Tuple, Tuple]:
+    """
+    resolution, min and max coordinates of the mesh a variable was saved on
+    """
+    with h5py.File(path, "r") as f:
+        return (
+            tuple(int(n) for n in f.attrs["mesh resolution"]),
+            tuple(float(c) for c in f.attrs["min"]),
+            tuple(float(c) for c in f.attrs["max"]),
+        )
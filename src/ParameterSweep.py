@@ -0,0 +1,242 @@
+"""
+runs SubductionModel over a grid or a latin hypercube of parameter values, one
+mpirun subprocess per run, and collects the results into one table
+
+python src/ParameterSweep.py sweep.json --processes 4
+
+the sweep file holds the shared settings and the varied values, keys of "grid"
+and "latinHypercube" are "polygons.<SubductionZonePolygons argument>",
+"parameters.<ModelParameterMap field>" or "model.<SubductionModel argument>"
+
+    {
+        "name": "dipSweep",
+        "ranksPerRun": 4,
+        "model": {"resolution": [200, 100], "totalSteps": 100, "stepAmountCheckpoint": 50},
+        "polygons": {"dip": 27},
+        "parameters": {},
+        "grid": {"polygons.dip": [20, 30, 40]},
+        "latinHypercube": {"samples": 8, "seed": 0,
+                           "ranges": {"parameters.spTopLayerViscosity": [1e23, 1e24]}}
+    }
+
+lengths are in meters and parameter values in the units of the Strak parameter map,
+or of the map in "parameterMap", a file written by modelParameters.dumpModelParameterMap
+
+every run directory holds the hash of the settings it was started with, output of
+other settings is neither resumed nor reported
+"""
+
+import argparse
+import csv
+import hashlib
+import itertools
+import json
+import os
+import subprocess
+import sys
+from multiprocessing.pool import ThreadPool
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import attr
+import numpy as np
+
+RESULT_FILE_NAME = "result.json"
+RUN_HASH_FILE_NAME = "runSpec.hash"
+SECTIONS = ("model", "polygons", "parameters")
+MEMBER_SCRIPT = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "sweepMember.py"
+)
+
+
+@attr.s(frozen=True, repr=True, slots=True, kw_only=True)
+class SweepRun:
+    index: int = attr.ib()
+    name: str = attr.ib()
+    overrides: Dict[str, float] = attr.ib()
+
+
+def expandGrid(grid: Dict[str, Sequence]) -> List[Dict]:
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*grid.values())]
+
+
+def latinHypercube(
+    ranges: Dict[str, Tuple[float, float]], samples: int, seed=None
+) -> List[Dict]:
+    """
+    every range is split into samples strata and every stratum is used exactly once
+    """
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for name, (low, high) in ranges.items():
+        strata = rng.permutation(samples) + rng.uniform(size=samples)
+        columns[name] = low + (high - low) * strata / samples
+    return [
+        {name: float(values[i]) for name, values in columns.items()}
+        for i in range(samples)
+    ]
+
+
+def expandSweep(spec: Dict) -> List[SweepRun]:
+    """
+    the latin hypercube samples are combined with every grid point
+    """
+    points = expandGrid(spec.get("grid", {}))
+    if "latinHypercube" in spec:
+        hypercube = spec["latinHypercube"]
+        samples = latinHypercube(
+            hypercube["ranges"], hypercube["samples"], hypercube.get("seed")
+        )
+        points = [{**point, **sample} for point in points for sample in samples]
+
+    for point in points:
+        for key in point:
+            if key.split(".", 1)[0] not in SECTIONS:
+                raise ValueError(f"{key = } has to start with one of {SECTIONS}")
+
+    return [
+        SweepRun(index=index, name=f"{spec['name']}_{index:04d}", overrides=point)
+        for index, point in enumerate(points)
+    ]
+
+
+def getRunSpec(spec: Dict, run: SweepRun) -> Dict:
+    """
+    settings of one run, the shared sections with the run's values applied
+    """
+    runSpec = {section: dict(spec.get(section, {})) for section in SECTIONS}
+    for key, value in run.overrides.items():
+        section, name = key.split(".", 1)
+        runSpec[section][name] = value
+    runSpec["name"] = run.name
+    runSpec["parameterMap"] = spec.get("parameterMap")
+    return runSpec
+
+
+def getRunOutputPath(run: SweepRun) -> str:
+    # SubductionModel writes to ./output/<name>
+    return os.path.join("output", run.name)
+
+
+def getRunSpecHash(runSpec: Dict) -> str:
+    """
+    hash of the settings of a run, including the content of its parameter map file
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(json.dumps(runSpec, sort_keys=True).encode())
+    if runSpec.get("parameterMap") is not None:
+        with open(runSpec["parameterMap"], "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def readRunHash(run: SweepRun) -> Optional[str]:
+    path = os.path.join(getRunOutputPath(run), RUN_HASH_FILE_NAME)
+    if not os.path.isfile(path):
+        return None
+    with open(path, "r") as f:
+        return f.read().strip()
+
+
+def isRunOutputOf(run: SweepRun, runHash: str) -> bool:
+    """
+    whether the output directory of the run is empty or was written with the settings
+    of runHash, only then the run may be resumed or skipped
+    """
+    outputPath = getRunOutputPath(run)
+    if not os.path.isdir(outputPath) or not os.listdir(outputPath):
+        return True
+    return readRunHash(run) == runHash
+
+
+def isRunComplete(run: SweepRun, runHash: str) -> bool:
+    resultPath = os.path.join(getRunOutputPath(run), RESULT_FILE_NAME)
+    return os.path.isfile(resultPath) and readRunHash(run) == runHash
+
+
+def _launch(sweepPath: str, spec: Dict, run: SweepRun, runHash: str) -> int:
+    runSpecPath = os.path.join(sweepPath, run.name + ".json")
+    with open(runSpecPath, "w") as f:
+        json.dump(getRunSpec(spec, run), f, indent=4)
+    outputPath = getRunOutputPath(run)
+    os.makedirs(outputPath, exist_ok=True)
+    with open(os.path.join(outputPath, RUN_HASH_FILE_NAME), "w") as f:
+        f.write(runHash + "\n")
+
+    command = ["mpirun", "-np", str(spec.get("ranksPerRun", 1))]
+    command += [sys.executable, MEMBER_SCRIPT, runSpecPath]
+    with open(os.path.join(sweepPath, run.name + ".log"), "w") as log:
+        completed = subprocess.run(command, stdout=log, stderr=subprocess.STDOUT)
+    print(f"finished {run.name} {completed.returncode = }")
+    return completed.returncode
+
+
+def collectResults(
+    sweepPath: str, runs: List[SweepRun], runHashes: Dict[str, str]
+) -> str:
+    """
+    writes results.csv with the varied values and the result of every run,
+    runs without a result of their settings are listed with an empty result
+    param runHashes: run name -> getRunSpecHash of its settings
+    """
+    rows = []
+    for run in runs:
+        row = {"name": run.name, **run.overrides}
+        resultPath = os.path.join(getRunOutputPath(run), RESULT_FILE_NAME)
+        if isRunComplete(run, runHashes[run.name]):
+            with open(resultPath, "r") as f:
+                result = json.load(f)
+            diagnostics = result.pop("diagnostics", {})
+            row.update(result)
+            row.update({f"final {name}": value for name, value in diagnostics.items()})
+        rows.append(row)
+
+    columns = list(dict.fromkeys(key for row in rows for key in row))
+    tablePath = os.path.join(sweepPath, "results.csv")
+    with open(tablePath, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=columns)
+        writer.writeheader()
+        writer.writerows(rows)
+    return tablePath
+
+
+def runSweep(spec: Dict, processes: int = 1) -> str:
+    """
+    runs every missing member, processes runs at a time with ranksPerRun mpi ranks
+    each, and returns the path of the results table
+    """
+    runs = expandSweep(spec)
+    sweepPath = os.path.join("output", "sweeps", spec["name"])
+    os.makedirs(sweepPath, exist_ok=True)
+
+    runHashes = {run.name: getRunSpecHash(getRunSpec(spec, run)) for run in runs}
+    conflicting = [run for run in runs if not isRunOutputOf(run, runHashes[run.name])]
+    if conflicting:
+        print(
+            f"skipping {[run.name for run in conflicting]}, their output directories "
+            "hold runs of other settings, remove them to run these"
+        )
+    complete = [run for run in runs if isRunComplete(run, runHashes[run.name])]
+    pending = [run for run in runs if run not in conflicting and run not in complete]
+    print(f"{len(runs)} runs, {len(complete)} already complete")
+    # the runs are mpirun subprocesses, the pool threads only wait for them
+    with ThreadPool(max(1, processes)) as pool:
+        returnCodes = pool.map(
+            lambda run: _launch(sweepPath, spec, run, runHashes[run.name]), pending
+        )
+
+    failed = [run.name for run, code in zip(pending, returnCodes) if code != 0]
+    if failed:
+        print(f"{failed = }")
+    return collectResults(sweepPath, runs, runHashes)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("sweepFile")
+    parser.add_argument("--processes", type=int, default=1)
+    args = parser.parse_args()
+
+    with open(args.sweepFile, "r") as f:
+        sweepSpec = json.load(f)
+    print(f"results in {runSweep(sweepSpec, args.processes)}")
@@ -0,0 +1,88 @@
+from contextlib import nullcontext
+from time import perf_counter
+from typing import Dict, Tuple
+
+from underworld import mpi
+
+_DISABLED_PHASE = nullcontext()
+
+
+class _Phase:
+    __slots__ = ("_timer", "_name", "_startTime")
+
+    def __init__(self, timer: "PhaseTimer", name: str) -> None:
+        self._timer = timer
+        self._name = name
+
+    def __enter__(self):
+        self._startTime = perf_counter()
+
+    def __exit__(self, *exception):
+        self._timer._add(self._name, perf_counter() - self._startTime)
+
+
+class PhaseTimer:
+    """
+    accumulates the wall clock time of named phases, use as
+
+        with timer.phase("stokesSolve"):
+            ...
+
+    the reports reduce the times over all ranks to min / mean / max. A disabled
+    timer hands out one shared no-op context and reports nothing
+    """
+
+    def __init__(self, enabled=True) -> None:
+        self.enabled = enabled
+        self._stepTimes: Dict[str, float] = {}
+        self._totalTimes: Dict[str, float] = {}
+
+    def phase(self, name: str):
+        if not self.enabled:
+            return _DISABLED_PHASE
+        return _Phase(self, name)
+
+    def _add(self, name: str, seconds: float):
+        self._stepTimes[name] = self._stepTimes.get(name, 0.0) + seconds
+        self._totalTimes[name] = self._totalTimes.get(name, 0.0) + seconds
+
+    @staticmethod
+    def _reduce(times: Dict[str, float]) -> Dict[str, Tuple[float, float, float]]:
+        """
+        collective, phases missing on a rank count as zero there
+        """
+        allTimes = mpi.comm.allgather(times)
+        names = sorted(set().union(*allTimes))
+        reduced = {}
+        for name in names:
+            values = [rankTimes.get(name, 0.0) for rankTimes in allTimes]
+            reduced[name] = (min(values), sum(values) / len(values), max(values))
+        return reduced
+
+    @staticmethod
+    def _formatTable(reduced: Dict[str, Tuple[float, float, float]]) -> str:
+        width = max((len(name) for name in reduced), default=5)
+        lines = [f"{'phase':<{width}} {'min':>10} {'mean':>10} {'max':>10}"]
+        for name, (minimum, mean, maximum) in reduced.items():
+            lines.append(
+                f"{name:<{width}} {minimum:>10.3e} {mean:>10.3e} {maximum:>10.3e}"
+            )
+        return "\n".join(lines)
+
+    def stepReport(self) -> str:
+        """
+        collective, table of the phases since the last step report
+        """
+        if not self.enabled:
+            return None
+        reduced = self._reduce(self._stepTimes)
+        self._stepTimes = {}
+        return self._formatTable(reduced)
+
+    def summary(self) -> str:
+        """
+        collective, table of the phase totals of the run
+        """
+        if not self.enabled:
+            return None
+        return self._formatTable(self._reduce(self._totalTimes))
@@ -8,6 +8,24 @@ from UWGeodynamics import UnitRegistry
 from modelParameters import ModelParameterMap
 
 
+def pointsInPolygon(points: np.ndarray, vertices: np.ndarray) -> np.ndarray:
+    """
+    vectorized even-odd ray casting test over an array of points,
+    returns a boolean mask of the points that lie inside the polygon
+    """
+    x = points[:, 0]
+    y = points[:, 1]
+    inside = np.zeros(len(points), dtype=bool)
+    x1, y1 = vertices[-1]
+    for x2, y2 in vertices:
+        crosses = (y1 > y) != (y2 > y)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            xCross = x1 + (y - y1) * (x2 - x1) / (y2 - y1)
+        inside ^= crosses & (x < xCross)
+        x1, y1 = x2, y2
+    return inside
+
+
 class SubductionZonePolygons:
     def __init__(
         self,
@@ -47,31 +65,20 @@ class SubductionZonePolygons:
         self._calculatePolygons()
 
     def _calculatePolygons(self) -> np.ndarray:
-        beginning = self.parameterSet.scalingCoefficient.scalingForLength(
-            self.beginning
-        ).magnitude
+        nonDimensional = self.parameterSet.nonDimensional
+        beginning = nonDimensional.nonDimensionalLength(self.beginning)
 
-        lb = self.parameterSet.scalingCoefficient.scalingForLength(
-            self.plateLength + self.beginning
-        ).magnitude
+        lb = nonDimensional.nonDimensionalLength(self.plateLength + self.beginning)
 
-        dipLength = self.parameterSet.scalingCoefficient.scalingForLength(
-            self.dipLength
-        ).magnitude
+        dipLength = nonDimensional.nonDimensionalLength(self.dipLength)
         l1 = dipLength * math.cos(self.dip)
 
         h1 = dipLength * math.sin(self.dip)
 
-        modelHeight = self.parameterSet.modelHeight.nonDimensionalValue.magnitude
-        lowerThickness = self.parameterSet.scalingCoefficient.scalingForLength(
-            self.lowerPlateThickness
-        ).magnitude
-        middleThickness = self.parameterSet.scalingCoefficient.scalingForLength(
-            self.middlePlateThickness
-        ).magnitude
-        upperThickness = self.parameterSet.scalingCoefficient.scalingForLength(
-            self.upperPlateThickness
-        ).magnitude
+        modelHeight = nonDimensional.modelHeight
+        lowerThickness = nonDimensional.nonDimensionalLength(self.lowerPlateThickness)
+        middleThickness = nonDimensional.nonDimensionalLength(self.middlePlateThickness)
+        upperThickness = nonDimensional.nonDimensionalLength(self.upperPlateThickness)
         totalThick = lowerThickness + upperThickness + middleThickness
         coord1 = (lb + l1, modelHeight - h1 - totalThick)
         coord2 = (
@@ -142,6 +149,9 @@ class SubductionZonePolygons:
             coord14,
         ]
 
+        self.slabTopSurface = [coord13, coord9, self.coord5, coord4]
+        self.plateThickness = totalThick
+
         # calculate function of equal legged triangle
         # y=ax+b
         # self._magnitude = (
@@ -283,3 +293,9 @@ class SubductionZonePolygons:
 
     def getLowerSlabShapeArray(self) -> List[Tuple]:
         return np.array(self.lowerSlabPolygon)
+
+    def getSlabTopSurfaceArray(self) -> List[Tuple]:
+        return np.array(self.slabTopSurface)
+
+    def getPlateThickness(self) -> float:
+        return self.plateThickness
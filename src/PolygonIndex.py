@@ -0,0 +1,116 @@
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+from PlatePolygons import pointsInPolygon
+
+
+class PolygonIndex:
+    """
+    uniform bucket grid over the model domain, keyed by mesh cell.
+    For every polygon each cell is marked as fully outside, fully inside or
+    crossed by the polygon boundary. Only points in crossed cells need the
+    full point in polygon test, all the others are labelled by a lookup.
+    """
+
+    OUTSIDE = 0
+    INSIDE = 1
+    BOUNDARY = 2
+
+    def __init__(
+        self,
+        polygons: List[Tuple[np.ndarray, int]],
+        minCoord: Sequence[float],
+        maxCoord: Sequence[float],
+        resolution: Tuple[int, int],
+    ) -> None:
+        """
+        param polygons: (shape array, label) pairs, later polygons take precedence
+        """
+        self.polygons = [
+            (np.asarray(shape, dtype=float), label) for shape, label in polygons
+        ]
+        self.minCoord = np.asarray(minCoord, dtype=float)
+        self.maxCoord = np.asarray(maxCoord, dtype=float)
+        self.resolution = np.asarray(resolution, dtype=int)
+        self.cellSize = (self.maxCoord - self.minCoord) / self.resolution
+
+        self._cellStates = [
+            self._rasterize(shape).ravel() for shape, _ in self.polygons
+        ]
+
+        # cells away from every polygon boundary get their label by lookup,
+        # -1 marks cells outside all polygons
+        self._cellLabels = np.full(self.resolution.prod(), -1, dtype=np.int32)
+        self._boundaryCells = np.zeros(self.resolution.prod(), dtype=bool)
+        for states, (_, label) in zip(self._cellStates, self.polygons):
+            self._cellLabels[states == self.INSIDE] = label
+            self._boundaryCells |= states == self.BOUNDARY
+
+    def _cellIndices(self, points: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        cells = np.floor((points - self.minCoord) / self.cellSize).astype(np.int64)
+        i = np.clip(cells[:, 0], 0, self.resolution[0] - 1)
+        j = np.clip(cells[:, 1], 0, self.resolution[1] - 1)
+        return i, j
+
+    def _rasterize(self, shape: np.ndarray) -> np.ndarray:
+        nx, ny = self.resolution
+        xs = np.linspace(self.minCoord[0], self.maxCoord[0], nx + 1)
+        ys = np.linspace(self.minCoord[1], self.maxCoord[1], ny + 1)
+        gridX, gridY = np.meshgrid(xs, ys, indexing="ij")
+        nodes = np.column_stack((gridX.ravel(), gridY.ravel()))
+        nodeInside = pointsInPolygon(nodes, shape).reshape(nx + 1, ny + 1)
+
+        cornerCount = (
+            nodeInside[:-1, :-1].astype(np.int8)
+            + nodeInside[1:, :-1]
+            + nodeInside[:-1, 1:]
+            + nodeInside[1:, 1:]
+        )
+        states = np.full((nx, ny), self.OUTSIDE, dtype=np.int8)
+        states[cornerCount == 4] = self.INSIDE
+
+        # an edge can cross a cell without flipping any of its corners,
+        # so every cell touched by a sampled edge is a boundary cell too
+        boundary = (cornerCount > 0) & (cornerCount < 4)
+        spacing = 0.25 * self.cellSize.min()
+        touched = np.zeros((nx, ny), dtype=bool)
+        for start, end in zip(shape, np.roll(shape, -1, axis=0)):
+            samples = max(int(np.ceil(np.linalg.norm(end - start) / spacing)), 1)
+            t = np.linspace(0.0, 1.0, samples + 1)[:, None]
+            i, j = self._cellIndices(start + t * (end - start))
+            touched[i, j] = True
+
+        # cells clipped by a sampled edge over less than the sample spacing
+        # neighbour a touched cell, growing by one cell covers them
+        dilated = touched.copy()
+        dilated[1:, :] |= touched[:-1, :]
+        dilated[:-1, :] |= touched[1:, :]
+        dilated[:, 1:] |= dilated[:, :-1].copy()
+        dilated[:, :-1] |= dilated[:, 1:].copy()
+
+        states[boundary | dilated] = self.BOUNDARY
+        return states
+
+    def _flatCellIndices(self, points: np.ndarray) -> np.ndarray:
+        i, j = self._cellIndices(points)
+        return i * self.resolution[1] + j
+
+    def classify(self, points: np.ndarray, default: int) -> np.ndarray:
+        cells = self._flatCellIndices(points)
+        labels = self._cellLabels[cells]
+        labels[labels == -1] = default
+
+        candidates = np.flatnonzero(self._boundaryCells[cells])
+        candidatePoints = points[candidates]
+        candidateCells = cells[candidates]
+        candidateLabels = np.full(len(candidates), default, dtype=np.int32)
+        for states, (shape, label) in zip(self._cellStates, self.polygons):
+            cellStates = states[candidateCells]
+            inside = cellStates == self.INSIDE
+            boundary = cellStates == self.BOUNDARY
+            inside[boundary] = pointsInPolygon(candidatePoints[boundary], shape)
+            candidateLabels[inside] = label
+
+        labels[candidates] = candidateLabels
+        return labels
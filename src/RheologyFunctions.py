@@ -12,9 +12,11 @@ u = scaling.units
 class RheologyFunctions:
     def __init__(self, modelParameterMap: ModelParameterMap) -> None:
         self.modelParameterMap = modelParameterMap
+        self.nonDimensional = modelParameterMap.nonDimensional
 
         self.symStrainRate = None
         self.strainRateSecondInvariant = None
+        self._strainRateVelocityField = None
         self.rayLeighNumber = None
 
         self.strainRateSolutionExists = fn.misc.constant(False)
@@ -24,16 +26,26 @@ class RheologyFunctions:
         return symStrainRate
 
     def getStrainRateSecondInvariant(self, velocityField):
+        """
+        built once per velocity field, the viscosity, the checkpoints and the figures
+        share the same function graph
+        """
+        if (
+            self.strainRateSecondInvariant is None
+            or self._strainRateVelocityField is not velocityField
+        ):
+            self.strainRateSecondInvariant = self._buildStrainRateSecondInvariant(
+                velocityField
+            )
+            self._strainRateVelocityField = velocityField
+        return self.strainRateSecondInvariant
 
+    def _buildStrainRateSecondInvariant(self, velocityField):
         strainRateSecondInvariant = fn.tensor.second_invariant(
             self.getSymmetricStrainRateTensor(velocityField)
         )
-        minimalStrainRate = fn.misc.constant(
-            self.modelParameterMap.minimalStrainRate.nonDimensionalValue.magnitude
-        )
-        defaultStrainRate = fn.misc.constant(
-            self.modelParameterMap.defaultStrainRate.nonDimensionalValue.magnitude
-        )
+        minimalStrainRate = fn.misc.constant(self.nonDimensional.minimalStrainRate)
+        defaultStrainRate = fn.misc.constant(self.nonDimensional.defaultStrainRate)
 
         condition1 = [
             (self.strainRateSolutionExists, strainRateSecondInvariant),
@@ -51,23 +63,17 @@ class RheologyFunctions:
 
     def getEffectiveViscosityOfUpperLayerVonMises(self, velocityField):
 
-        sigmaY = (
-            self.modelParameterMap.yieldStressOfSpTopLayer.nonDimensionalValue.magnitude
-        )
+        sigmaY = self.nonDimensional.yieldStressOfSpTopLayer
         strainRateSecondInvariant = self.getStrainRateSecondInvariant(velocityField)
         effectiveViscosity = 0.5 * sigmaY / (strainRateSecondInvariant)
         return effectiveViscosity
 
     def getEffectiveViscosityOfViscoElasticCore(self):
-        coreShearModulus = (
-            self.modelParameterMap.coreShearModulus.nonDimensionalValue.magnitude
-        )
-        coreVis = (
-            self.modelParameterMap.spCoreLayerViscosity.nonDimensionalValue.magnitude
-        )
+        coreShearModulus = self.nonDimensional.coreShearModulus
+        coreVis = self.nonDimensional.spCoreLayerViscosity
 
         alpha = coreVis / coreShearModulus
-        dt_e = self.modelParameterMap.deltaTime.nonDimensionalValue.magnitude
+        dt_e = self.nonDimensional.deltaTime
         effVis = (coreVis * dt_e) / (alpha + dt_e)
         return effVis
 
@@ -0,0 +1,68 @@
+import signal
+from collections import deque
+from time import time
+
+from underworld import mpi
+
+TERMINATION_SIGNALS = (signal.SIGTERM, signal.SIGUSR1)
+
+
+class RunTermination:
+    """
+    decides when a run has to take its final checkpoint and stop, because the
+    wall clock budget leaves no room for another step and checkpoint or because
+    the batch system sent SIGTERM / SIGUSR1. The decision is made on all ranks
+    together so every rank takes part in the final checkpoint
+    """
+
+    def __init__(self, wallTimeBudget: float = None, safetyFactor: float = 1.5) -> None:
+        """
+        param wallTimeBudget: seconds from now the run may take, None for no limit
+        param safetyFactor: multiplies the expected time of the next step and checkpoint
+        """
+        self.deadline = None if wallTimeBudget is None else time() + wallTimeBudget
+        self.safetyFactor = safetyFactor
+        self.receivedSignal = None
+        self._stepTimes = deque(maxlen=10)
+        self._checkPointTime = 0.0
+        self._previousHandlers = {}
+
+    def _handleSignal(self, signalNumber, frame):
+        self.receivedSignal = signalNumber
+
+    def installSignalHandlers(self):
+        for signalNumber in TERMINATION_SIGNALS:
+            self._previousHandlers[signalNumber] = signal.signal(
+                signalNumber, self._handleSignal
+            )
+
+    def restoreSignalHandlers(self):
+        for signalNumber, handler in self._previousHandlers.items():
+            signal.signal(signalNumber, handler)
+        self._previousHandlers = {}
+
+    def recordStepTime(self, stepTime: float):
+        self._stepTimes.append(stepTime)
+
+    def recordCheckPointTime(self, checkPointTime: float):
+        self._checkPointTime = max(self._checkPointTime, checkPointTime)
+
+    def getRemainingTime(self) -> float:
+        if self.deadline is None:
+            return float("inf")
+        return self.deadline - time()
+
+    def _isOutOfTime(self) -> bool:
+        if self.deadline is None or not self._stepTimes:
+            return False
+        # before the first checkpoint was timed a step is the best estimate we have
+        checkPointTime = self._checkPointTime or max(self._stepTimes)
+        expected = max(self._stepTimes) + checkPointTime
+        return self.getRemainingTime() < self.safetyFactor * expected
+
+    def shouldStop(self) -> bool:
+        """
+        collective over all ranks
+        """
+        stop = self.receivedSignal is not None or self._isOutOfTime()
+        return any(mpi.comm.allgather(stop))
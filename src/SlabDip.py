@@ -0,0 +1,103 @@
+import math
+from typing import Sequence
+
+import attr
+import numpy as np
+
+SLAB_INDICES = (1, 2, 3)
+
+
+@attr.s(frozen=True, repr=True, slots=True, kw_only=True)
+class SlabDip:
+    """
+    dip of the downgoing slab in degrees from the horizontal, dips holds the angle
+    between consecutive midline points at the mean of their depths
+    """
+
+    depths: np.ndarray = attr.ib(repr=False)
+    dips: np.ndarray = attr.ib(repr=False)
+    midlineDepths: np.ndarray = attr.ib(repr=False)
+    midlineX: np.ndarray = attr.ib(repr=False)
+    representativeDip: float = attr.ib()
+
+
+def _dipFromSlope(slope):
+    # slope is dx / ddepth along the midline, a vertical slab has zero slope
+    return np.degrees(np.arctan2(1.0, np.abs(slope)))
+
+
+def measureSlabDip(
+    coordinates: np.ndarray,
+    materials: np.ndarray,
+    *,
+    surfaceHeight: float,
+    minDepth: float,
+    maxDepth: float,
+    binWidth: float,
+    slabIndices: Sequence[int] = SLAB_INDICES,
+    minParticles: int = 10,
+    comm=None,
+) -> SlabDip:
+    """
+    bins the slab particles below minDepth, normally the plate thickness so the
+    flat part of the plate is left out, by depth and takes the mean x of every bin
+    as the slab midline. The representative dip follows from a straight line fit
+    of the midline.
+    param comm: mpi communicator to sum the bins of the particles on every rank
+    """
+    depth = surfaceHeight - coordinates[:, 1]
+    binAmount = max(1, math.ceil((maxDepth - minDepth) / binWidth))
+    isSlab = np.isin(np.ravel(materials), slabIndices)
+    isSlab &= (depth >= minDepth) & (depth < maxDepth)
+    bins = ((depth[isSlab] - minDepth) / binWidth).astype(np.int64)
+
+    sums = np.stack(
+        [
+            np.bincount(bins, minlength=binAmount),
+            np.bincount(bins, weights=coordinates[isSlab, 0], minlength=binAmount),
+            np.bincount(bins, weights=depth[isSlab], minlength=binAmount),
+        ]
+    ).astype(np.float64)
+    if comm is not None:
+        sums = comm.allreduce(sums)
+
+    counts, sumX, sumDepth = sums
+    filled = counts >= minParticles
+    midlineX = sumX[filled] / counts[filled]
+    midlineDepths = sumDepth[filled] / counts[filled]
+
+    dips = _dipFromSlope(np.diff(midlineX) / np.diff(midlineDepths))
+    depths = 0.5 * (midlineDepths[1:] + midlineDepths[:-1])
+    representativeDip = math.nan
+    if len(midlineDepths) >= 2:
+        slope = np.polyfit(midlineDepths, midlineX, 1)[0]
+        representativeDip = float(_dipFromSlope(slope))
+
+    return SlabDip(
+        depths=depths,
+        dips=dips,
+        midlineDepths=midlineDepths,
+        midlineX=midlineX,
+        representativeDip=representativeDip,
+    )
+
+
+def measureTrenchPosition(
+    coordinates: np.ndarray,
+    materials: np.ndarray,
+    *,
+    surfaceHeight: float,
+    maxDepth: float,
+    slabIndices: Sequence[int] = SLAB_INDICES,
+    comm=None,
+) -> float:
+    """
+    x of the foremost slab particle within maxDepth of the surface, the plate
+    subducts towards +x so this is where its top surface bends down
+    """
+    depth = surfaceHeight - coordinates[:, 1]
+    isSlab = np.isin(np.ravel(materials), slabIndices) & (depth < maxDepth)
+    trenchPosition = float(coordinates[isSlab, 0].max(initial=-np.inf))
+    if comm is not None:
+        trenchPosition = max(comm.allgather(trenchPosition))
+    return trenchPosition if np.isfinite(trenchPosition) else math.nan
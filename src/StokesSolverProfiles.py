@@ -0,0 +1,43 @@
+import attr
+from underworld import systems
+
+
+@attr.s(frozen=True, repr=True, slots=True, kw_only=True)
+class StokesSolverProfile:
+    name: str = attr.ib(validator=attr.validators.instance_of(str))
+    innerMethod: str = attr.ib(validator=attr.validators.instance_of(str))
+    penalty: float = attr.ib(default=None)
+    nonLinearTolerance: float = attr.ib(default=0.1)
+    nonLinearMaxIterations: int = attr.ib(default=500)
+
+    def createSolver(self, stokes: systems.Stokes) -> systems.Solver:
+        solver = systems.Solver(stokes)
+        solver.set_inner_method(self.innerMethod)
+        if self.penalty is not None:
+            solver.set_penalty(self.penalty)
+        return solver
+
+
+STOKES_SOLVER_PROFILES = {
+    # direct solve, robust but memory hungry at high resolution
+    "mumps": StokesSolverProfile(name="mumps", innerMethod="mumps"),
+    # geometric multigrid on the velocity block, scales to large meshes
+    "multigrid": StokesSolverProfile(
+        name="multigrid", innerMethod="mg", nonLinearMaxIterations=100
+    ),
+    # augmented lagrangian, the penalty speeds up the outer pressure iterations
+    "penalty": StokesSolverProfile(
+        name="penalty", innerMethod="mg", penalty=1.0e3, nonLinearMaxIterations=100
+    ),
+    # serial direct solve for small test runs
+    "lu": StokesSolverProfile(name="lu", innerMethod="lu", nonLinearMaxIterations=50),
+}
+
+
+def getStokesSolverProfile(name: str) -> StokesSolverProfile:
+    try:
+        return STOKES_SOLVER_PROFILES[name]
+    except KeyError:
+        raise ValueError(
+            f"unknown solver profile {name = }, choose from {list(STOKES_SOLVER_PROFILES)}"
+        )
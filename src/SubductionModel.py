@@ -2,21 +2,49 @@ import logging
 import math
 import os
 import pickle
+from collections import deque
 from time import time
 from typing import Tuple
 
+import numpy as np
 from underworld import conditions
 from underworld import function as fn
 from underworld import mesh, mpi, swarm, systems, utils
 from underworld.function._function import Function
-from underworld.scaling import units as u
 
 from CheckPointManager import CheckPointManager
+from CheckPointSnapshot import takeCheckPointSnapshot
+from ConsolidatedCheckPoint import (
+    readMeshVariable,
+    readSwarmCoordinates,
+    readSwarmVariable,
+)
+from DiagnosticsWriter import DiagnosticsWriter
 from FigureManager import FigureManager
-from modelParameters import ScalingCoefficientType
+from InitialStateCache import DEFAULT_MAX_BYTES, InitialStateCache, getInitialStateKey
+from InitialTemperature import halfSpaceCoolingTemperature
+from modelParameters import (
+    PARAMETER_MAP_FILE_NAME,
+    ScalingCoefficientType,
+    dumpModelParameterMap,
+)
 from modelParameters._Model_parameter_map import ModelParameterMap
+from PhaseTimer import PhaseTimer
 from PlatePolygons import SubductionZonePolygons
+from PolygonIndex import PolygonIndex
 from RheologyFunctions import RheologyFunctions
+from RunTermination import RunTermination
+from SlabDip import measureSlabDip, measureTrenchPosition
+from StokesSolverProfiles import getStokesSolverProfile
+
+DIAGNOSTICS = (
+    "Vrms",
+    "meanTemperature",
+    "slabDip",
+    "trenchPosition",
+    "nonLinearIterations",
+    "solveTime",
+)
 
 
 class SubductionModel:
@@ -26,96 +54,218 @@ class SubductionModel:
         name: str,
         modelParameterMap: ModelParameterMap,
         resolution: Tuple,
-        totalSteps,
+        totalSteps=None,
         stepAmountCheckpoint,
+        endTime: float = None,
         subductionZonePolygons: SubductionZonePolygons = None,
         fromCheckpoint: bool = False,
         fromCheckpointStep=None,
+        initialTemperature: str = "halfSpace",
+        adaptiveTimeStep: bool = False,
+        solverProfile: str = "mumps",
+        warmStart: bool = False,
+        asyncCheckpoint: bool = False,
+        checkpointFormat: str = "legacy",
+        checkpointCompression: str = None,
+        checkpointXdmf: bool = True,
+        checkpointFullEvery: int = None,
+        checkpointFigures: bool = False,
+        autoRestart: bool = False,
+        diagnostics: Tuple[str, ...] = DIAGNOSTICS,
+        diagnosticsFlushEvery: int = 10,
+        timePhases: bool = False,
+        initialStateCache: str = None,
+        initialStateCacheBytes: int = DEFAULT_MAX_BYTES,
     ) -> None:
         """
-        If you want to continue from a checkpoint param: subducionZonePolygons can be None
+        If you want to continue from a checkpoint param: subducionZonePolygons can be None,
+        without fromCheckpointStep the latest complete checkpoint in the output path is used.
+        The slab dip is only measured when subductionZonePolygons is given
+        param initialTemperature: "halfSpace" evaluates an analytic plate cooling profile on the
+        mesh nodes, "projection" projects a cold slab / hot mantle step from the particles
+        param totalSteps, endTime: the run ends after totalSteps steps or once the model time
+        reaches endTime in seconds, whichever comes first, at least one has to be given
+        param adaptiveTimeStep: limit every step by the advection-diffusion and swarm advection
+        courant condition instead of using the fixed deltaTime parameter, with an endTime
+        larger steps reach it with fewer Stokes solves
+        param solverProfile: name of one of the STOKES_SOLVER_PROFILES
+        param warmStart: seed every nonlinear Stokes solve with a linear extrapolation of
+        the last two velocity and pressure solutions
+        param asyncCheckpoint: write checkpoints on a background thread while the model
+        continues, needs the consolidated format, see CheckPointManager
+        param checkpointFormat: "legacy" directory tree or "consolidated" single h5 file per
+        step, checkpointCompression is an h5py filter such as "gzip" for the latter
+        param checkpointXdmf: write xdmf descriptors at run time, otherwise generate them
+        offline with generateXdmf.py
+        param checkpointFullEvery: write incremental consolidated checkpoints that reference
+        unchanged variables in earlier files, with a full checkpoint every n-th time
+        param checkpointFigures: render the derived field figures at every checkpoint,
+        otherwise render them offline with postProcess.py
+        param autoRestart: continue from the latest complete checkpoint when the output path
+        holds one and start from subductionZonePolygons otherwise, for chained batch jobs
+        param diagnostics: scalars out of DIAGNOSTICS recorded every step in
+        outputPath/diagnostics.csv, written every diagnosticsFlushEvery steps
+        param timePhases: time the phases of the initialisation and of every step, reduced
+        over the ranks and printed per step and as a summary at the end of run
+        param initialStateCache: directory caching the initialised swarm, material and
+        temperature state by mesh, polygons and initial temperature, runs with the same
+        geometry load it instead of populating and classifying the swarm again. The least
+        recently used states are removed beyond initialStateCacheBytes
         """
+        if totalSteps is None and endTime is None:
+            raise ValueError("totalSteps or endTime has to be given")
+        if initialTemperature not in ("halfSpace", "projection"):
+            raise ValueError(f"unknown {initialTemperature = }")
+        unknownDiagnostics = set(diagnostics) - set(DIAGNOSTICS)
+        if unknownDiagnostics:
+            raise ValueError(f"unknown {unknownDiagnostics = }")
+
         self.name = name
+        self.initialTemperature = initialTemperature
+        self.adaptiveTimeStep = adaptiveTimeStep
+        self.solverProfile = getStokesSolverProfile(solverProfile)
+        self.nonLinearIterations = 0
+        self.nonLinearIterationHistory = []
+        self.warmStart = warmStart
+        self._previousSolutions = deque(maxlen=2)
         self.parameters = modelParameterMap
+        self.nonDimensional = modelParameterMap.nonDimensional
         self.currentStep = 0
         self.currentTime = 0.0
+        # step of the checkpoint the model was restored from, it is not written again
+        self.startStep = None
         self.resolution = resolution
         self.mesh = None
+        self.subductionZonePolygons = subductionZonePolygons
+        self.slabDip = None
+        self.slabDipHistory = []
+        self.solveTime = 0.0
+        self.lastDiagnostics = {}
+        self.phaseTimer = PhaseTimer(enabled=timePhases)
+        self.initialStateCache = None
+        if initialStateCache is not None and mpi.rank == 0:
+            self.initialStateCache = InitialStateCache(
+                initialStateCache, initialStateCacheBytes
+            )
+        self._useInitialStateCache = initialStateCache is not None
         # self.dissipation = self.swarm.add_variable(dataType="double", count=1)
         # self.storedEnergyRate = self.swarm.add_variable(dataType="double", count=1)
 
         self.totalSteps = totalSteps
+        self.endTime = endTime
         self.stepAmountCheckpoint = stepAmountCheckpoint
         self._setOutputPath()
+        self._writeParameterMap()
+        self.checkPointManager = CheckPointManager(
+            self.name,
+            self.outputPath,
+            asynchronous=asyncCheckpoint,
+            checkpointFormat=checkpointFormat,
+            compression=checkpointCompression,
+            writeXdmf=checkpointXdmf,
+            fullCheckPointEvery=checkpointFullEvery,
+            saveFigures=checkpointFigures,
+        )
 
-        if fromCheckpoint:
+        if fromCheckpoint or autoRestart:
             if fromCheckpointStep is None:
-                raise ValueError
+                fromCheckpointStep = self.checkPointManager.findLatestCompleteStep()
+            if fromCheckpoint and fromCheckpointStep is None:
+                raise ValueError(f"no complete checkpoint in {self.outputPath}")
+            fromCheckpoint = fromCheckpointStep is not None
 
+        if fromCheckpoint:
+            print(f"restarting {self.name} from {fromCheckpointStep = }")
             self._initFromCheckPoint(fromCheckpointStep)
         else:
             if subductionZonePolygons is None:
                 raise ValueError
 
-            self.subductionZonePolygons = subductionZonePolygons
             self._initDefault()
 
-    def _initDefault(self):
+        self._setupDiagnostics(diagnostics, diagnosticsFlushEvery)
 
-        self._setMesh()
-        mpi.barrier()
-        self._initSwarm()
-        self.materialVariable = self.swarm.add_variable(dataType="int", count=1)
-        self.previousStress = self.swarm.add_variable(dataType="double", count=3)
-        self.previousStress.data[:] = [0.0, 0.0, 0.0]
-        mpi.barrier()
-        self._setupFields()
+    def _initDefault(self):
+        timer = self.phaseTimer
 
-        self.rheologyCalculations = RheologyFunctions(self.parameters)
+        with timer.phase("initMesh"):
+            self._setMesh()
         mpi.barrier()
         self.meshHandle = None
         self._setupMaterialVarIndices()
+        with timer.phase("assignPolygons"):
+            self._assignPolygons()
         mpi.barrier()
-        self._assignPolygons()
-        mpi.barrier()
-        self._fillTemperatureField()
-        mpi.barrier()
-        self._assignMaterialToVar()
+        cachedState = self._readInitialState(self._lookupInitialState())
+
+        if cachedState is not None:
+            with timer.phase("loadInitialState"):
+                self._loadInitialState(*cachedState)
+        else:
+            with timer.phase("initSwarm"):
+                self._initSwarm()
+                self._initSwarmVariables()
+            mpi.barrier()
+            with timer.phase("initFields"):
+                self._setupFields()
+            mpi.barrier()
+            with timer.phase("assignMaterial"):
+                self._assignMaterialToVar()
+            mpi.barrier()
+            with timer.phase("fillTemperature"):
+                self._fillTemperatureField()
+            mpi.barrier()
+            if self._useInitialStateCache:
+                with timer.phase("storeInitialState"):
+                    self._storeInitialState()
+
+        self.rheologyCalculations = RheologyFunctions(self.parameters)
         mpi.barrier()
         self._setBoundaryConditions()
         mpi.barrier()
         print("setBoundary")
-        self._assignViscosityAndCreateMap()
-        mpi.barrier()
-        print("createdVis")
-        self._assignStressAndCreateMap()
-        mpi.barrier()
-        print("createdStress")
-        self._setBuoyancy()
+        systemSetupStartTime = time()
+        with timer.phase("setupRheology"):
+            self._assignViscosityAndCreateMap()
+            mpi.barrier()
+            print("createdVis")
+            self._assignStressAndCreateMap()
+            mpi.barrier()
+            print("createdStress")
+            self._setBuoyancy()
         mpi.barrier()
         print("setBuoy")
 
-        self._setAdvectionDiffusionSystem()
-        mpi.barrier()
-        print("advDi")
-        self._setSwarmAdvectionSystem()
-        mpi.barrier()
-        print("swarmAd")
-        self._setStokesSystem()
+        with timer.phase("setupSystems"):
+            self._setAdvectionDiffusionSystem()
+            mpi.barrier()
+            print("advDi")
+            self._setSwarmAdvectionSystem()
+            mpi.barrier()
+            print("swarmAd")
+            self._setStokesSystem()
+            mpi.barrier()
+            print("setStokes")
+            self._setStokesSolver()
         mpi.barrier()
-        print("setStokes")
-        self._setStokesSolver()
-        mpi.barrier
+        self.systemSetupTime = time() - systemSetupStartTime
+
+        report = timer.stepReport()
+        if report is not None and mpi.rank == 0:
+            print(f"initialisation phases [s]\n{report}")
 
     def _initFromCheckPoint(self, step):
         self._setMesh()
         mpi.barrier()
-        manager = CheckPointManager(self.name, self.outputPath)
+        manager = self.checkPointManager
         self.currentStep = step
+        self.startStep = step
 
-        # self.mesh = manager.getMesh(self.preMesh)
-        self.swarm = swarm.Swarm(mesh=self.mesh)
+        restartStartTime = time()
+        sameMesh = manager.isSameMesh(step, self.mesh)
+        self._createSwarm()
         manager.getSwarm(self.swarm, step)
+        self._createPopulationControl()
         self.temperatureDotField = manager.getTemperatureDotField(step, self.mesh)
         self.materialVariable = manager.getMaterialVariable(step, self.swarm)
         self.previousStress = manager.getPreviousStress(step, self.swarm)
@@ -124,10 +274,17 @@ class SubductionModel:
         self.temperatureField = manager.getTemperatureField(step, self.mesh)
         self.meshHandle = None
         self.currentTime = manager.getLastTime(step)
+        self.restartLoadTime = time() - restartStartTime
+        print(
+            f"{step = }, {sameMesh = }, restartLoadTime = {self.restartLoadTime:.3f}s"
+        )
         self.rheologyCalculations = RheologyFunctions(self.parameters)
+        # the strain rate dependent rheology switches on once a velocity solution exists
+        self.rheologyCalculations.strainRateSolutionExists.value = step > 0
 
         self._setupMaterialVarIndices()
         self._setBoundaryConditions()
+        systemSetupStartTime = time()
         self._assignViscosityAndCreateMap()
         self._assignStressAndCreateMap()
         self._setBuoyancy()
@@ -135,6 +292,7 @@ class SubductionModel:
         self._setSwarmAdvectionSystem()
         self._setStokesSystem()
         self._setStokesSolver()
+        self.systemSetupTime = time() - systemSetupStartTime
 
     def _setMesh(self):
         if self.mesh is None:
@@ -143,19 +301,37 @@ class SubductionModel:
                 elementRes=(self.resolution),
                 minCoord=(0.0, 0.0),
                 maxCoord=(
-                    self.parameters.modelLength.nonDimensionalValue.magnitude,
-                    self.parameters.modelHeight.nonDimensionalValue.magnitude,
+                    self.nonDimensional.modelLength,
+                    self.nonDimensional.modelHeight,
                 ),
             )
 
-    def _initSwarm(self):
+    def _initSwarm(self, coordinates: np.ndarray = None):
+        """
+        param coordinates: particles of a cached initial state instead of the layout,
+        returns their local indices (-1 for particles owned by other ranks)
+        """
+        self._createSwarm()
+        localIndices = None
+        if coordinates is None:
+            self.swarmLayout = swarm.layouts.PerCellSpaceFillerLayout(
+                swarm=self.swarm, particlesPerCell=20
+            )
+            self.swarm.populate_using_layout(self.swarmLayout)
+        else:
+            localIndices = self.swarm.add_particles_with_coordinates(coordinates)
+        self._createPopulationControl()
+        return localIndices
 
+    def _createSwarm(self):
         self.swarm = swarm.Swarm(mesh=self.mesh, particleEscape=True)
         self.swarm.allow_parallel_nn = True
-        self.swarmLayout = swarm.layouts.PerCellSpaceFillerLayout(
-            swarm=self.swarm, particlesPerCell=20
-        )
-        self.swarm.populate_using_layout(self.swarmLayout)
+        self._particleRegions = None
+
+    def _createPopulationControl(self):
+        """
+        after the particles were added, a fresh start and a restart share the settings
+        """
         self.populationControl = swarm.PopulationControl(
             self.swarm,
             particlesPerCell=20,
@@ -164,6 +340,86 @@ class SubductionModel:
             maxSplits=10,
         )
 
+    def _initSwarmVariables(self):
+        self.materialVariable = self.swarm.add_variable(dataType="int", count=1)
+        self.previousStress = self.swarm.add_variable(dataType="double", count=3)
+        self.previousStress.data[:] = [0.0, 0.0, 0.0]
+
+    def _getInitialStateKey(self) -> str:
+        # the polygons are non dimensional, so the key also covers the length scaling
+        polygons = self.subductionZonePolygons
+        return getInitialStateKey(
+            {
+                "resolution": list(self.resolution),
+                "minCoord": list(self.mesh.minCoord),
+                "maxCoord": list(self.mesh.maxCoord),
+                "initialTemperature": self.initialTemperature,
+                "plateThickness": float(polygons.getPlateThickness()),
+            },
+            {
+                "slabUpperShape": self.slabUpperShape,
+                "slabCoreShape": self.slabCoreShape,
+                "slabLowerShape": self.slabLowerShape,
+                "slabTopSurface": polygons.getSlabTopSurfaceArray(),
+            },
+        )
+
+    def _lookupInitialState(self):
+        if not self._useInitialStateCache:
+            return None
+        self._initialStateKey = self._getInitialStateKey()
+        path = None
+        if mpi.rank == 0:
+            path = self.initialStateCache.lookup(self._initialStateKey)
+            print(f"initial state {self._initialStateKey} cached: {path is not None}")
+        return mpi.comm.bcast(path, root=0)
+
+    def _readInitialState(self, path):
+        """
+        the arrays of the cached state at path, read before any collective setup.
+        None on every rank when a rank could not read them, another run may have
+        evicted the entry after the lookup, it is then rebuilt
+        """
+        # the path is broadcast by the lookup, so every rank returns here alike
+        if path is None:
+            return None
+        state = None
+        try:
+            state = (
+                readSwarmCoordinates(path),
+                readSwarmVariable(path, "materialVariable"),
+                readMeshVariable(path, "temperatureField")[0],
+            )
+        except (OSError, KeyError) as e:
+            print(f"initial state {path} is unreadable, rebuilding it {e = }")
+        if not all(mpi.comm.allgather(state is not None)):
+            return None
+        return state
+
+    def _loadInitialState(self, coordinates, materials, temperature):
+        localIndices = self._initSwarm(coordinates)
+        self._initSwarmVariables()
+        owned = localIndices >= 0
+        self.materialVariable.data[localIndices[owned]] = materials[owned]
+        self._setupFields()
+        self.temperatureField.data[:] = temperature[self.mesh.data_nodegId.ravel()]
+
+    def _storeInitialState(self):
+        snapshot = takeCheckPointSnapshot(
+            step=0,
+            time=0.0,
+            mesh=self.mesh,
+            swarm=self.swarm,
+            swarmVariables={"materialVariable": self.materialVariable},
+            meshVariables={"temperatureField": self.temperatureField},
+        )
+        # every rank stores its part, rank 0 adds the index once all parts exist
+        self.initialStateCache.store(self._initialStateKey, snapshot)
+        mpi.barrier()
+        if mpi.rank == 0:
+            self.initialStateCache.storeIndex(self._initialStateKey, snapshot)
+        mpi.barrier()
+
     def _setOutputPath(self):
         if mpi.rank == 0:
             try:
@@ -178,6 +434,14 @@ class SubductionModel:
         self.outputPath = f"./output/{self.name}"
         self.figureManager = FigureManager(self.outputPath, self.name)
 
+    def _writeParameterMap(self):
+        """
+        keeps the parameter map next to the checkpoints, postProcess.py reads it
+        """
+        if mpi.rank == 0:
+            with open(self.outputPath + "/" + PARAMETER_MAP_FILE_NAME, "w") as f:
+                f.write(dumpModelParameterMap(self.parameters))
+
     def _setBoundaryConditions(self):
         self.verticalWalls = (
             self.mesh.specialSets["Left_VertexSet"]
@@ -218,45 +482,67 @@ class SubductionModel:
         self.coreSlabIndex = 3
 
     def _assignPolygons(self):
-        upperSlabShape = self.subductionZonePolygons.getUpperSlabShapeArray()
-        lowerSlabShape = self.subductionZonePolygons.getLowerSlabShapeArray()
-        middleSlabShape = self.subductionZonePolygons.getMiddleSlabShapeArray()
-        self.slabUpperPoly = fn.shape.Polygon(upperSlabShape)
-        self.slabLowerPoly = fn.shape.Polygon(lowerSlabShape)
-        self.slabCorePoly = fn.shape.Polygon(middleSlabShape)
+        self.slabUpperShape = self.subductionZonePolygons.getUpperSlabShapeArray()
+        self.slabLowerShape = self.subductionZonePolygons.getLowerSlabShapeArray()
+        self.slabCoreShape = self.subductionZonePolygons.getMiddleSlabShapeArray()
+        self.slabUpperPoly = fn.shape.Polygon(self.slabUpperShape)
+        self.slabLowerPoly = fn.shape.Polygon(self.slabLowerShape)
+        self.slabCorePoly = fn.shape.Polygon(self.slabCoreShape)
+        # later polygons overwrite earlier ones: upper -> core -> lower
+        self.polygonIndex = PolygonIndex(
+            [
+                (self.slabUpperShape, self.upperSlabIndex),
+                (self.slabCoreShape, self.coreSlabIndex),
+                (self.slabLowerShape, self.lowerSlabIndex),
+            ],
+            minCoord=self.mesh.minCoord,
+            maxCoord=self.mesh.maxCoord,
+            resolution=self.resolution,
+        )
+
+    def _getParticleRegions(self) -> np.ndarray:
+        """
+        classifies every particle of the swarm into a material index once
+        """
+        if self._particleRegions is None:
+            self._particleRegions = self.classifyPoints(
+                self.swarm.particleCoordinates.data
+            )
+        return self._particleRegions
+
+    def classifyPoints(self, points: np.ndarray) -> np.ndarray:
+        return self.polygonIndex.classify(points, self.upperMantleIndex)
 
     def _fillTemperatureField(self):
+        if self.initialTemperature == "projection":
+            self._projectTemperatureField()
+            return
+
+        self.temperatureField.data[:, 0] = halfSpaceCoolingTemperature(
+            self.mesh.data,
+            self.subductionZonePolygons.getSlabTopSurfaceArray(),
+            self.subductionZonePolygons.getPlateThickness(),
+        )
 
-        proxyTemp = self.swarm.add_variable(dataType="double", count=1)
-        proxyTemp.data[:] = 1.0
-
-        for index in range(len(self.swarm.particleCoordinates.data)):
-            coord = self.swarm.particleCoordinates.data[index][:]
-            # if coord[1] < self.parameters.lowerMantleHeigth.nonDimensionalValue.magnitude:
-            #     self.materialVariable.data[index] = self.lowerMantleIndex
-            if self.slabUpperPoly.evaluate(tuple(coord)):
-                proxyTemp.data[index] = 0.0
-            if self.slabCorePoly.evaluate(tuple(coord)):
-                proxyTemp.data[index] = 0.0
-            if self.slabLowerPoly.evaluate(tuple(coord)):
-                proxyTemp.data[index] = 0.0
-        TmapSolver = utils.MeshVariable_Projection(self.temperatureField, proxyTemp)
+    def _projectTemperatureField(self):
+        # cold slab, hot mantle, projected from the classified particles
+        proxyTemp = fn.branching.map(
+            fn_key=self.materialVariable,
+            mapping={
+                self.upperMantleIndex: 1.0,
+                self.upperSlabIndex: 0.0,
+                self.coreSlabIndex: 0.0,
+                self.lowerSlabIndex: 0.0,
+            },
+        )
+        TmapSolver = utils.MeshVariable_Projection(
+            self.temperatureField, proxyTemp, swarm=self.swarm
+        )
         TmapSolver.solve()
         print("solved TemperatureField")
 
     def _assignMaterialToVar(self):
-        self.materialVariable.data[:] = self.upperMantleIndex
-
-        for index in range(len(self.swarm.particleCoordinates.data)):
-            coord = self.swarm.particleCoordinates.data[index][:]
-            # if coord[1] < self.parameters.lowerMantleHeigth.nonDimensionalValue.magnitude:
-            #     self.materialVariable.data[index] = self.lowerMantleIndex
-            if self.slabUpperPoly.evaluate(tuple(coord)):
-                self.materialVariable.data[index] = self.upperSlabIndex
-            if self.slabCorePoly.evaluate(tuple(coord)):
-                self.materialVariable.data[index] = self.coreSlabIndex
-            if self.slabLowerPoly.evaluate(tuple(coord)):
-                self.materialVariable.data[index] = self.lowerSlabIndex
+        self.materialVariable.data[:, 0] = self._getParticleRegions()
 
     def _getDepthFunction(self):
         coordinate = fn.input()
@@ -265,35 +551,30 @@ class SubductionModel:
 
     def _assignViscosityAndCreateMap(self):
         fnDepth = self._getDepthFunction()
+        self.strainRate2ndInvariant = (
+            self.rheologyCalculations.getStrainRateSecondInvariant(self.velocityField)
+        )
 
         visTopLayer = fn.misc.min(
             self.rheologyCalculations.getEffectiveViscosityOfUpperLayerVonMises(
                 self.velocityField
             ),
-            self.parameters.spTopLayerViscosity.nonDimensionalValue.magnitude,  # self.parameters.spTopLayerViscosity.nonDimensionalValue.magnitude
+            self.nonDimensional.spTopLayerViscosity,
         )
 
-        maxDepth = 200e3 * u.meter
-        maxDepth = self.parameters.scalingCoefficient.scalingForLength(
-            maxDepth
-        ).magnitude
+        maxDepth = 200e3 / self.nonDimensional.lengthCoefficient
         alteredViscosity = 50.0
 
         conditionTopLayer = fn.branching.conditional(
             [(fnDepth > maxDepth, alteredViscosity), (fnDepth < maxDepth, visTopLayer)]
         )
 
-        visCoreLayer = (
-            self.parameters.spCoreLayerViscosity.nonDimensionalValue.magnitude
-            # self.parameters.spCoreLayerViscosity.nonDimensionalValue.magnitude
-        )
-        visBottomLayer = (
-            self.parameters.spBottomLayerViscosity.nonDimensionalValue.magnitude
-        )
+        visCoreLayer = self.nonDimensional.spCoreLayerViscosity
+        visBottomLayer = self.nonDimensional.spBottomLayerViscosity
 
         # print(f"{var = }")
         viscosityMap = {
-            self.upperMantleIndex: self.parameters.upperMantleViscosity.nonDimensionalValue.magnitude,
+            self.upperMantleIndex: self.nonDimensional.upperMantleViscosity,
             # self.lowerMantleIndex: self.parameters.lowerMantleViscosity.nonDimensionalValue.magnitude,
             self.lowerSlabIndex: round(visBottomLayer, 1),
             self.coreSlabIndex: visCoreLayer,
@@ -322,7 +603,6 @@ class SubductionModel:
         self.stress2ndInvariant = fn.tensor.second_invariant(self.stressFn)
 
     def _setBuoyancy(self):
-        print(self.temperatureField.data)
         ez = (0.0, -1.0)
         Ra = self.rheologyCalculations.getRayleighNumber()
         thermalDensityFn = Ra * (1.0 - self.temperatureField)
@@ -345,7 +625,7 @@ class SubductionModel:
             phiDotField=self.temperatureDotField,
             velocityField=self.velocityField,
             fn_sourceTerm=0.0,
-            fn_diffusivity=self.parameters.thermalDiffusivity.nonDimensionalValue.magnitude,
+            fn_diffusivity=self.nonDimensional.thermalDiffusivity,
             conditions=[
                 self.temperatureBoundaryCondition,
             ],
@@ -359,43 +639,126 @@ class SubductionModel:
         )
 
     def _setStokesSolver(self):
-        # try:
-        self.solver = systems.Solver(self.stokes)
-        self.solver.set_inner_method("mumps")
+        self.solver = self.solverProfile.createSolver(self.stokes)
 
-    # except RuntimeError:
-    #     self.solver = systems.Solver(self.stokes)
+    def _countNonLinearIteration(self):
+        self.nonLinearIterations += 1
 
-    def _update(self, time, step):
-        dt = self.parameters.deltaTime.nonDimensionalValue.magnitude
+    def _extrapolateStokesSolution(self):
+        if len(self._previousSolutions) < 2:
+            return
+
+        (time0, velocity0, pressure0), (time1, velocity1, pressure1) = (
+            self._previousSolutions
+        )
+        if time1 == time0:
+            return
+        ratio = (self.currentTime - time1) / (time1 - time0)
+        self.velocityField.data[:] = velocity1 + ratio * (velocity1 - velocity0)
+        self.pressureField.data[:] = pressure1 + ratio * (pressure1 - pressure0)
+
+    def _solveStokes(self):
+        if self.warmStart:
+            self._extrapolateStokesSolution()
+
+        self.nonLinearIterations = 0
+        self.solver.solve(
+            nonLinearIterate=True,
+            nonLinearTolerance=self.solverProfile.nonLinearTolerance,
+            nonLinearMaxIterations=self.solverProfile.nonLinearMaxIterations,
+            callback_post_solve=self._countNonLinearIteration,
+            print_stats=True,
+        )
+        self.nonLinearIterationHistory.append(self.nonLinearIterations)
+
+        if self.warmStart:
+            self._previousSolutions.append(
+                (
+                    self.currentTime,
+                    self.velocityField.data.copy(),
+                    self.pressureField.data.copy(),
+                )
+            )
+
+    def _getTimeStep(self):
+        if not self.adaptiveTimeStep:
+            return self.nonDimensional.deltaTime
+
+        safetyFactor = 1.0
+        if self.nonDimensional.courantSafetyFactor is not None:
+            safetyFactor = self.nonDimensional.courantSafetyFactor
+        dt = safetyFactor * min(
+            self.advectionDiffusion.get_max_dt(), self.swarmAdvector.get_max_dt()
+        )
+
+        if self.nonDimensional.minimalDeltaTime is not None:
+            dt = max(dt, self.nonDimensional.minimalDeltaTime)
+        if self.nonDimensional.maximalDeltaTime is not None:
+            dt = min(dt, self.nonDimensional.maximalDeltaTime)
+        return dt
+
+    def _getStepTimeStep(self):
+        """
+        the time step of the current step, shortened to end exactly at endTime
+        """
+        dt = self._getTimeStep()
+        if self.endTime is not None:
+            remaining = (
+                self.endTime - self.currentTime
+            ) / self.nonDimensional.timeCoefficient
+            dt = min(dt, remaining)
+        return dt
+
+    def isFinished(self) -> bool:
+        if self.totalSteps is not None and self.currentStep >= self.totalSteps:
+            return True
+        return self._reachesEndTime(self.currentTime)
+
+    def _reachesEndTime(self, modelTime) -> bool:
+        # a step shortened to the end time may stop a rounding error short of it
+        return self.endTime is not None and modelTime >= self.endTime * (1.0 - 1e-12)
+
+    def _isLastStep(self, dt) -> bool:
+        if self.totalSteps is not None and self.currentStep == self.totalSteps - 1:
+            return True
+        endOfStep = self.currentTime + dt * self.nonDimensional.timeCoefficient
+        return self._reachesEndTime(endOfStep)
+
+    def _update(self, time, step, dt):
+        dtYears = dt * self.nonDimensional.timeCoefficient / 31556952
+        if mpi.rank == 0:
+            print(f"{step = }, {dt = :.3e}, {dtYears = :.3e}")
 
         # if dt > self.parameters.timeScaleStress.nonDimensionalValue.magnitude:
         #     dt = self.parameters.timeScaleStress.nonDimensionalValue.magnitude
 
-        self.advectionDiffusion.integrate(dt)
-        self.swarmAdvector.integrate(dt, update_owners=True)
-        self.swarm.update_particle_owners()
-        self.populationControl.repopulate()
+        with self.phaseTimer.phase("advectionDiffusion"):
+            self.advectionDiffusion.integrate(dt)
+        with self.phaseTimer.phase("swarmAdvection"):
+            self.swarmAdvector.integrate(dt, update_owners=True)
+            self.swarm.update_particle_owners()
+        with self.phaseTimer.phase("populationControl"):
+            self.populationControl.repopulate()
 
-        dt = dt * self.parameters.scalingCoefficient.timeCoefficient.magnitude
+        dt = dt * self.nonDimensional.timeCoefficient
         self.rheologyCalculations.strainRateSolutionExists.value = True
         return time + dt, step + 1
 
     def getMeshHandle(self):
         if self.meshHandle is None:
+            meshPath = self.checkPointManager.getMeshPath()
             try:
-                self.meshHandle = self.mesh.save(self.outputPath + "mesh.00000.h5")
+                self.meshHandle = self.mesh.save(meshPath)
             except FileExistsError:
                 if mpi.rank == 0:
-                    os.remove(self.outputPath + "mesh.00000.h5")
+                    os.remove(meshPath)
                 mpi.barrier()
                 return self.getMeshHandle()
 
         return self.meshHandle
 
     def _checkpoint(self, step, time):
-        manager = CheckPointManager(self.name, self.outputPath)
-        manager.checkPoint(
+        self.checkPointManager.checkPoint(
             step=step,
             swarm=self.swarm,
             mesh=self.mesh,
@@ -407,89 +770,197 @@ class SubductionModel:
             temperatureField=self.temperatureField,
             figureManager=self.figureManager,
             meshHandle=self.getMeshHandle(),
-            strainRate2ndInvariant=self.rheologyCalculations.getStrainRateSecondInvariant(
-                self.velocityField
-            ),
+            strainRate2ndInvariant=self.strainRate2ndInvariant,
             viscosityFn=self.viscosityFn,
             stress2ndInvariant=self.stress2ndInvariant,
             time=time,
         )
 
-    def run(self):
-        # try:
-
-        velSquared = utils.Integral(
+    def _setupDiagnostics(self, diagnostics, flushEvery):
+        self._areaIntegral = utils.Integral(1.0, self.mesh)
+        self._velocitySquaredIntegral = utils.Integral(
             fn.math.dot(self.velocityField, self.velocityField), self.mesh
         )
-        area = utils.Integral(1.0, self.mesh)
-        check_start_time = time()
-        while self.currentStep < self.totalSteps:
-            # self.solver.set_penalty(100)
-
-            self.solver.solve(
-                nonLinearIterate=True, nonLinearTolerance=0.1, print_stats=True
+        self._temperatureIntegral = utils.Integral(self.temperatureField, self.mesh)
+        self.diagnostics = tuple(diagnostics)
+        self.diagnosticsWriter = None
+        if self.diagnostics:
+            self.diagnosticsWriter = DiagnosticsWriter(
+                self.outputPath + "/diagnostics.csv",
+                self.diagnostics,
+                flushEvery=flushEvery,
+                startStep=self.currentStep,
             )
-            if self.currentStep == 1:
-                self._assignViscosityAndCreateMap()
-                mpi.barrier()
-                self._assignStressAndCreateMap()
-                mpi.barrier()
-                # self._setBuoyancy()
 
-                self._setAdvectionDiffusionSystem()
-                mpi.barrier()
-                self._setSwarmAdvectionSystem()
-                mpi.barrier()
-                self._setStokesSystem()
-                mpi.barrier()
-                self._setStokesSolver()
+    def getVrms(self) -> float:
+        return math.sqrt(
+            self._velocitySquaredIntegral.evaluate()[0]
+            / self._areaIntegral.evaluate()[0]
+        )
+
+    def _measureTrenchPosition(self) -> float:
+        height = self.mesh.maxCoord[1] - self.mesh.minCoord[1]
+        return measureTrenchPosition(
+            self.swarm.particleCoordinates.data,
+            self.materialVariable.data,
+            surfaceHeight=self.mesh.maxCoord[1],
+            maxDepth=height / self.resolution[1],
+            slabIndices=(self.upperSlabIndex, self.lowerSlabIndex, self.coreSlabIndex),
+            comm=mpi.comm,
+        )
+
+    def _recordDiagnostics(self, slabDip):
+        """
+        collective, the integrals and reductions run on every rank
+        """
+        if self.diagnosticsWriter is None:
+            return
+        getters = {
+            "Vrms": self.getVrms,
+            "meanTemperature": lambda: self._temperatureIntegral.evaluate()[0]
+            / self._areaIntegral.evaluate()[0],
+            "slabDip": lambda: slabDip,
+            "trenchPosition": self._measureTrenchPosition,
+            "nonLinearIterations": lambda: self.nonLinearIterations,
+            "solveTime": lambda: self.solveTime,
+        }
+        values = {name: getters[name]() for name in self.diagnostics}
+        self.lastDiagnostics = values
+        self.diagnosticsWriter.record(self.currentStep, self.currentTime, values)
+
+    def _measureSlabDip(self) -> float:
+        """
+        representative dip in degrees of the slab below the plate, collective
+        """
+        if self.subductionZonePolygons is None:
+            return math.nan
+        height = self.mesh.maxCoord[1] - self.mesh.minCoord[1]
+        self.slabDip = measureSlabDip(
+            self.swarm.particleCoordinates.data,
+            self.materialVariable.data,
+            surfaceHeight=self.mesh.maxCoord[1],
+            minDepth=self.subductionZonePolygons.getPlateThickness(),
+            maxDepth=height,
+            binWidth=2.0 * height / self.resolution[1],
+            slabIndices=(self.upperSlabIndex, self.lowerSlabIndex, self.coreSlabIndex),
+            comm=mpi.comm,
+        )
+        self.slabDipHistory.append(
+            (self.currentStep, self.currentTime, self.slabDip.representativeDip)
+        )
+        return self.slabDip.representativeDip
+
+    def _timedCheckpoint(self, termination: RunTermination):
+        checkPointStartTime = time()
+        with self.phaseTimer.phase("checkpoint"):
+            self._checkpoint(self.currentStep, self.currentTime)
+        termination.recordCheckPointTime(time() - checkPointStartTime)
+        self.lastCheckPointStep = self.currentStep
+
+    def _finalCheckpoint(self, reason: str, termination: RunTermination):
+        if self.lastCheckPointStep == self.currentStep:
+            return
+        self._timedCheckpoint(termination)
+        self.checkPointManager.flush()
+        logging.debug(
+            f"checkpointed after {reason} {self.currentStep = }, {self.currentTime = }"
+        )
 
-            if (
-                self.currentStep % self.stepAmountCheckpoint == 0
-                or self.currentStep == self.totalSteps - 1
-            ):
-                self._checkpoint(self.currentStep, self.currentTime)
+    def run(self, wallTimeBudget: float = None):
+        """
+        param wallTimeBudget: seconds the run may take, a final checkpoint is written
+        when the measured step and checkpoint times leave no room for another step.
+        SIGTERM and SIGUSR1 also end the run with a checkpoint, continue it with
+        fromCheckpoint=True. An exception is re-raised without a checkpoint
+        """
+        termination = RunTermination(wallTimeBudget)
+        termination.installSignalHandlers()
+        self.lastCheckPointStep = self.startStep
+        try:
+            self._runSteps(termination)
+        except KeyboardInterrupt:
+            try:
+                self._finalCheckpoint("keyboardInterrupt", termination)
+            except Exception as e:
+                logging.exception(
+                    f" Failed final checkpoint after KeyboardInterrupt {e = }"
+                )
+                raise e
+        except Exception as e:
+            # no final checkpoint, the failure may be local to this rank and the
+            # collective write would wait for ranks that are still solving. The run
+            # restarts from the last complete checkpoint
+            logging.exception(f" Run Failed {e = }", stack_info=True)
+            raise e
+        finally:
+            termination.restoreSignalHandlers()
+            if self.diagnosticsWriter is not None:
+                self.diagnosticsWriter.flush()
+
+    def _runSteps(self, termination: RunTermination):
+        check_start_time = time()
+        while not self.isFinished():
+            solveStartTime = time()
+            with self.phaseTimer.phase("stokesSolve"):
+                self._solveStokes()
+            self.solveTime = time() - solveStartTime
+            with self.phaseTimer.phase("diagnostics"):
+                slabDip = self._measureSlabDip()
+                self._recordDiagnostics(slabDip)
+
+            dt = self._getStepTimeStep()
+            isLastStep = self._isLastStep(dt)
+            isCheckPointStep = (
+                self.currentStep % self.stepAmountCheckpoint == 0 or isLastStep
+            )
+            # rewriting the checkpoint a restart began at would replace the only
+            # complete copy of that step
+            if isCheckPointStep and self.currentStep != self.startStep:
+                self._timedCheckpoint(termination)
 
-                Vrms = math.sqrt(velSquared.evaluate()[0] / area.evaluate()[0])
+                Vrms = self.getVrms()
                 print(
                     f"{self.name = }, {self.currentStep = } {self.currentTime = :.3e} {Vrms = :.3e} "
                 )
 
             mpi.barrier()
-            newTime, newStep = self._update(self.currentTime, self.currentStep)
+            newTime, newStep = self._update(self.currentTime, self.currentStep, dt)
             self.currentStep = newStep
             self.currentTime = newTime
             self.figureManager.incrementStoreStep()
             check_endTime = time()
             time_for_loop = check_endTime - check_start_time
             check_start_time = check_endTime
-            print(f"{self.currentStep = }, {time_for_loop = }")
-
-    # except KeyboardInterrupt:
-    # try:
-    #     Vrms = math.sqrt(velSquared.evaluate()[0] / area.evaluate()[0])
-    #     self._checkpoint(self.currentStep, self.currentTime)
-    #     logging.debug(
-    #         f"sucessfully checkpointed after keyboardInterrupt {self.currentStep =}, {self.currentTime = }, {Vrms = }"
-    #     )
-    # except Exception as e:
-    #     logging.exception(
-    #         f" Failed final checkpoint after KeyboardInterrupt {e = }"
-    #     )
-    #     raise e
-
-    # except Exception as e:
-    #     logging.exception(f" Run Failed {e = }", stack_info=True)
-    # try:
-    #     Vrms = math.sqrt(velSquared.evaluate()[0] / area.evaluate()[0])
-    #     self._checkpoint(self.currentStep, self.currentTime)
-    #     logging.debug(
-    #         f"sucessfully checkpointed after exception {self.currentStep =}, {self.currentTime = }, {Vrms = }"
-    #     )
-    #     raise e
-    # except Exception as a:
-    #     logging.exception(f" Failed final checkpoint {a = }")
-    #     raise a
-
-
-# TODO create a start from checkpoint function
+            termination.recordStepTime(time_for_loop)
+            nonLinearIterations = self.nonLinearIterations
+            if self.currentStep == 2:
+                # the viscosity and stress maps follow strainRateSolutionExists in place,
+                # the equation stack used to be rebuilt here after the first solve
+                rebuildTimeSaved = self.systemSetupTime
+                print(
+                    f"{self.currentStep = }, {time_for_loop = }, {nonLinearIterations = }, "
+                    f"{slabDip = :.1f}, {rebuildTimeSaved = }"
+                )
+            else:
+                print(
+                    f"{self.currentStep = }, {time_for_loop = }, {nonLinearIterations = }, "
+                    f"{slabDip = :.1f}"
+                )
+            report = self.phaseTimer.stepReport()
+            if report is not None and mpi.rank == 0:
+                print(report)
+
+            if not self.isFinished() and termination.shouldStop():
+                remainingTime = termination.getRemainingTime()
+                receivedSignal = termination.receivedSignal
+                self._finalCheckpoint("stop request", termination)
+                print(
+                    f"stopped for restart at {self.currentStep = }, "
+                    f"{receivedSignal = }, {remainingTime = :.1f}s"
+                )
+                break
+
+        self.checkPointManager.flush()
+        summary = self.phaseTimer.summary()
+        if summary is not None and mpi.rank == 0:
+            print(f"run phases [s]\n{summary}")
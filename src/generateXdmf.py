@@ -0,0 +1,269 @@
+"""
+generates the xdmf descriptors of saved checkpoints so they can be opened in
+ParaView, for both the legacy and the consolidated checkpoint layout
+
+python src/generateXdmf.py ./output/test2 --first 0 --last 500
+"""
+
+import argparse
+import os
+from typing import Dict, List, Tuple
+
+import h5py
+
+from ConsolidatedCheckPoint import (
+    MESH_GROUP,
+    SWARM_GROUP,
+    findConsolidatedSteps,
+    getConsolidatedFileName,
+    getConsolidatedPartPaths,
+    isCellCentred,
+    listDatasets,
+    readMeshGeometry,
+    readMeshVariable,
+    readTime,
+    resolveDatasetPath,
+)
+from LegacyCheckPoint import (
+    MESH_VARIABLES,
+    SWARM_VARIABLES,
+    findLegacySteps,
+    getStepDirectoryName,
+    readLegacyTime,
+)
+
+_HEADER = (
+    '<?xml version="1.0" ?>\n'
+    '<Xdmf xmlns:xi="http://www.w3.org/2001/XInclude" Version="2.0">\n'
+    "<Domain>\n"
+)
+_FOOTER = "</Domain>\n</Xdmf>\n"
+
+
+def _dataItem(reference: str, shape: Tuple[int, ...], dtype) -> str:
+    numberType = "Int" if dtype.kind in "iu" else "Float"
+    dimensions = " ".join(str(n) for n in shape)
+    return (
+        f'<DataItem Format="HDF" NumberType="{numberType}" '
+        f'Precision="{dtype.itemsize}" Dimensions="{dimensions}">'
+        f"{reference}</DataItem>"
+    )
+
+
+def _attribute(name: str, reference: str, shape, dtype, center: str) -> str:
+    count = shape[0]
+    components = shape[1] if len(shape) > 1 else 1
+    if components == 1:
+        return (
+            f'<Attribute Type="Scalar" Center="{center}" Name="{name}">\n'
+            f"{_dataItem(reference, shape, dtype)}\n</Attribute>\n"
+        )
+
+    # xdmf vectors have three components, 2D vectors get a zero z component
+    slabs = []
+    for component in range(components):
+        slabs.append(
+            f'<DataItem ItemType="HyperSlab" Dimensions="{count} 1">\n'
+            f'<DataItem Dimensions="3 2" Format="XML"> 0 {component} 1 1 {count} 1 '
+            "</DataItem>\n"
+            f"{_dataItem(reference, shape, dtype)}\n</DataItem>\n"
+        )
+    names = ", ".join(f"${n}" for n in range(components))
+    if components == 2:
+        names += ", 0*$0"
+    return (
+        f'<Attribute Type="Vector" Center="{center}" Name="{name}">\n'
+        f'<DataItem ItemType="Function" Dimensions="{count} 3" '
+        f'Function="JOIN({names})">\n' + "".join(slabs) + "</DataItem>\n</Attribute>\n"
+    )
+
+
+def _meshGrid(resolution, minCoord, maxCoord, time, fields: List[Tuple]) -> str:
+    """
+    regular mesh described by origin and spacing, xdmf orders the axes slowest first
+    """
+    nx, ny = resolution
+    dx = (maxCoord[0] - minCoord[0]) / nx
+    dy = (maxCoord[1] - minCoord[1]) / ny
+    text = (
+        '<Grid Name="mesh" GridType="Uniform">\n'
+        f'<Time Value="{time}" />\n'
+        f'<Topology TopologyType="2DCoRectMesh" Dimensions="{ny + 1} {nx + 1}" />\n'
+        '<Geometry GeometryType="ORIGIN_DXDY">\n'
+        f'<DataItem Format="XML" Dimensions="2">{minCoord[1]} {minCoord[0]}</DataItem>\n'
+        f'<DataItem Format="XML" Dimensions="2">{dy} {dx}</DataItem>\n'
+        "</Geometry>\n"
+    )
+    for name, reference, shape, dtype, elementType in fields:
+        center = "Cell" if isCellCentred(elementType) else "Node"
+        text += _attribute(name, reference, shape, dtype, center)
+    return text + "</Grid>\n"
+
+
+def _swarmGrid(
+    coordinateReference,
+    coordinateShape,
+    coordinateDtype,
+    time,
+    variables,
+    name="swarm",
+) -> str:
+    text = (
+        f'<Grid Name="{name}" GridType="Uniform">\n'
+        f'<Time Value="{time}" />\n'
+        f'<Topology TopologyType="Polyvertex" NumberOfElements="{coordinateShape[0]}" />\n'
+        '<Geometry GeometryType="XY">\n'
+        f"{_dataItem(coordinateReference, coordinateShape, coordinateDtype)}\n"
+        "</Geometry>\n"
+    )
+    for name, reference, shape, dtype in variables:
+        text += _attribute(name, reference, shape, dtype, "Node")
+    return text + "</Grid>\n"
+
+
+def _decode(value):
+    if isinstance(value, bytes):
+        return value.decode()
+    return value
+
+
+def _describe(path: str, dataset: str = "data") -> Tuple[Tuple, object, Dict, Dict]:
+    with h5py.File(path, "r") as f:
+        return f[dataset].shape, f[dataset].dtype, dict(f[dataset].attrs), dict(f.attrs)
+
+
+def writeLegacyStepXdmf(outputPath: str, step: int):
+    """
+    one descriptor per variable in NNNNN/xdmf, as written at run time
+    """
+    stepOutputPath = os.path.join(outputPath, getStepDirectoryName(step))
+    h5Path = os.path.join(stepOutputPath, "h5")
+    xdmfPath = os.path.join(stepOutputPath, "xdmf")
+    os.makedirs(xdmfPath, exist_ok=True)
+    time = readLegacyTime(stepOutputPath)
+
+    swarmShape, swarmDtype, _, _ = _describe(os.path.join(h5Path, "swarm.h5"))
+    for name in SWARM_VARIABLES:
+        shape, dtype, _, _ = _describe(os.path.join(h5Path, name + ".h5"))
+        grid = _swarmGrid(
+            "../h5/swarm.h5:/data",
+            swarmShape,
+            swarmDtype,
+            time,
+            [(name, f"../h5/{name}.h5:/data", shape, dtype)],
+        )
+        with open(os.path.join(xdmfPath, name + ".xdmf"), "w") as f:
+            f.write(_HEADER + grid + _FOOTER)
+
+    for name in MESH_VARIABLES:
+        shape, dtype, _, attrs = _describe(os.path.join(h5Path, name + ".h5"))
+        grid = _meshGrid(
+            tuple(int(n) for n in attrs["mesh resolution"]),
+            tuple(float(c) for c in attrs["min"]),
+            tuple(float(c) for c in attrs["max"]),
+            time,
+            [
+                (
+                    name,
+                    f"../h5/{name}.h5:/data",
+                    shape,
+                    dtype,
+                    _decode(attrs["elementType"]),
+                )
+            ],
+        )
+        with open(os.path.join(xdmfPath, name + ".xdmf"), "w") as f:
+            f.write(_HEADER + grid + _FOOTER)
+
+
+def writeConsolidatedStepXdmf(outputPath: str, step: int):
+    """
+    a single NNNNN.xdmf next to the NNNNN.h5 holding the mesh and swarm grids.
+    The swarm of a parallel checkpoint is a collection of one grid per part and
+    its mesh variables are merged into NNNNN.mesh.h5
+    """
+    fileName = getConsolidatedFileName(step)
+    stem = fileName[: -len(".h5")]
+    path = os.path.join(outputPath, fileName)
+    time = readTime(path)
+    resolution, minCoord, maxCoord = readMeshGeometry(path)
+    partPaths = getConsolidatedPartPaths(path)
+
+    def describe(filePath, group, name):
+        # incremental checkpoints point at the file that holds unchanged data
+        holder = resolveDatasetPath(filePath, group, name)
+        with h5py.File(holder, "r") as f:
+            dataset = f[group][name]
+            reference = f"{os.path.basename(holder)}:/{group}/{name}"
+            return reference, dataset.shape, dataset.dtype, dict(dataset.attrs)
+
+    meshPath = path
+    meshNames = listDatasets(path, MESH_GROUP)
+    if len(partPaths) > 1:
+        meshPath = os.path.join(outputPath, stem + ".mesh.h5")
+        with h5py.File(meshPath, "w") as f:
+            for name in meshNames:
+                data, elementType = readMeshVariable(path, name)
+                dataset = f.create_dataset(f"{MESH_GROUP}/{name}", data=data)
+                dataset.attrs["elementType"] = elementType
+
+    meshFields = []
+    for name in meshNames:
+        reference, shape, dtype, attrs = describe(meshPath, MESH_GROUP, name)
+        meshFields.append(
+            (name, reference, shape, dtype, _decode(attrs["elementType"]))
+        )
+
+    swarmNames = [
+        name for name in listDatasets(path, SWARM_GROUP) if name != "coordinates"
+    ]
+    swarms = []
+    for rank, partPath in enumerate(partPaths):
+        swarmVariables = []
+        for name in swarmNames:
+            reference, shape, dtype, _ = describe(partPath, SWARM_GROUP, name)
+            swarmVariables.append((name, reference, shape, dtype))
+        coordinateReference, coordinateShape, coordinateDtype, _ = describe(
+            partPath, SWARM_GROUP, "coordinates"
+        )
+        swarms.append(
+            _swarmGrid(
+                coordinateReference,
+                coordinateShape,
+                coordinateDtype,
+                time,
+                swarmVariables,
+                name="swarm" if len(partPaths) == 1 else f"swarm{rank}",
+            )
+        )
+    swarm = "".join(swarms)
+    if len(partPaths) > 1:
+        swarm = (
+            '<Grid Name="swarm" GridType="Collection" CollectionType="Spatial">\n'
+            + swarm
+            + "</Grid>\n"
+        )
+
+    mesh = _meshGrid(resolution, minCoord, maxCoord, time, meshFields)
+    with open(os.path.join(outputPath, stem + ".xdmf"), "w") as f:
+        f.write(_HEADER + mesh + swarm + _FOOTER)
+
+
+def generateXdmf(outputPath: str, first: int = 0, last: int = None):
+    def inRange(step):
+        return step >= first and (last is None or step <= last)
+
+    for step in filter(inRange, findLegacySteps(outputPath)):
+        writeLegacyStepXdmf(outputPath, step)
+    for step in filter(inRange, findConsolidatedSteps(outputPath)):
+        writeConsolidatedStepXdmf(outputPath, step)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("outputPath")
+    parser.add_argument("--first", type=int, default=0)
+    parser.add_argument("--last", type=int, default=None)
+    args = parser.parse_args()
+
+    generateXdmf(args.outputPath, args.first, args.last)
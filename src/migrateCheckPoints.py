@@ -0,0 +1,83 @@
+"""
+converts the legacy NNNNN/h5 checkpoints of a model output directory into
+consolidated NNNNN.h5 files
+
+python src/migrateCheckPoints.py ./output/test2 --compression gzip
+"""
+
+import argparse
+import os
+import shutil
+
+from CheckPointSnapshot import CheckPointSnapshot
+from ConsolidatedCheckPoint import getConsolidatedFileName, writeConsolidatedCheckPoint
+from LegacyCheckPoint import (
+    MESH_VARIABLES,
+    SWARM_VARIABLES,
+    findUsableLegacySteps,
+    getStepDirectoryName,
+    readLegacyDataset,
+    readLegacyTime,
+)
+
+
+def _decode(value):
+    if isinstance(value, bytes):
+        return value.decode()
+    return value
+
+
+def migrateStep(outputPath, step, compression=None, chunked=False):
+    stepOutputPath = os.path.join(outputPath, getStepDirectoryName(step))
+    h5Path = os.path.join(stepOutputPath, "h5")
+
+    swarmCoordinates, _ = readLegacyDataset(os.path.join(h5Path, "swarm.h5"))
+    swarmVariables = {
+        name: readLegacyDataset(os.path.join(h5Path, name + ".h5"))[0]
+        for name in SWARM_VARIABLES
+    }
+
+    meshVariables = {}
+    elementTypes = {}
+    for name in MESH_VARIABLES:
+        data, attrs = readLegacyDataset(os.path.join(h5Path, name + ".h5"))
+        if "mesh resolution" not in attrs:
+            raise ValueError(f"{name}.h5 of {step = } holds no mesh attributes")
+        meshVariables[name] = data
+        elementTypes[name] = _decode(attrs["elementType"])
+        meshAttrs = attrs
+
+    snapshot = CheckPointSnapshot(
+        step=step,
+        time=readLegacyTime(stepOutputPath),
+        swarmCoordinates=swarmCoordinates,
+        swarmVariables=swarmVariables,
+        meshVariables=meshVariables,
+        meshResolution=tuple(int(n) for n in meshAttrs["mesh resolution"]),
+        minCoord=tuple(float(c) for c in meshAttrs["min"]),
+        maxCoord=tuple(float(c) for c in meshAttrs["max"]),
+        elementTypes=elementTypes,
+    )
+    writeConsolidatedCheckPoint(
+        os.path.join(outputPath, getConsolidatedFileName(step)),
+        snapshot,
+        compression=compression,
+        chunked=chunked,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("outputPath")
+    parser.add_argument("--compression", default=None)
+    parser.add_argument("--chunked", action="store_true")
+    parser.add_argument(
+        "--remove", action="store_true", help="delete the legacy step directories"
+    )
+    args = parser.parse_args()
+
+    for step in findUsableLegacySteps(args.outputPath):
+        migrateStep(args.outputPath, step, args.compression, args.chunked)
+        if args.remove:
+            shutil.rmtree(os.path.join(args.outputPath, getStepDirectoryName(step)))
+        print(f"migrated {step = }")
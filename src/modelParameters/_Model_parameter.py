@@ -3,6 +3,8 @@ from __future__ import annotations
 import attr
 from pint.quantity import _Quantity
 
+from modelParameters._scaling_coefficient_type import ScalingCoefficientType
+
 
 @attr.s(frozen=True, repr=True, slots=True, kw_only=True)
 class ModelParameter:
@@ -12,3 +14,9 @@ class ModelParameter:
     nonDimensionalValue: _Quantity = attr.ib(
         validator=attr.validators.instance_of(_Quantity)
     )
+    scalingType: ScalingCoefficientType = attr.ib(
+        default=None,
+        validator=attr.validators.optional(
+            attr.validators.instance_of(ScalingCoefficientType)
+        ),
+    )
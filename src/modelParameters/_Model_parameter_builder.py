@@ -24,8 +24,10 @@ class ModelParameterBuilder:
         if isinstance(value, _Quantity):
             if scalingCoefficientEnum is None and nonDimensionalOverrideValue is None:
                 nonDimensionalValue = u.Quantity(value.magnitude)
+                scalingType = ScalingCoefficientType.NONE
             elif scalingCoefficientEnum == ScalingCoefficientType.NONE:
                 nonDimensionalValue = u.Quantity(value.magnitude)
+                scalingType = ScalingCoefficientType.NONE
             elif nonDimensionalOverrideValue is not None:
                 if not isinstance(
                     nonDimensionalOverrideValue, float
@@ -35,15 +37,19 @@ class ModelParameterBuilder:
                     nonDimensionalValue = nonDimensionalOverrideValue
                 else:
                     nonDimensionalValue = u.Quantity(nonDimensionalOverrideValue)
+                scalingType = ScalingCoefficientType.MANUAL
             elif scalingCoefficientEnum == ScalingCoefficientType.UNDERWORLD:
                 nonDimensionalValue = u.Quantity(nd(value))
+                scalingType = ScalingCoefficientType.UNDERWORLD
             else:
                 nonDimensionalValue = self.scalingCoefficient.nonDimensionalizeUnit(
                     value, scalingCoefficientEnum
                 )
+                scalingType = ScalingCoefficientType(scalingCoefficientEnum)
             return ModelParameter(
                 dimensionalValue=value,
                 nonDimensionalValue=nonDimensionalValue,
+                scalingType=scalingType,
             )
         else:
             raise ValueError
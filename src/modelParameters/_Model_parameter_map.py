@@ -1,6 +1,10 @@
 import attr
 
 from modelParameters._Model_parameter import ModelParameter
+from modelParameters._Non_dimensional_snapshot import (
+    NonDimensionalSnapshot,
+    takeNonDimensionalSnapshot,
+)
 from modelParameters._Scaling_coefficient import ScalingCoefficient
 
 
@@ -72,3 +76,20 @@ class ModelParameterMap:
     defaultStrainRate: ModelParameter = attr.ib(
         validator=attr.validators.instance_of(ModelParameter)
     )
+    courantSafetyFactor: ModelParameter = attr.ib(
+        default=None,
+        validator=attr.validators.optional(attr.validators.instance_of(ModelParameter)),
+    )
+    minimalDeltaTime: ModelParameter = attr.ib(
+        default=None,
+        validator=attr.validators.optional(attr.validators.instance_of(ModelParameter)),
+    )
+    maximalDeltaTime: ModelParameter = attr.ib(
+        default=None,
+        validator=attr.validators.optional(attr.validators.instance_of(ModelParameter)),
+    )
+    # plain floats of the values above, taken once when the map is built
+    nonDimensional: NonDimensionalSnapshot = attr.ib(init=False, repr=False, eq=False)
+
+    def __attrs_post_init__(self):
+        object.__setattr__(self, "nonDimensional", takeNonDimensionalSnapshot(self))
@@ -47,6 +47,10 @@ class ModelParameterMapBuilder:
         self._lowerMantleHeigth: ModelParameter = None
         self._coreShearModulus = None
         self._timeScaleStress: ModelParameter = None
+        self._deltaTime: ModelParameter = None
+        self._courantSafetyFactor: ModelParameter = None
+        self._minimalDeltaTime: ModelParameter = None
+        self._maximalDeltaTime: ModelParameter = None
         self._fromBluePrint = False
         self._temperatureContrast = None
         self._resetFlag = False
@@ -309,6 +313,39 @@ class ModelParameterMapBuilder:
         )
         return self
 
+    def setCourantSafetyFactor(
+        self,
+        value: Union[_Unit, _Quantity],
+        scalingCoefficientTypeEnum: Union[None, ScalingCoefficientType] = None,
+        nonDimensionalOverrideValue=None,
+    ) -> ModelParameterMapBuilder:
+        self._courantSafetyFactor = self._modelParameterbuilder.buildModelParameter(
+            value, scalingCoefficientTypeEnum, nonDimensionalOverrideValue
+        )
+        return self
+
+    def setMinimalDeltaTime(
+        self,
+        value: Union[_Unit, _Quantity],
+        scalingCoefficientTypeEnum: Union[None, ScalingCoefficientType] = None,
+        nonDimensionalOverrideValue=None,
+    ) -> ModelParameterMapBuilder:
+        self._minimalDeltaTime = self._modelParameterbuilder.buildModelParameter(
+            value, scalingCoefficientTypeEnum, nonDimensionalOverrideValue
+        )
+        return self
+
+    def setMaximalDeltaTime(
+        self,
+        value: Union[_Unit, _Quantity],
+        scalingCoefficientTypeEnum: Union[None, ScalingCoefficientType] = None,
+        nonDimensionalOverrideValue=None,
+    ) -> ModelParameterMapBuilder:
+        self._maximalDeltaTime = self._modelParameterbuilder.buildModelParameter(
+            value, scalingCoefficientTypeEnum, nonDimensionalOverrideValue
+        )
+        return self
+
     def createBluePrint(self):
         output = {}
         for name, value in inspect.getmembers(self):
@@ -351,6 +388,9 @@ class ModelParameterMapBuilder:
                 temperatureContrast=self._temperatureContrast,
                 defaultStrainRate=self._defaultStrainRate,
                 minimalStrainRate=self._minimalStrainRate,
+                courantSafetyFactor=self._courantSafetyFactor,
+                minimalDeltaTime=self._minimalDeltaTime,
+                maximalDeltaTime=self._maximalDeltaTime,
             )
             self._reset()
             return modelParameterDao
@@ -0,0 +1,136 @@
+"""
+json form of a ModelParameterMap holding the magnitude and units of the dimensional
+and non dimensional value and the scaling type of every parameter, plus the import
+path of the scaling coefficient class
+
+    {"version": 1, "scalingCoefficient": "strakParam:Strak2021ScalingCoefficient",
+     "parameters": {"modelHeight": {"magnitude": 660000.0, "units": "meter",
+                                    "nonDimensionalMagnitude": 0.2275...,
+                                    "nonDimensionalUnits": "dimensionless",
+                                    "scalingType": "LENGTH"}, ...}}
+
+loading builds the ModelParameters directly from the stored values, without the
+setters of ModelParameterMapBuilder
+"""
+
+from __future__ import annotations
+
+import hashlib
+import importlib
+import json
+from typing import Dict
+
+import attr
+from pint.quantity import _Quantity
+from underworld.scaling import units as u
+
+from modelParameters._Model_parameter import ModelParameter
+from modelParameters._Model_parameter_builder import ModelParameterBuilder
+from modelParameters._Model_parameter_map import ModelParameterMap
+from modelParameters._scaling_coefficient_type import ScalingCoefficientType
+
+FORMAT_VERSION = 1
+# the parameter map of a run, kept in its output directory
+PARAMETER_MAP_FILE_NAME = "parameters.json"
+
+
+def _getParameterNames():
+    return [
+        field.name
+        for field in attr.fields(ModelParameterMap)
+        if field.init and field.name != "scalingCoefficient"
+    ]
+
+
+def _toNumber(magnitude):
+    # numpy scalars are written as python numbers, ints stay ints
+    return magnitude.item() if hasattr(magnitude, "item") else magnitude
+
+
+def _parameterToDict(parameter: ModelParameter) -> Dict:
+    scalingType = parameter.scalingType
+    return {
+        "magnitude": _toNumber(parameter.dimensionalValue.magnitude),
+        "units": str(parameter.dimensionalValue.units),
+        "nonDimensionalMagnitude": _toNumber(parameter.nonDimensionalValue.magnitude),
+        "nonDimensionalUnits": str(parameter.nonDimensionalValue.units),
+        "scalingType": None if scalingType is None else scalingType.name,
+    }
+
+
+def _parameterFromDict(values: Dict) -> ModelParameter:
+    scalingType = values["scalingType"]
+    return ModelParameter(
+        dimensionalValue=u.Quantity(values["magnitude"], values["units"]),
+        nonDimensionalValue=u.Quantity(
+            values["nonDimensionalMagnitude"], values["nonDimensionalUnits"]
+        ),
+        scalingType=(
+            None if scalingType is None else ScalingCoefficientType[scalingType]
+        ),
+    )
+
+
+def modelParameterMapToDict(parameterMap: ModelParameterMap) -> Dict:
+    scalingCoefficientClass = type(parameterMap.scalingCoefficient)
+    parameters = {}
+    for name in _getParameterNames():
+        parameter = getattr(parameterMap, name)
+        parameters[name] = None if parameter is None else _parameterToDict(parameter)
+    return {
+        "version": FORMAT_VERSION,
+        "scalingCoefficient": f"{scalingCoefficientClass.__module__}:"
+        f"{scalingCoefficientClass.__qualname__}",
+        "parameters": parameters,
+    }
+
+
+def modelParameterMapFromDict(data: Dict) -> ModelParameterMap:
+    if data["version"] != FORMAT_VERSION:
+        raise ValueError(f"unsupported parameter map version {data['version']}")
+    moduleName, className = data["scalingCoefficient"].split(":")
+    scalingCoefficientClass = getattr(importlib.import_module(moduleName), className)
+    parameters = {
+        name: _parameterFromDict(values)
+        for name, values in data["parameters"].items()
+        if values is not None
+    }
+    return ModelParameterMap(scalingCoefficient=scalingCoefficientClass(), **parameters)
+
+
+def dumpModelParameterMap(parameterMap: ModelParameterMap) -> str:
+    """
+    canonical json, equal maps give equal text
+    """
+    return json.dumps(
+        modelParameterMapToDict(parameterMap), sort_keys=True, separators=(",", ":")
+    )
+
+
+def loadModelParameterMap(text: str) -> ModelParameterMap:
+    return modelParameterMapFromDict(json.loads(text))
+
+
+def getModelParameterMapHash(parameterMap: ModelParameterMap) -> str:
+    return hashlib.blake2b(
+        dumpModelParameterMap(parameterMap).encode(), digest_size=16
+    ).hexdigest()
+
+
+def replaceDimensionalValues(
+    parameterMap: ModelParameterMap, values: Dict[str, _Quantity]
+) -> ModelParameterMap:
+    """
+    copy of the map with new dimensional values, non dimensionalised with the scaling
+    type recorded for each parameter
+    """
+    builder = ModelParameterBuilder(parameterMap.scalingCoefficient)
+    replaced = {}
+    for name, value in values.items():
+        parameter = getattr(parameterMap, name, None)
+        if name not in _getParameterNames() or parameter is None:
+            raise ValueError(f"{name = } is not a parameter of the map")
+        if parameter.scalingType in (None, ScalingCoefficientType.MANUAL):
+            raise ValueError(f"{name = } has no scaling type to rescale it with")
+        replaced[name] = builder.buildModelParameter(value, parameter.scalingType)
+    return attr.evolve(parameterMap, **replaced)
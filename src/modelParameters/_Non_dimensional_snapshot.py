@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Optional
+
+import attr
+
+from modelParameters._Scaling_coefficient import COEFFICIENT_NAMES
+
+if TYPE_CHECKING:
+    from modelParameters._Model_parameter_map import ModelParameterMap
+
+
+@attr.s(frozen=True, repr=True, slots=True, kw_only=True)
+class NonDimensionalSnapshot:
+    """
+    plain float copy of the non dimensional values of a ModelParameterMap and of its
+    scaling coefficients in SI base units, so the model does no pint arithmetic
+    """
+
+    temperatureContrast: float = attr.ib()
+    modelHeight: float = attr.ib()
+    modelLength: float = attr.ib()
+    referenceDensity: float = attr.ib()
+    gravitationalAcceleration: float = attr.ib()
+    referenceTemperature: float = attr.ib()
+    thermalExpansivity: float = attr.ib()
+    thermalDiffusivity: float = attr.ib()
+    referenceViscosity: float = attr.ib()
+    upperMantleViscosity: float = attr.ib()
+    lowerMantleViscosity: float = attr.ib()
+    spTopLayerViscosity: float = attr.ib()
+    spCoreLayerViscosity: float = attr.ib()
+    spBottomLayerViscosity: float = attr.ib()
+    yieldStressOfSpTopLayer: float = attr.ib()
+    gasConstant: float = attr.ib()
+    lowerMantleHeigth: float = attr.ib()
+    coreShearModulus: float = attr.ib()
+    deltaTime: float = attr.ib()
+    minimalStrainRate: float = attr.ib()
+    defaultStrainRate: float = attr.ib()
+    courantSafetyFactor: Optional[float] = attr.ib(default=None)
+    minimalDeltaTime: Optional[float] = attr.ib(default=None)
+    maximalDeltaTime: Optional[float] = attr.ib(default=None)
+
+    viscosityCoefficient: float = attr.ib()
+    stressCoefficient: float = attr.ib()
+    temperatureCoefficient: float = attr.ib()
+    lengthCoefficient: float = attr.ib()
+    gradientCoefficient: float = attr.ib()
+    velocityVectorCoefficient: float = attr.ib()
+    massCoefficient: float = attr.ib()
+    timeCoefficient: float = attr.ib()
+
+    def nonDimensionalLength(self, length) -> float:
+        """
+        param length: pint quantity of any length unit
+        """
+        return float(length.to("meter").magnitude) / self.lengthCoefficient
+
+
+def takeNonDimensionalSnapshot(
+    parameterMap: ModelParameterMap,
+) -> NonDimensionalSnapshot:
+    values = {}
+    for field in attr.fields(type(parameterMap)):
+        if field.name in ("scalingCoefficient", "nonDimensional"):
+            continue
+        parameter = getattr(parameterMap, field.name)
+        if parameter is not None:
+            values[field.name] = float(parameter.nonDimensionalValue.magnitude)
+
+    scalingCoefficient = parameterMap.scalingCoefficient
+    for name in COEFFICIENT_NAMES:
+        coefficient = getattr(scalingCoefficient, name)
+        values[name] = float(coefficient.to_base_units().magnitude)
+    return NonDimensionalSnapshot(**values)
@@ -1,4 +1,6 @@
+import inspect
 from abc import ABC, abstractmethod, abstractproperty
+from functools import cached_property
 from typing import List
 
 from pint.unit import _Unit
@@ -8,12 +10,44 @@ from UWGeodynamics import UnitRegistry
 from modelParameters._Model_parameter import ModelParameter
 from modelParameters._scaling_coefficient_type import ScalingCoefficientType
 
+COEFFICIENT_NAMES = (
+    "viscosityCoefficient",
+    "stressCoefficient",
+    "temperatureCoefficient",
+    "lengthCoefficient",
+    "gradientCoefficient",
+    "velocityVectorCoefficient",
+    "massCoefficient",
+    "timeCoefficient",
+)
+
 
 class ScalingCoefficient(ABC):
     """
     base class for setting and using the Scaling Coefficient algorithm
     """
 
+    def __init_subclass__(cls, memoizeCoefficients=True, **kwargs) -> None:
+        """
+        the coefficient properties of subclasses and the dispatch table of
+        nonDimensionalizeUnit are computed once per instance, the pint arithmetic
+        of the derived coefficients is not repeated on every access.
+        memoizeCoefficients=False keeps recomputing them, e.g. for benchmarks
+        """
+        super().__init_subclass__(**kwargs)
+        for name in COEFFICIENT_NAMES + ("_functionToCoefficientEnumMapper",):
+            attribute = inspect.getattr_static(cls, name)
+            if isinstance(attribute, property):
+                function = attribute.fget
+            else:
+                function = attribute.func
+            if memoizeCoefficients:
+                wrapper = cached_property(function)
+                wrapper.__set_name__(cls, name)
+            else:
+                wrapper = property(function)
+            setattr(cls, name, wrapper)
+
     def __init__(self) -> None:
         self._setUnderWorldScalingFactors()
 
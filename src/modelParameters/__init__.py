@@ -1,5 +1,13 @@
 from ._Model_parameter_builder import ModelParameterBuilder
 from ._Model_parameter_map import ModelParameterMap
 from ._Model_parameter_map_builder import ModelParameterMapBuilder
+from ._Model_parameter_map_serialization import (
+    PARAMETER_MAP_FILE_NAME,
+    dumpModelParameterMap,
+    getModelParameterMapHash,
+    loadModelParameterMap,
+    replaceDimensionalValues,
+)
+from ._Non_dimensional_snapshot import NonDimensionalSnapshot
 from ._Scaling_coefficient import ScalingCoefficient
 from ._scaling_coefficient_type import ScalingCoefficientType
@@ -0,0 +1,234 @@
+"""
+renders figures of saved checkpoints without building a SubductionModel, the
+fields are read with h5py, the derived fields computed with numpy and every
+step is rendered by its own worker process. The viscosity parameters come from
+the parameters.json the model saved in the output directory, or --parameters
+
+python src/postProcess.py ./output/test2 --first 0 --last 500 --processes 8
+"""
+
+import argparse
+import os
+from functools import partial
+from multiprocessing import get_context
+from typing import List
+
+import attr
+import matplotlib
+
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import numpy as np
+from matplotlib.colors import LogNorm
+
+from ConsolidatedCheckPoint import (
+    findConsolidatedSteps,
+    getConsolidatedFileName,
+    readMeshGeometry,
+    readMeshVariable,
+    readSwarmCoordinates,
+    readSwarmVariable,
+    readTime,
+)
+from DerivedFields import (
+    ViscosityParameters,
+    computeParticleFields,
+    getViscosityParameters,
+)
+from LegacyCheckPoint import (
+    SECONDS_PER_YEAR,
+    findUsableLegacySteps,
+    getStepDirectoryName,
+    readLegacyDataset,
+    readLegacyTime,
+)
+
+
+@attr.s(frozen=True, repr=True, slots=True, kw_only=True)
+class StepFields:
+    step: int = attr.ib()
+    time: float = attr.ib()
+    coordinates: np.ndarray = attr.ib(repr=False)
+    materials: np.ndarray = attr.ib(repr=False)
+    velocity: np.ndarray = attr.ib(repr=False)
+    temperature: np.ndarray = attr.ib(repr=False)
+    resolution: tuple = attr.ib()
+    minCoord: tuple = attr.ib()
+    maxCoord: tuple = attr.ib()
+
+
+def readStepFields(outputPath: str, step: int) -> StepFields:
+    consolidatedPath = os.path.join(outputPath, getConsolidatedFileName(step))
+    if os.path.isfile(consolidatedPath):
+        resolution, minCoord, maxCoord = readMeshGeometry(consolidatedPath)
+        return StepFields(
+            step=step,
+            time=readTime(consolidatedPath),
+            coordinates=readSwarmCoordinates(consolidatedPath),
+            materials=readSwarmVariable(consolidatedPath, "materialVariable"),
+            velocity=readMeshVariable(consolidatedPath, "velocityField")[0],
+            temperature=readMeshVariable(consolidatedPath, "temperatureField")[0],
+            resolution=resolution,
+            minCoord=minCoord,
+            maxCoord=maxCoord,
+        )
+
+    stepOutputPath = os.path.join(outputPath, getStepDirectoryName(step))
+    h5Path = os.path.join(stepOutputPath, "h5")
+    velocity, attrs = readLegacyDataset(os.path.join(h5Path, "velocityField.h5"))
+    return StepFields(
+        step=step,
+        time=readLegacyTime(stepOutputPath),
+        coordinates=readLegacyDataset(os.path.join(h5Path, "swarm.h5"))[0],
+        materials=readLegacyDataset(os.path.join(h5Path, "materialVariable.h5"))[0],
+        velocity=velocity,
+        temperature=readLegacyDataset(os.path.join(h5Path, "temperatureField.h5"))[0],
+        resolution=tuple(int(n) for n in attrs["mesh resolution"]),
+        minCoord=tuple(float(c) for c in attrs["min"]),
+        maxCoord=tuple(float(c) for c in attrs["max"]),
+    )
+
+
+def _getExtent(fields: StepFields):
+    return (
+        fields.minCoord[0],
+        fields.maxCoord[0],
+        fields.minCoord[1],
+        fields.maxCoord[1],
+    )
+
+
+def _scatter(ax, fields: StepFields, values, logScale=False, cmap="viridis"):
+    x, y = fields.coordinates[:, 0], fields.coordinates[:, 1]
+    norm = LogNorm() if logScale else None
+    return ax.scatter(x, y, c=np.ravel(values), s=0.2, cmap=cmap, norm=norm)
+
+
+def _image(ax, fields: StepFields, values, shape, logScale=False):
+    norm = LogNorm() if logScale else None
+    return ax.imshow(
+        values.reshape(shape),
+        origin="lower",
+        extent=_getExtent(fields),
+        norm=norm,
+        aspect="auto",
+    )
+
+
+def _save(fig, ax, artist, title, path):
+    ax.set_title(title)
+    ax.set_aspect("equal")
+    if artist is not None:
+        fig.colorbar(artist, ax=ax, shrink=0.6)
+    fig.savefig(path, dpi=150, bbox_inches="tight")
+    plt.close(fig)
+
+
+def renderStep(
+    outputPath: str, figurePath: str, parameters: ViscosityParameters, step: int
+) -> List[str]:
+    """
+    writes the figures of one step to figurePath as NNNNN_<figure>.png
+    """
+    fields = readStepFields(outputPath, step)
+    strainRate, viscosity, stressInvariant = computeParticleFields(
+        fields.coordinates,
+        fields.materials,
+        fields.velocity,
+        fields.resolution,
+        fields.minCoord,
+        fields.maxCoord,
+        parameters,
+        solutionExists=step > 0,
+    )
+    nx, ny = fields.resolution
+    timeYears = fields.time / SECONDS_PER_YEAR
+    paths = []
+
+    def newFigure(name):
+        paths.append(
+            os.path.join(figurePath, f"{getStepDirectoryName(step)}_{name}.png")
+        )
+        return plt.subplots(figsize=(12, 4))
+
+    fig, ax = newFigure("particles")
+    _scatter(ax, fields, fields.materials, cmap="tab10")
+    _save(fig, ax, None, f"particles {timeYears:.3e} yrs", paths[-1])
+
+    fig, ax = newFigure("viscosity")
+    artist = _scatter(ax, fields, viscosity, logScale=True)
+    _save(fig, ax, artist, f"viscosity {timeYears:.3e} yrs", paths[-1])
+
+    fig, ax = newFigure("strainRate")
+    artist = _image(ax, fields, strainRate, (ny, nx), logScale=True)
+    _save(fig, ax, artist, f"strain rate 2nd invariant {timeYears:.3e} yrs", paths[-1])
+
+    fig, ax = newFigure("stress")
+    artist = _scatter(ax, fields, stressInvariant)
+    _save(fig, ax, artist, f"stress 2nd invariant {timeYears:.3e} yrs", paths[-1])
+
+    fig, ax = newFigure("temperature")
+    artist = _image(ax, fields, fields.temperature, (ny + 1, nx + 1))
+    _save(fig, ax, artist, f"temperature {timeYears:.3e} yrs", paths[-1])
+
+    fig, ax = newFigure("velocity")
+    artist = _scatter(ax, fields, viscosity, logScale=True)
+    xs = np.linspace(fields.minCoord[0], fields.maxCoord[0], nx + 1)
+    ys = np.linspace(fields.minCoord[1], fields.maxCoord[1], ny + 1)
+    stride = max(1, nx // 40)
+    velocity = fields.velocity.reshape(ny + 1, nx + 1, 2)[::stride, ::stride]
+    ax.quiver(xs[::stride], ys[::stride], velocity[..., 0], velocity[..., 1])
+    _save(fig, ax, artist, f"velocity {timeYears:.3e} yrs", paths[-1])
+    return paths
+
+
+def postProcess(
+    outputPath: str,
+    parameters: ViscosityParameters,
+    first: int = 0,
+    last: int = None,
+    processes: int = None,
+) -> List[str]:
+    def inRange(step):
+        return step >= first and (last is None or step <= last)
+
+    steps = set(findUsableLegacySteps(outputPath))
+    steps.update(findConsolidatedSteps(outputPath))
+    steps = sorted(filter(inRange, steps))
+    figurePath = os.path.join(outputPath, "figures")
+    os.makedirs(figurePath, exist_ok=True)
+
+    render = partial(renderStep, outputPath, figurePath, parameters)
+    # spawned workers only import this module, not underworld and its MPI state
+    with get_context("spawn").Pool(processes) as pool:
+        stepPaths = pool.map(render, steps)
+    return [path for paths in stepPaths for path in paths]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("outputPath")
+    parser.add_argument("--first", type=int, default=0)
+    parser.add_argument("--last", type=int, default=None)
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument(
+        "--parameters",
+        default=None,
+        help="parameter map json of the run, by default the one the run saved",
+    )
+    args = parser.parse_args()
+
+    # the parameter map needs underworld, only the main process loads it
+    from modelParameters import PARAMETER_MAP_FILE_NAME, loadModelParameterMap
+
+    parameterMapPath = args.parameters
+    if parameterMapPath is None:
+        parameterMapPath = os.path.join(args.outputPath, PARAMETER_MAP_FILE_NAME)
+    if not os.path.isfile(parameterMapPath):
+        parser.error(f"no parameter map at {parameterMapPath}, pass --parameters")
+    with open(parameterMapPath, "r") as f:
+        parameters = getViscosityParameters(loadModelParameterMap(f.read()))
+    paths = postProcess(
+        args.outputPath, parameters, args.first, args.last, args.processes
+    )
+    print(f"wrote {len(paths)} figures to {os.path.join(args.outputPath, 'figures')}")
@@ -54,8 +54,12 @@ class Strak2021ScalingCoefficient(ScalingCoefficient):
         return visK / lens2
 
 
-def get_Strak_2021_model_parameter_map(blueprint=False) -> ModelParameterMap:
-    modelParameterBuilder = ModelParameterBuilder(Strak2021ScalingCoefficient())
+def get_Strak_2021_model_parameter_map(
+    blueprint=False, scalingCoefficient: ScalingCoefficient = None
+) -> ModelParameterMap:
+    if scalingCoefficient is None:
+        scalingCoefficient = Strak2021ScalingCoefficient()
+    modelParameterBuilder = ModelParameterBuilder(scalingCoefficient)
     builder = ModelParameterMapBuilder(modelParameterBuilder)
 
     StrakParameterDao = (
@@ -101,6 +105,13 @@ def get_Strak_2021_model_parameter_map(blueprint=False) -> ModelParameterMap:
         .setTemperatureContrast(1573.15 * u.kelvin, ScalingCoefficientType.TEMPERATURE)
         .setMinimalStrainRate(1e-20 / u.second, ScalingCoefficientType.NONE)
         .setDefaultStrainRate(1e-15 / u.second, ScalingCoefficientType.NONE)
+        .setCourantSafetyFactor(u.Quantity(0.5))
+        .setMinimalDeltaTime(
+            (1e3 * u.years).to_base_units(), ScalingCoefficientType.TIME
+        )
+        .setMaximalDeltaTime(
+            (1e5 * u.years).to_base_units(), ScalingCoefficientType.TIME
+        )
     )
     if blueprint:
         return StrakParameterDao.createBluePrint()
@@ -0,0 +1,104 @@
+"""
+runs one member of a ParameterSweep, started by the sweep as
+
+mpirun -np 4 python src/sweepMember.py output/sweeps/<sweep>/<run>.json
+
+and writes output/<run>/result.json once the run is finished, the parameter map of
+the run is kept next to it as output/<run>/parameters.json
+"""
+
+import json
+import math
+import sys
+from time import time
+
+from underworld import mpi
+from underworld.scaling import units as u
+
+from modelParameters import (
+    ModelParameterMap,
+    getModelParameterMapHash,
+    loadModelParameterMap,
+    replaceDimensionalValues,
+)
+from ParameterSweep import RESULT_FILE_NAME
+from PlatePolygons import SubductionZonePolygons
+from strakParam import get_Strak_2021_model_parameter_map
+from SubductionModel import SubductionModel
+
+# the arguments of main.py, lengths in meters
+POLYGON_DEFAULTS = {
+    "dip": 27,
+    "dipLength": 200e3,
+    "plateLength": 6000e3,
+    "upperPlateThickness": 30e3,
+    "middlePlateThickness": 20e3,
+    "lowerPlateThickness": 30e3,
+    "beginning": 100e3,
+}
+
+
+def buildParameterMap(
+    overrides: dict, parameterMapPath: str = None
+) -> ModelParameterMap:
+    """
+    the parameter map saved at parameterMapPath, or the Strak parameter map, with
+    overrides given in the units of its parameters
+    """
+    if parameterMapPath is None:
+        parameterMap = get_Strak_2021_model_parameter_map()
+    else:
+        with open(parameterMapPath, "r") as f:
+            parameterMap = loadModelParameterMap(f.read())
+
+    values = {}
+    for name, value in overrides.items():
+        parameter = getattr(parameterMap, name, None)
+        if parameter is None:
+            raise ValueError(f"{name = } can not be varied by a sweep")
+        values[name] = value * parameter.dimensionalValue.units
+    return replaceDimensionalValues(parameterMap, values)
+
+
+def buildPolygons(parameterMap: ModelParameterMap, values: dict):
+    values = {**POLYGON_DEFAULTS, **values}
+    lengths = {name: value * u.meter for name, value in values.items() if name != "dip"}
+    return SubductionZonePolygons(parameterMap, values["dip"], **lengths)
+
+
+def runMember(runSpec: dict):
+    startTime = time()
+    parameterMap = buildParameterMap(runSpec["parameters"], runSpec.get("parameterMap"))
+    modelSettings = dict(runSpec["model"])
+    modelSettings["resolution"] = tuple(modelSettings["resolution"])
+    # a member killed by the batch system continues where it stopped
+    modelSettings.setdefault("autoRestart", True)
+    model = SubductionModel(
+        name=runSpec["name"],
+        modelParameterMap=parameterMap,
+        subductionZonePolygons=buildPolygons(parameterMap, runSpec["polygons"]),
+        **modelSettings,
+    )
+    model.run()
+
+    if mpi.rank == 0 and model.isFinished():
+        slabDip = math.nan
+        if model.slabDip is not None:
+            slabDip = model.slabDip.representativeDip
+        result = {
+            "slabDip": float(slabDip),
+            "parameterHash": getModelParameterMapHash(parameterMap),
+            "finalStep": model.currentStep,
+            "finalTime": model.currentTime,
+            "wallTime": time() - startTime,
+            "diagnostics": {
+                name: float(value) for name, value in model.lastDiagnostics.items()
+            },
+        }
+        with open(model.outputPath + "/" + RESULT_FILE_NAME, "w") as f:
+            json.dump(result, f, indent=4)
+
+
+if __name__ == "__main__":
+    with open(sys.argv[1], "r") as f:
+        runMember(json.load(f))
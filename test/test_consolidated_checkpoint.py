@@ -0,0 +1,275 @@
+import json
+import os
+from xml.etree import ElementTree
+
+import attr
+import h5py
+import numpy as np
+from CheckPointSnapshot import CheckPointSnapshot
+from ConsolidatedCheckPoint import (
+    interpolateMeshVariable,
+    readMeshGeometry,
+    readMeshVariable,
+    readSwarmCoordinates,
+    readSwarmVariable,
+    readTime,
+    writeConsolidatedCheckPoint,
+    writeConsolidatedIndex,
+)
+from DerivedFields import ViscosityParameters
+from generateXdmf import generateXdmf
+from LegacyCheckPoint import (
+    findLegacySteps,
+    findUsableLegacySteps,
+    readLegacyMeshGeometry,
+)
+from migrateCheckPoints import migrateStep
+from postProcess import postProcess
+
+
+def _getSnapshot():
+    rng = np.random.default_rng(0)
+    return CheckPointSnapshot(
+        step=3,
+        time=1.5e12,
+        swarmCoordinates=rng.uniform(size=(50, 2)),
+        swarmVariables={"materialVariable": rng.integers(0, 4, size=(50, 1))},
+        meshVariables={
+            "temperatureField": rng.uniform(size=(12, 1)),
+            "pressureField": rng.uniform(size=(6, 1)),
+        },
+        meshResolution=(3, 2),
+        minCoord=(0.0, 0.0),
+        maxCoord=(3.0, 1.0),
+        elementTypes={"temperatureField": "Q1", "pressureField": "DQ0"},
+    )
+
+
+def test_consolidated_round_trip(tmp_path):
+    snapshot = _getSnapshot()
+    path = str(tmp_path / "00003.h5")
+    writeConsolidatedCheckPoint(path, snapshot, compression="gzip")
+
+    assert os.listdir(tmp_path) == ["00003.h5"]
+    assert readTime(path) == snapshot.time
+    assert np.array_equal(readSwarmCoordinates(path), snapshot.swarmCoordinates)
+    assert np.array_equal(
+        readSwarmVariable(path, "materialVariable"),
+        snapshot.swarmVariables["materialVariable"],
+    )
+    assert readMeshGeometry(path) == ((3, 2), (0.0, 0.0), (3.0, 1.0))
+    data, elementType = readMeshVariable(path, "pressureField")
+    assert elementType == "DQ0"
+    assert np.array_equal(data, snapshot.meshVariables["pressureField"])
+
+
+def _splitSnapshot(snapshot, ranks=2):
+    """
+    the parts of the ranks of a parallel run, neighbouring ranks share mesh nodes
+    """
+    parts = []
+    particleParts = np.array_split(np.arange(len(snapshot.swarmCoordinates)), ranks)
+    for rank, particles in enumerate(particleParts):
+        meshVariables, meshGlobalIds = {}, {}
+        for name, data in snapshot.meshVariables.items():
+            half = len(data) // 2
+            ids = (
+                np.arange(len(data))[: half + 1]
+                if rank == 0
+                else np.arange(half, len(data))
+            )
+            meshVariables[name] = data[ids]
+            meshGlobalIds[name] = ids
+        parts.append(
+            attr.evolve(
+                snapshot,
+                swarmCoordinates=snapshot.swarmCoordinates[particles],
+                swarmVariables={
+                    name: data[particles]
+                    for name, data in snapshot.swarmVariables.items()
+                },
+                meshVariables=meshVariables,
+                meshGlobalIds=meshGlobalIds,
+                rank=rank,
+                ranks=ranks,
+            )
+        )
+    return parts
+
+
+def test_parallel_parts_round_trip(tmp_path):
+    snapshot = _getSnapshot()
+    path = str(tmp_path / "00003.h5")
+    for part in _splitSnapshot(snapshot):
+        writeConsolidatedCheckPoint(path, part)
+    assert not os.path.exists(path)
+    writeConsolidatedIndex(path, part)
+
+    assert sorted(os.listdir(tmp_path)) == [
+        "00003.h5",
+        "00003.rank00000.h5",
+        "00003.rank00001.h5",
+    ]
+    assert readTime(path) == snapshot.time
+    assert readMeshGeometry(path) == ((3, 2), (0.0, 0.0), (3.0, 1.0))
+    assert np.array_equal(readSwarmCoordinates(path), snapshot.swarmCoordinates)
+    assert np.array_equal(
+        readSwarmVariable(path, "materialVariable"),
+        snapshot.swarmVariables["materialVariable"],
+    )
+    for name in ("temperatureField", "pressureField"):
+        data, _ = readMeshVariable(path, name)
+        assert np.array_equal(data, snapshot.meshVariables[name])
+
+    generateXdmf(str(tmp_path))
+    root = ElementTree.parse(tmp_path / "00003.xdmf").getroot()
+    names = {grid.get("Name") for grid in root.iter("Grid")}
+    assert names == {"mesh", "swarm", "swarm0", "swarm1"}
+
+
+def test_interpolate_mesh_variable():
+    # linear field on a 3x2 Q1 mesh is reproduced exactly by bilinear interpolation
+    xs, ys = np.meshgrid(np.linspace(0.0, 3.0, 4), np.linspace(0.0, 1.0, 3))
+    nodal = (2.0 * xs + ys).reshape(-1, 1)
+    points = np.array([(0.5, 0.25), (2.9, 0.9), (3.0, 1.0)])
+    values = interpolateMeshVariable(nodal, "Q1", (3, 2), (0, 0), (3, 1), points)
+    assert np.allclose(values[:, 0], 2.0 * points[:, 0] + points[:, 1])
+
+    cells = np.arange(6.0).reshape(-1, 1)
+    values = interpolateMeshVariable(cells, "DQ0", (3, 2), (0, 0), (3, 1), points)
+    assert values[:, 0].tolist() == [0.0, 5.0, 5.0]
+
+
+def _writeLegacyStep(outputPath, step, snapshot):
+    """
+    a step as written before the complete marker existed
+    """
+    stepOutputPath = outputPath / str(step).zfill(5)
+    h5Path = stepOutputPath / "h5"
+    os.makedirs(h5Path)
+    with open(stepOutputPath / "time.json", "w") as f:
+        json.dump({"time": "4.753e+04 yrs"}, f)
+    with h5py.File(h5Path / "swarm.h5", "w") as f:
+        f["data"] = snapshot.swarmCoordinates
+    for name in ("materialVariable", "previousStress"):
+        with h5py.File(h5Path / (name + ".h5"), "w") as f:
+            f["data"] = snapshot.swarmVariables["materialVariable"]
+    for name in (
+        "temperatureDotField",
+        "velocityField",
+        "pressureField",
+        "temperatureField",
+    ):
+        with h5py.File(h5Path / (name + ".h5"), "w") as f:
+            f["data"] = snapshot.meshVariables["temperatureField"]
+            f.attrs["mesh resolution"] = (3, 2)
+            f.attrs["min"] = (0.0, 0.0)
+            f.attrs["max"] = (3.0, 1.0)
+            f.attrs["elementType"] = "Q1"
+    return h5Path
+
+
+def test_migrate_legacy_step(tmp_path):
+    snapshot = _getSnapshot()
+    h5Path = _writeLegacyStep(tmp_path, 3, snapshot)
+
+    geometry = readLegacyMeshGeometry(str(h5Path / "velocityField.h5"))
+    assert geometry == ((3, 2), (0.0, 0.0), (3.0, 1.0))
+    migrateStep(str(tmp_path), 3)
+
+    path = str(tmp_path / "00003.h5")
+    assert np.isclose(readTime(path), 4.753e4 * 31556952)
+    assert np.array_equal(readSwarmCoordinates(path), snapshot.swarmCoordinates)
+    data, _ = readMeshVariable(path, "velocityField")
+    assert np.array_equal(data, snapshot.meshVariables["temperatureField"])
+
+
+def test_generate_consolidated_xdmf(tmp_path):
+    writeConsolidatedCheckPoint(str(tmp_path / "00003.h5"), _getSnapshot())
+    generateXdmf(str(tmp_path))
+
+    root = ElementTree.parse(tmp_path / "00003.xdmf").getroot()
+    grids = {grid.get("Name"): grid for grid in root.iter("Grid")}
+    assert set(grids) == {"mesh", "swarm"}
+    centers = {a.get("Name"): a.get("Center") for a in grids["mesh"].iter("Attribute")}
+    assert centers == {"pressureField": "Cell", "temperatureField": "Node"}
+
+
+def test_incremental_checkpoint_references(tmp_path):
+    snapshot = _getSnapshot()
+    writeConsolidatedCheckPoint(str(tmp_path / "00003.h5"), snapshot)
+    changed = snapshot.meshVariables["temperatureField"] + 1.0
+    incremental = attr.evolve(
+        snapshot,
+        step=4,
+        meshVariables={**snapshot.meshVariables, "temperatureField": changed},
+    )
+    path = str(tmp_path / "00004.h5")
+    writeConsolidatedCheckPoint(
+        path,
+        incremental,
+        references={
+            "swarm": {"coordinates": 3, "materialVariable": 3},
+            "mesh": {"pressureField": 3},
+        },
+    )
+
+    with h5py.File(path, "r") as f:
+        assert list(f["swarm"]) == []
+        assert list(f["mesh"]) == ["temperatureField"]
+    assert np.array_equal(readSwarmCoordinates(path), snapshot.swarmCoordinates)
+    data, elementType = readMeshVariable(path, "pressureField")
+    assert elementType == "DQ0"
+    assert np.array_equal(data, snapshot.meshVariables["pressureField"])
+    data, _ = readMeshVariable(path, "temperatureField")
+    assert np.array_equal(data, changed)
+
+    generateXdmf(str(tmp_path))
+    root = ElementTree.parse(tmp_path / "00004.xdmf").getroot()
+    references = {item.text.split(":")[0] for item in root.iter("DataItem")}
+    assert {"00003.h5", "00004.h5"} <= references
+
+
+def test_find_complete_legacy_steps(tmp_path):
+    for step in (1, 2):
+        os.makedirs(tmp_path / str(step).zfill(5) / "h5")
+    (tmp_path / "00001" / "complete").write_text("1\n")
+
+    assert findLegacySteps(str(tmp_path)) == [1, 2]
+    assert findLegacySteps(str(tmp_path), completeOnly=True) == [1]
+
+
+def test_find_usable_legacy_steps_without_marker(tmp_path):
+    snapshot = _getSnapshot()
+    for step in (1, 2, 3):
+        _writeLegacyStep(tmp_path, step, snapshot)
+    # interrupted writes, a truncated file and a missing one
+    (tmp_path / "00002" / "h5" / "velocityField.h5").write_bytes(b"\x89HDF")
+    os.remove(tmp_path / "00003" / "time.json")
+
+    assert findUsableLegacySteps(str(tmp_path)) == [1]
+
+
+def test_post_process_renders_steps(tmp_path):
+    snapshot = _getSnapshot()
+    velocity = np.random.default_rng(1).uniform(size=(12, 2))
+    snapshot = attr.evolve(
+        snapshot,
+        meshVariables={**snapshot.meshVariables, "velocityField": velocity},
+        elementTypes={**snapshot.elementTypes, "velocityField": "Q1"},
+    )
+    writeConsolidatedCheckPoint(str(tmp_path / "00003.h5"), snapshot)
+
+    parameters = ViscosityParameters(
+        upperMantleViscosity=1.0,
+        spTopLayerViscosity=1e3,
+        spCoreLayerViscosity=1e2,
+        spBottomLayerViscosity=10.0,
+        yieldStressOfSpTopLayer=2.0,
+        minimalStrainRate=1e-3,
+        defaultStrainRate=1e-2,
+        weakeningDepth=0.5,
+    )
+    paths = postProcess(str(tmp_path), parameters, processes=1)
+    assert len(paths) == 6
+    assert all(os.path.isfile(path) for path in paths)
@@ -0,0 +1,39 @@
+import numpy as np
+from DerivedFieldCache import DerivedFieldCache
+
+
+class _CountingFunction:
+    def __init__(self):
+        self.calls = 0
+
+    def evaluate(self, target):
+        self.calls += 1
+        return np.full((4, 1), float(self.calls))
+
+
+def test_derived_field_cache_evaluates_once_per_step():
+    cache = DerivedFieldCache()
+    function = _CountingFunction()
+    swarm = object()
+
+    first = cache.evaluate("viscosity", function, swarm)
+    assert cache.evaluate("viscosity", function, swarm) is first
+    assert function.calls == 1
+
+    cache.invalidate()
+    second = cache.evaluate("viscosity", function, swarm)
+    assert function.calls == 2
+    assert np.all(second == 2.0) and np.all(first == 1.0)
+
+
+def test_derived_field_cache_keys_on_function_and_target():
+    cache = DerivedFieldCache()
+    function, otherFunction = _CountingFunction(), _CountingFunction()
+    swarm, otherSwarm = object(), object()
+
+    first = cache.evaluate("viscosity", function, swarm)
+    assert cache.evaluate("viscosity", otherFunction, swarm) is not first
+    assert cache.evaluate("viscosity", function, otherSwarm) is not first
+    assert (function.calls, otherFunction.calls) == (2, 1)
+    assert cache.evaluate("viscosity", function, swarm) is first
+    assert function.calls == 2
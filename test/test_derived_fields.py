@@ -0,0 +1,44 @@
+import numpy as np
+from DerivedFields import (
+    LOWER_SLAB_INDEX,
+    UPPER_MANTLE_INDEX,
+    UPPER_SLAB_INDEX,
+    ViscosityParameters,
+    particleViscosity,
+    secondInvariant,
+    strainRateTensor,
+)
+
+
+def _getParameters():
+    return ViscosityParameters(
+        upperMantleViscosity=1.0,
+        spTopLayerViscosity=1e3,
+        spCoreLayerViscosity=1e2,
+        spBottomLayerViscosity=10.04,
+        yieldStressOfSpTopLayer=2.0,
+        minimalStrainRate=1e-3,
+        defaultStrainRate=1e-2,
+        weakeningDepth=0.5,
+    )
+
+
+def test_strain_rate_of_linear_velocity():
+    # v = (x + 2y, 4x - y) gives exx = 1, eyy = -1, exy = 3 everywhere
+    xs, ys = np.meshgrid(np.linspace(0.0, 3.0, 4), np.linspace(0.0, 1.0, 3))
+    velocity = np.stack([xs + 2.0 * ys, 4.0 * xs - ys], axis=-1).reshape(-1, 2)
+    tensor = strainRateTensor(velocity, (3, 2), (0.0, 0.0), (3.0, 1.0))
+    assert tensor.shape == (6, 3)
+    assert np.allclose(tensor, [1.0, -1.0, 3.0])
+    assert np.allclose(secondInvariant(tensor), np.sqrt(0.5 * (1.0 + 1.0 + 18.0)))
+
+
+def test_particle_viscosity():
+    materials = np.array(
+        [UPPER_MANTLE_INDEX, LOWER_SLAB_INDEX, UPPER_SLAB_INDEX, UPPER_SLAB_INDEX]
+    )
+    depths = np.array([0.1, 0.1, 0.1, 0.9])
+    strainRate = np.full(4, 0.1)
+    viscosity = particleViscosity(materials, depths, strainRate, _getParameters())
+    # yielding top layer 0.5 * 2 / 0.1, weakened below the weakening depth
+    assert viscosity.tolist() == [1.0, 10.0, 10.0, 50.0]
@@ -0,0 +1,28 @@
+import csv
+
+from DiagnosticsWriter import DiagnosticsWriter
+
+
+def _readRows(path):
+    with open(path, newline="") as f:
+        return list(csv.DictReader(f))
+
+
+def test_diagnostics_batches_and_restart(tmp_path):
+    path = str(tmp_path / "diagnostics.csv")
+    writer = DiagnosticsWriter(path, ["Vrms"], flushEvery=3)
+    for step in range(5):
+        writer.record(step, step * 10.0, {"Vrms": step / 10})
+        if step == 1:
+            assert _readRows(path) == []
+    assert [row["step"] for row in _readRows(path)] == ["0", "1", "2"]
+    writer.flush()
+    assert len(_readRows(path)) == 5
+
+    # a restart from step 3 drops the rows it is going to record again
+    writer = DiagnosticsWriter(path, ["Vrms"], flushEvery=3, startStep=3)
+    writer.record(3, 30.0, {"Vrms": 1.0})
+    writer.flush()
+    rows = _readRows(path)
+    assert [row["step"] for row in rows] == ["0", "1", "2", "3"]
+    assert rows[-1]["Vrms"] == "1.0"
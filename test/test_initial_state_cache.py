@@ -0,0 +1,109 @@
+import os
+
+import attr
+import numpy as np
+import pytest
+from CheckPointSnapshot import CheckPointSnapshot
+from ConsolidatedCheckPoint import (
+    readMeshVariable,
+    readSwarmCoordinates,
+    readSwarmVariable,
+)
+from InitialStateCache import InitialStateCache, getInitialStateKey
+
+
+def _getSnapshot(particles=50):
+    rng = np.random.default_rng(0)
+    return CheckPointSnapshot(
+        step=0,
+        time=0.0,
+        swarmCoordinates=rng.uniform(size=(particles, 2)),
+        swarmVariables={"materialVariable": rng.integers(0, 4, size=(particles, 1))},
+        meshVariables={"temperatureField": rng.uniform(size=(12, 1))},
+        meshResolution=(3, 2),
+        minCoord=(0.0, 0.0),
+        maxCoord=(3.0, 1.0),
+        elementTypes={"temperatureField": "Q1"},
+    )
+
+
+def test_initial_state_key():
+    shape = np.array([[0.0, 1.0], [0.5, 0.8], [1.0, 1.0]])
+    settings = {"resolution": [3, 2], "initialTemperature": "halfSpace"}
+    key = getInitialStateKey(settings, {"slabUpperShape": shape})
+
+    assert key == getInitialStateKey(dict(settings), {"slabUpperShape": shape.copy()})
+    assert key != getInitialStateKey(settings, {"slabUpperShape": shape * 1.01})
+    assert key != getInitialStateKey(
+        {**settings, "resolution": [4, 2]}, {"slabUpperShape": shape}
+    )
+
+
+def test_store_and_lookup(tmp_path):
+    cache = InitialStateCache(str(tmp_path))
+    assert cache.lookup("a") is None
+
+    snapshot = _getSnapshot()
+    path = cache.store("a", snapshot)
+    assert cache.lookup("a") == path
+    assert os.listdir(tmp_path) == ["a.h5"]
+    assert np.array_equal(
+        readSwarmVariable(path, "materialVariable"),
+        snapshot.swarmVariables["materialVariable"],
+    )
+    temperature, _ = readMeshVariable(path, "temperatureField")
+    assert np.array_equal(temperature, snapshot.meshVariables["temperatureField"])
+
+
+def test_least_recently_used_state_is_evicted(tmp_path):
+    cache = InitialStateCache(str(tmp_path))
+    for key, age in (("a", 300), ("b", 200)):
+        path = cache.store(key, _getSnapshot())
+        mtime = os.path.getmtime(path) - age
+        os.utime(path, (mtime, mtime))
+    entrySize = os.path.getsize(cache.getPath("a"))
+    cache.lookup("a")
+
+    cache.maxBytes = int(2.5 * entrySize)
+    cache.store("c", _getSnapshot())
+    assert sorted(os.listdir(tmp_path)) == ["a.h5", "c.h5"]
+
+
+def test_parallel_state_is_found_once_indexed(tmp_path):
+    cache = InitialStateCache(str(tmp_path))
+    snapshot = _getSnapshot()
+    parts = [
+        attr.evolve(
+            snapshot,
+            swarmCoordinates=snapshot.swarmCoordinates[rank::2],
+            swarmVariables={
+                "materialVariable": snapshot.swarmVariables["materialVariable"][rank::2]
+            },
+            meshGlobalIds={"temperatureField": np.arange(12)},
+            rank=rank,
+            ranks=2,
+        )
+        for rank in range(2)
+    ]
+    for part in parts:
+        cache.store("a", part)
+    assert cache.lookup("a") is None
+    cache.storeIndex("a", parts[0])
+    path = cache.lookup("a")
+    assert path == cache.getPath("a")
+    assert len(readSwarmCoordinates(path)) == len(snapshot.swarmCoordinates)
+
+    cache.maxBytes = 1
+    cache.store("b", _getSnapshot())
+    assert os.listdir(tmp_path) == ["b.h5"]
+
+
+def test_evicted_state_is_unreadable(tmp_path):
+    # SubductionModel rebuilds the state when reading raises OSError
+    cache = InitialStateCache(str(tmp_path))
+    path = cache.store("a", _getSnapshot())
+    assert cache.lookup("a") == path
+    cache.maxBytes = 1
+    cache.store("b", _getSnapshot())
+    with pytest.raises(OSError):
+        readSwarmCoordinates(path)
@@ -0,0 +1,25 @@
+import numpy as np
+from InitialTemperature import PLATE_BASE_TEMPERATURE, halfSpaceCoolingTemperature
+
+
+def test_half_space_cooling_profile():
+    # horizontal plate from x = 0 to x = 2 bending down at 45 degrees
+    surface = np.array([(0.0, 1.0), (2.0, 1.0), (3.0, 0.0)])
+    thickness = 0.1
+    offset = thickness / np.sqrt(2.0)
+    points = np.array(
+        [
+            (1.0, 1.0),  # plate surface
+            (1.0, 0.9),  # plate base
+            (1.0, 0.2),  # deep below the plate
+            (3.5, 0.9),  # mantle wedge above the slab
+            (2.5 - offset, 0.5 - offset),  # dipping slab, one thickness deep
+        ]
+    )
+    temperature = halfSpaceCoolingTemperature(points, surface, thickness)
+
+    assert np.isclose(temperature[0], 0.0)
+    assert np.isclose(temperature[1], PLATE_BASE_TEMPERATURE)
+    assert np.isclose(temperature[2], 1.0)
+    assert temperature[3] == 1.0
+    assert np.isclose(temperature[4], PLATE_BASE_TEMPERATURE)
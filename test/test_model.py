@@ -1,3 +1,5 @@
+import shutil
+
 from test.test_resources.Strak_2021_model_params_resources import (
     get_Strak_2021_model_parameter_map,
 )
@@ -7,8 +9,8 @@ from SubductionModel import SubductionModel
 from underworld.scaling import units as u
 
 
-def test_model():
-    polygons = SubductionZonePolygons(
+def _getPolygons():
+    return SubductionZonePolygons(
         get_Strak_2021_model_parameter_map(),
         27,
         200e3 * u.meter,
@@ -18,6 +20,10 @@ def test_model():
         30e3 * u.meter,
         100e3 * u.meter,
     )
+
+
+def test_model():
+    polygons = _getPolygons()
     model = SubductionModel(
         name="test",
         modelParameterMap=get_Strak_2021_model_parameter_map(),
@@ -28,3 +34,29 @@ def test_model():
     model.run()
     assert isinstance(polygons, SubductionZonePolygons)
     assert isinstance(model, SubductionModel)
+
+
+def test_model_restart_continues():
+    # checkpoints of an earlier test run would be found first
+    shutil.rmtree("./output/testRestart", ignore_errors=True)
+    model = SubductionModel(
+        name="testRestart",
+        modelParameterMap=get_Strak_2021_model_parameter_map(),
+        stepAmountCheckpoint=1,
+        subductionZonePolygons=_getPolygons(),
+        totalSteps=2,
+    )
+    model.run()
+
+    restarted = SubductionModel(
+        name="testRestart",
+        modelParameterMap=get_Strak_2021_model_parameter_map(),
+        stepAmountCheckpoint=1,
+        totalSteps=4,
+        fromCheckpoint=True,
+    )
+    # the last step of a run is checkpointed before its update
+    assert restarted.startStep == 1
+    # the first step after the restart advects and repopulates the restored swarm
+    restarted.run()
+    assert restarted.currentStep == 4
@@ -3,7 +3,15 @@ from test.test_resources.Strak_2021_model_params_resources import (
 )
 
 import numpy as np
-from modelParameters import ModelParameterMapBuilder
+import pytest
+from modelParameters import (
+    ModelParameterMapBuilder,
+    ScalingCoefficientType,
+    dumpModelParameterMap,
+    getModelParameterMapHash,
+    loadModelParameterMap,
+    replaceDimensionalValues,
+)
 from RheologyFunctions import RheologyFunctions
 from underworld.scaling import units as u
 
@@ -56,3 +64,52 @@ def test_rayleigh_number():
     rheologyFn = RheologyFunctions(get_Strak_2021_model_parameter_map(), None)
     rayleighNumber = rheologyFn.getRayleighNumber()
     assert format(rayleighNumber, ".1E") == format(3.5e7, ".1E")
+
+
+def test_optional_time_step_parameters():
+    assert get_Strak_2021_model_parameter_map().courantSafetyFactor is None
+
+    bluePrint = get_Strak_2021_model_parameter_map(True)
+    builder = ModelParameterMapBuilder.fromBluePrint(bluePrint)
+    builder.setCourantSafetyFactor(u.Quantity(0.5))
+    paramMap = builder.build()
+    assert paramMap.courantSafetyFactor.nonDimensionalValue.magnitude == 0.5
+    assert paramMap.maximalDeltaTime is None
+
+
+def test_non_dimensional_snapshot():
+    parameterMap = get_Strak_2021_model_parameter_map()
+    nonDimensional = parameterMap.nonDimensional
+    assert nonDimensional.gasConstant == 8.3145
+    assert nonDimensional.spBottomLayerViscosity == 50
+    assert nonDimensional.courantSafetyFactor is None
+    assert nonDimensional.lengthCoefficient == 2900e3
+    assert nonDimensional.timeCoefficient == pytest.approx(2900e3**2 / 1e-6)
+    assert nonDimensional.nonDimensionalLength(290 * u.kilometer) == pytest.approx(0.1)
+    assert repr(parameterMap).find("nonDimensional") == -1
+
+
+def test_scaling_coefficients_are_memoized():
+    scalingCoefficient = get_Strak_2021_model_parameter_map().scalingCoefficient
+    assert scalingCoefficient.timeCoefficient is scalingCoefficient.timeCoefficient
+    assert (
+        scalingCoefficient._functionToCoefficientEnumMapper
+        is scalingCoefficient._functionToCoefficientEnumMapper
+    )
+
+
+def test_serialized_parameter_map_round_trip():
+    parameterMap = get_Strak_2021_model_parameter_map()
+    text = dumpModelParameterMap(parameterMap)
+    loaded = loadModelParameterMap(text)
+
+    assert repr(loaded) == repr(parameterMap)
+    assert dumpModelParameterMap(loaded) == text
+    assert getModelParameterMapHash(loaded) == getModelParameterMapHash(parameterMap)
+    assert loaded.modelHeight.scalingType == ScalingCoefficientType.LENGTH
+
+    changed = replaceDimensionalValues(
+        parameterMap, {"spTopLayerViscosity": 3.5e24 * u.pascal * u.second}
+    )
+    assert changed.nonDimensional.spTopLayerViscosity == pytest.approx(1e4)
+    assert getModelParameterMapHash(changed) != getModelParameterMapHash(parameterMap)
@@ -0,0 +1,104 @@
+import csv
+import json
+import os
+
+import numpy as np
+from ParameterSweep import (
+    RESULT_FILE_NAME,
+    RUN_HASH_FILE_NAME,
+    collectResults,
+    expandGrid,
+    expandSweep,
+    getRunOutputPath,
+    getRunSpec,
+    getRunSpecHash,
+    isRunComplete,
+    isRunOutputOf,
+    latinHypercube,
+)
+
+
+def _getSpec():
+    return {
+        "name": "testSweep",
+        "model": {"resolution": [20, 10], "totalSteps": 2},
+        "polygons": {"dip": 27},
+        "grid": {"polygons.dip": [20, 40], "model.solverProfile": ["mumps", "lu"]},
+        "latinHypercube": {
+            "samples": 3,
+            "seed": 0,
+            "ranges": {"parameters.spTopLayerViscosity": [1e23, 1e24]},
+        },
+    }
+
+
+def test_expand_grid():
+    points = expandGrid({"a": [1, 2], "b": [3, 4, 5]})
+    assert len(points) == 6
+    assert points[0] == {"a": 1, "b": 3}
+
+
+def test_latin_hypercube_uses_every_stratum_once():
+    samples = latinHypercube({"x": (0.0, 10.0), "y": (-1.0, 1.0)}, 5, seed=1)
+    xs = np.array([sample["x"] for sample in samples])
+    assert sorted(np.floor(xs / 2.0).astype(int)) == [0, 1, 2, 3, 4]
+    assert all(-1.0 <= sample["y"] <= 1.0 for sample in samples)
+
+
+def test_expand_sweep_and_run_spec():
+    spec = _getSpec()
+    runs = expandSweep(spec)
+    assert len(runs) == 12
+    assert runs[5].name == "testSweep_0005"
+    assert len({run.name for run in runs}) == 12
+
+    runSpec = getRunSpec(spec, runs[0])
+    assert runSpec["name"] == "testSweep_0000"
+    assert runSpec["polygons"]["dip"] == 20
+    assert runSpec["model"]["solverProfile"] == "mumps"
+    assert runSpec["model"]["totalSteps"] == 2
+    assert "spTopLayerViscosity" in runSpec["parameters"]
+    assert runSpec["parameterMap"] is None
+    assert spec["polygons"]["dip"] == 27
+
+
+def test_collect_results(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    spec = {"name": "s", "grid": {"polygons.dip": [20, 40]}}
+    runs = expandSweep(spec)
+    runHashes = {run.name: getRunSpecHash(getRunSpec(spec, run)) for run in runs}
+    outputPath = getRunOutputPath(runs[0])
+    os.makedirs(outputPath)
+    with open(os.path.join(outputPath, RUN_HASH_FILE_NAME), "w") as f:
+        f.write(runHashes[runs[0].name])
+    with open(os.path.join(outputPath, RESULT_FILE_NAME), "w") as f:
+        json.dump({"slabDip": 31.5, "diagnostics": {"Vrms": 2.0}}, f)
+    assert isRunComplete(runs[0], runHashes[runs[0].name])
+    assert not isRunComplete(runs[1], runHashes[runs[1].name])
+
+    with open(collectResults(str(tmp_path), runs, runHashes), newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert rows[0]["slabDip"] == "31.5" and rows[0]["final Vrms"] == "2.0"
+    assert rows[1]["polygons.dip"] == "40" and rows[1]["slabDip"] == ""
+
+
+def test_output_of_other_settings_is_not_reused(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    spec = {"name": "s", "grid": {"polygons.dip": [20]}}
+    run = expandSweep(spec)[0]
+    runHash = getRunSpecHash(getRunSpec(spec, run))
+    assert isRunOutputOf(run, runHash)
+
+    changedSpec = {**spec, "model": {"totalSteps": 5}}
+    changedHash = getRunSpecHash(getRunSpec(changedSpec, run))
+    assert changedHash != runHash
+
+    outputPath = getRunOutputPath(run)
+    os.makedirs(outputPath)
+    with open(os.path.join(outputPath, RUN_HASH_FILE_NAME), "w") as f:
+        f.write(runHash)
+    with open(os.path.join(outputPath, RESULT_FILE_NAME), "w") as f:
+        json.dump({"slabDip": 31.5}, f)
+    assert isRunComplete(run, runHash) and isRunOutputOf(run, runHash)
+    assert not isRunComplete(run, changedHash)
+    assert not isRunOutputOf(run, changedHash)
@@ -0,0 +1,24 @@
+from PhaseTimer import PhaseTimer
+
+
+def test_phase_timer_reports():
+    timer = PhaseTimer()
+    for _ in range(2):
+        with timer.phase("stokesSolve"):
+            pass
+    with timer.phase("checkpoint"):
+        pass
+
+    report = timer.stepReport().splitlines()
+    assert report[0].split() == ["phase", "min", "mean", "max"]
+    assert [line.split()[0] for line in report[1:]] == ["checkpoint", "stokesSolve"]
+    assert timer.stepReport().splitlines()[1:] == []
+    assert len(timer.summary().splitlines()) == 3
+
+
+def test_disabled_phase_timer():
+    timer = PhaseTimer(enabled=False)
+    with timer.phase("stokesSolve"):
+        pass
+    assert timer.stepReport() is None
+    assert timer.summary() is None
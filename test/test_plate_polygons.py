@@ -0,0 +1,35 @@
+import numpy as np
+from PlatePolygons import pointsInPolygon
+from PolygonIndex import PolygonIndex
+
+
+def test_points_in_square():
+    square = np.array([(0.0, 0.0), (1.0, 0.0), (1.0, 1.0), (0.0, 1.0)])
+    points = np.array([(0.5, 0.5), (1.5, 0.5), (0.5, -0.1), (0.99, 0.01)])
+    mask = pointsInPolygon(points, square)
+    assert mask.tolist() == [True, False, False, True]
+
+
+def test_points_in_concave_polygon():
+    # L-shaped polygon, the notch at the top right is outside
+    shape = np.array(
+        [(0.0, 0.0), (2.0, 0.0), (2.0, 1.0), (1.0, 1.0), (1.0, 2.0), (0.0, 2.0)]
+    )
+    points = np.array([(0.5, 1.5), (1.5, 0.5), (1.5, 1.5), (-0.5, 0.5)])
+    mask = pointsInPolygon(points, shape)
+    assert mask.tolist() == [True, True, False, False]
+
+
+def test_polygon_index_matches_brute_force():
+    rng = np.random.default_rng(0)
+    upper = np.array([(0.5, 1.0), (3.0, 1.0), (3.6, 0.2), (3.5, 0.15), (2.9, 0.9)])
+    lower = np.array([(0.5, 0.9), (2.9, 0.9), (3.5, 0.15), (3.4, 0.1), (0.5, 0.8)])
+    polygons = [(upper, 1), (lower, 2)]
+    index = PolygonIndex(polygons, (0.0, 0.0), (4.0, 1.0), (40, 10))
+
+    points = rng.uniform((0.0, 0.0), (4.0, 1.0), size=(20000, 2))
+    expected = np.zeros(len(points), dtype=np.int32)
+    for shape, label in polygons:
+        expected[pointsInPolygon(points, shape)] = label
+
+    assert np.array_equal(index.classify(points, 0), expected)
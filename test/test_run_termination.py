@@ -0,0 +1,24 @@
+import os
+import signal
+
+from RunTermination import RunTermination
+
+
+def test_stop_on_signal():
+    termination = RunTermination()
+    termination.installSignalHandlers()
+    try:
+        assert not termination.shouldStop()
+        os.kill(os.getpid(), signal.SIGUSR1)
+        assert termination.shouldStop()
+    finally:
+        termination.restoreSignalHandlers()
+    assert signal.getsignal(signal.SIGUSR1) is signal.SIG_DFL
+
+
+def test_stop_before_wall_time_budget():
+    termination = RunTermination(wallTimeBudget=100.0, safetyFactor=1.5)
+    termination.recordStepTime(20.0)
+    assert not termination.shouldStop()
+    termination.recordCheckPointTime(50.0)
+    assert termination.shouldStop()
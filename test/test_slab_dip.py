@@ -0,0 +1,61 @@
+import numpy as np
+from SlabDip import measureSlabDip, measureTrenchPosition
+
+
+def _getSlabParticles(dip, rng):
+    # flat plate 0.1 thick up to x = 2 then a straight slab dipping below it
+    plate = rng.uniform((0.0, 0.9), (2.0, 1.0), size=(2000, 2))
+    along = rng.uniform(0.0, 1.5, size=6000)
+    across = rng.uniform(-0.05, 0.05, size=6000)
+    angle = np.radians(dip)
+    slab = np.column_stack(
+        (
+            2.0 + along * np.cos(angle) + across * np.sin(angle),
+            1.0 - along * np.sin(angle) + across * np.cos(angle),
+        )
+    )
+    mantle = rng.uniform((0.0, 0.0), (4.0, 1.0), size=(3000, 2))
+    coordinates = np.concatenate([plate, slab, mantle])
+    materials = np.concatenate(
+        [np.ones(len(plate)), rng.integers(1, 4, len(slab)), np.zeros(len(mantle))]
+    ).astype(np.int32)
+    return coordinates, materials
+
+
+def test_slab_dip():
+    rng = np.random.default_rng(0)
+    for dip in (30.0, 45.0, 70.0):
+        coordinates, materials = _getSlabParticles(dip, rng)
+        result = measureSlabDip(
+            coordinates,
+            materials,
+            surfaceHeight=1.0,
+            minDepth=0.15,
+            maxDepth=0.6,
+            binWidth=0.05,
+        )
+        assert abs(result.representativeDip - dip) < 2.0
+        assert len(result.dips) == len(result.depths) == 8
+        assert np.all(np.abs(result.dips - dip) < 10.0)
+
+
+def test_slab_dip_without_slab():
+    coordinates = np.array([(0.5, 0.5), (0.6, 0.4)])
+    result = measureSlabDip(
+        coordinates,
+        np.zeros(2),
+        surfaceHeight=1.0,
+        minDepth=0.1,
+        maxDepth=1.0,
+        binWidth=0.1,
+    )
+    assert np.isnan(result.representativeDip)
+    assert len(result.dips) == 0
+
+
+def test_trench_position():
+    coordinates, materials = _getSlabParticles(45.0, np.random.default_rng(0))
+    trenchPosition = measureTrenchPosition(
+        coordinates, materials, surfaceHeight=1.0, maxDepth=0.02
+    )
+    assert 2.0 < trenchPosition < 2.1